@@ -1,3 +1,57 @@
 from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import ProfileCapture
+
+
+@admin.register(ProfileCapture)
+class ProfileCaptureAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'view_name', 'method', 'path', 'data_file', 'duration', 'query_count', 'query_time')
+    list_filter = ('view_name', 'method')
+    search_fields = ('path', 'data_file__file_name')
+    date_hierarchy = 'created_at'
+    readonly_fields = (
+        'data_file', 'view_name', 'path', 'method', 'created_at', 'duration',
+        'query_count', 'query_time', 'download', 'summary_text', 'allocations_text', 'slow_queries',
+    )
+    exclude = ('stats_file', 'summary', 'allocations')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:capture_id>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='DataCERT_profilecapture_download',
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, capture_id):
+        capture = get_object_or_404(ProfileCapture, id=capture_id)
+        if not capture.stats_file:
+            raise Http404('No stats file for this capture')
+        return FileResponse(
+            capture.stats_file.open('rb'),
+            as_attachment=True,
+            filename=capture.stats_file.name.split('/')[-1],
+        )
+
+    @admin.display(description='cProfile stats')
+    def download(self, obj):
+        if not obj.stats_file:
+            return '-'
+        url = reverse('admin:DataCERT_profilecapture_download', args=[obj.id])
+        return format_html('<a href="{}">Download .prof</a> (open with pstats or snakeviz)', url)
+
+    @admin.display(description='Top functions (cumulative)')
+    def summary_text(self, obj):
+        return format_html('<pre>{}</pre>', obj.summary)
+
+    @admin.display(description='Top allocations')
+    def allocations_text(self, obj):
+        return format_html('<pre>{}</pre>', obj.allocations)
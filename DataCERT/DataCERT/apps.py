@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DataValidationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'DataCERT'
+
+    def ready(self):
+        # Connects the signal dropping the errors of deleted reports
+        from .utils import error_storage  # noqa: F401
@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DataCERT.settings')
 
 application = get_asgi_application()
+
+# Optionally import the ingest and validation dependencies before the
+# first request, see DATACERT_PRELOAD
+from DataCERT.utils.preload import preload_if_enabled  # noqa: E402
+
+preload_if_enabled()
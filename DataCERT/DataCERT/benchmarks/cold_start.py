@@ -0,0 +1,107 @@
+from django.conf import settings
+from typing import Any, Dict, List, Optional
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Entry points started in a fresh interpreter, with the environment
+# variables they run under
+TARGETS = {
+    'wsgi': ('import DataCERT.wsgi', {}),
+    'asgi': ('import DataCERT.asgi', {}),
+    'wsgi_preload': ('import DataCERT.wsgi', {'DATACERT_PRELOAD': 'True'}),
+    # check loads every app, the URLconf and so every view module
+    'manage_check': (
+        "from django.core.management import execute_from_command_line; "
+        "execute_from_command_line(['manage.py', 'check'])",
+        {}
+    ),
+}
+
+# Modules the web and admin processes should not load at startup
+HEAVY_MODULES = ('numpy', 'pandas', 'chardet', 'pyarrow')
+
+# Marks the line of the child's output holding its measurements
+RESULT_MARKER = 'COLD_START_RESULT '
+
+_PROBE = """
+import json, os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DataCERT.settings')
+{code}
+seconds = time.perf_counter() - started
+# ru_maxrss carries over the parent's peak through fork and exec, the
+# high water mark of the process' own memory does not
+peak_rss = None
+try:
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                peak_rss = int(line.split()[1]) * 1024
+except OSError:
+    pass
+print({marker!r} + json.dumps({{
+    'seconds': seconds,
+    'peak_rss': peak_rss,
+    'heavy_modules': [name for name in {heavy!r} if name in sys.modules],
+}}), flush=True)
+"""
+
+
+def measure(target: str) -> Dict[str, Any]:
+    """
+    Start a target once in a new interpreter
+
+    Returns:
+        seconds spent importing and running the target, process_seconds for
+        the whole process including interpreter startup, peak_rss in bytes
+        and the heavy modules that were loaded
+    """
+    code, env = TARGETS[target]
+    probe = _PROBE.format(code=code, marker=RESULT_MARKER, heavy=HEAVY_MODULES)
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', probe],
+        cwd=str(settings.BASE_DIR),
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+    )
+    process_seconds = time.perf_counter() - started
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return {**json.loads(line[len(RESULT_MARKER):]), 'process_seconds': process_seconds}
+    raise RuntimeError(f"{target} failed to start:\n{completed.stderr.strip()}")
+
+
+def run_cold_start(targets: Optional[List[str]] = None, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Measure the cold start of each target, the fastest repetition is kept
+
+    Returns:
+        Dict with parameters and per-target results, in the format of
+        BenchmarkRunner so the same baseline comparison applies
+    """
+    targets = targets or list(TARGETS)
+    scenarios: Dict[str, Dict[str, Any]] = {}
+    for _ in range(repeat):
+        for target in targets:
+            result = measure(target)
+            best = scenarios.get(target)
+            if best is None or result['seconds'] < best['seconds']:
+                scenarios[target] = result
+    return {
+        'params': {
+            'targets': targets,
+            'repeat': repeat,
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'scenarios': scenarios,
+    }
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Any, Optional
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+COLUMN_TYPES = ('int', 'float', 'text', 'date', 'bool')
+
+# Token written into non-text columns when an invalid value is injected
+INVALID_TOKEN = 'invalid'
+
+# Non-ASCII prefixes so the chosen encoding actually matters
+TEXT_PREFIXES = np.array(['user', 'usér', 'naïve', 'jürgen'])
+
+
+def parse_type_mix(spec: str) -> Dict[str, int]:
+    """
+    Parse a column type mix such as "int:2,text:3,date:1"
+
+    Returns:
+        Dict mapping column type to its relative weight
+    """
+    mix = {}
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition(':')
+        name = name.strip()
+        if name not in COLUMN_TYPES:
+            raise ValueError(f"Unknown column type: {name}")
+        mix[name] = int(weight or 1)
+    if not mix:
+        raise ValueError('Type mix must contain at least one column type')
+    return mix
+
+
+class SyntheticCSVGenerator:
+    """
+    Generates reproducible CSV files of arbitrary size for benchmarks.
+
+    Data is produced in blocks with numpy so that 100M-row files can be
+    written without holding them in memory.
+    """
+    def __init__(
+        self,
+        rows: int,
+        columns: int = 8,
+        type_mix: Optional[Dict[str, int]] = None,
+        delimiter: str = ';',
+        encoding: str = 'utf-8',
+        error_rate: float = 0.0,
+        seed: int = 42,
+        block_size: int = 100000,
+    ):
+        """
+        Initialize the generator
+
+        Args:
+            rows: Number of data rows to write
+            columns: Number of columns
+            type_mix: Relative weights of column types, see parse_type_mix
+            delimiter: Field delimiter
+            encoding: Output file encoding
+            error_rate: Fraction of cells replaced by a missing or invalid value
+            seed: Random seed, the same parameters always produce the same file
+            block_size: Number of rows generated at once
+        """
+        if not 0 <= error_rate <= 1:
+            raise ValueError('error_rate must be between 0 and 1')
+
+        self.rows = rows
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.error_rate = error_rate
+        self.seed = seed
+        self.block_size = block_size
+        self.column_specs = self._build_columns(columns, type_mix or {'int': 1, 'float': 1, 'text': 2, 'date': 1, 'bool': 1})
+
+    @staticmethod
+    def _build_columns(columns: int, type_mix: Dict[str, int]) -> List[Tuple[str, str]]:
+        """Assign a type to each column following the weights of the mix"""
+        cycle = [name for name, weight in type_mix.items() for _ in range(weight)]
+        return [(f"{cycle[i % len(cycle)]}_{i}", cycle[i % len(cycle)]) for i in range(columns)]
+
+    def _generate_column(self, rng: np.random.Generator, column_type: str, size: int) -> np.ndarray:
+        """Generate valid values for one column"""
+        if column_type == 'int':
+            return rng.integers(0, 1_000_000, size)
+        if column_type == 'float':
+            return np.round(rng.random(size) * 1000, 4)
+        if column_type == 'text':
+            prefixes = TEXT_PREFIXES[rng.integers(0, len(TEXT_PREFIXES), size)]
+            return np.char.add(prefixes, rng.integers(0, 100_000, size).astype(str))
+        if column_type == 'date':
+            days = rng.integers(0, 20_000, size).astype('timedelta64[D]')
+            return np.datetime_as_string(np.datetime64('1970-01-01') + days, unit='D')
+        return np.where(rng.random(size) < 0.5, 'true', 'false')
+
+    def _generate_block(self, rng: np.random.Generator, size: int) -> Tuple[pd.DataFrame, int]:
+        """Generate one block of rows, returns the block and the number of injected errors"""
+        data = {}
+        injected = 0
+        for name, column_type in self.column_specs:
+            values = self._generate_column(rng, column_type, size)
+            if self.error_rate:
+                mask = rng.random(size) < self.error_rate
+                if mask.any():
+                    values = values.astype(object)
+                    # Text columns only get missing values, other types get
+                    # an even split of missing and unparseable values
+                    if column_type == 'text':
+                        values[mask] = None
+                    else:
+                        invalid = mask & (rng.random(size) < 0.5)
+                        values[mask] = None
+                        values[invalid] = INVALID_TOKEN
+                    injected += int(mask.sum())
+            data[name] = values
+        return pd.DataFrame(data), injected
+
+    def write(self, path: str) -> Dict[str, Any]:
+        """
+        Write the synthetic file
+
+        Returns:
+            Dict containing generation statistics
+        """
+        rng = np.random.default_rng(self.seed)
+        injected_errors = 0
+        written = 0
+
+        with open(path, 'w', encoding=self.encoding, newline='') as file:
+            while written < self.rows:
+                size = min(self.block_size, self.rows - written)
+                block, injected = self._generate_block(rng, size)
+                block.to_csv(file, sep=self.delimiter, index=False, header=written == 0)
+                injected_errors += injected
+                written += size
+
+        logger.info(f"Generated {written} rows in {path}")
+        return {
+            'rows': written,
+            'columns': len(self.column_specs),
+            'bytes': os.path.getsize(path),
+            'injected_errors': injected_errors,
+        }
@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.db import connection
+from django.test import RequestFactory
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import json
+import logging
+import os
+import platform
+import time
+
+from ..models import DataFile
+from ..utils.csv_processor import CSVProcessor
+from ..utils.data_mover import DataMover
+from ..utils.instrumentation import rss_sampler
+from ..utils.validators.default import DefaultValidator
+from ..views import ValidationReportView
+from .generator import SyntheticCSVGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkRunner:
+    """
+    Runs the timed pipeline scenarios against the configured database.
+
+    Each repetition runs the whole pipeline on the same synthetic file,
+    the fastest repetition of every scenario is reported.
+    """
+    SCENARIOS = (
+        'process_file',
+        'validate',
+        'save_validation_results',
+        'report_view',
+        'move_validated_data',
+    )
+
+    def __init__(self, generator: SyntheticCSVGenerator, workdir: str, repeat: int = 1):
+        self.generator = generator
+        self.workdir = workdir
+        self.repeat = repeat
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Generate the input file and run all scenarios
+
+        Returns:
+            Dict with benchmark parameters and per-scenario results
+        """
+        path = os.path.join(self.workdir, f"bench_{self.generator.rows}.csv")
+        file_stats = self.generator.write(path)
+
+        scenarios: Dict[str, Dict[str, Any]] = {}
+        try:
+            for _ in range(self.repeat):
+                for name, result in self._run_once(path).items():
+                    best = scenarios.get(name)
+                    if best is None or result['seconds'] < best['seconds']:
+                        scenarios[name] = result
+        finally:
+            os.remove(path)
+
+        return {
+            'params': {
+                'rows': self.generator.rows,
+                'columns': len(self.generator.column_specs),
+                'column_types': [column_type for _, column_type in self.generator.column_specs],
+                'delimiter': self.generator.delimiter,
+                'encoding': self.generator.encoding,
+                'error_rate': self.generator.error_rate,
+                'seed': self.generator.seed,
+                'file_bytes': file_stats['bytes'],
+            },
+            'environment': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+            },
+            'scenarios': scenarios,
+        }
+
+    def _timed(self, func: Callable[[], Any], rows: int) -> Tuple[Any, Dict[str, Any]]:
+        """Time a single call, peak_rss is sampled during the call like a pipeline stage's"""
+        with rss_sampler.watch() as peak:
+            start = time.perf_counter()
+            value = func()
+            seconds = time.perf_counter() - start
+        return value, {
+            'seconds': seconds,
+            'rows': rows,
+            'rows_per_second': rows / seconds if seconds else None,
+            'peak_rss': peak.get('rss'),
+        }
+
+    def _run_once(self, path: str) -> Dict[str, Dict[str, Any]]:
+        """Run every scenario once, in pipeline order"""
+        results = {}
+        data_file = DataFile.objects.create(file_name=os.path.basename(path))
+        try:
+            processor = CSVProcessor(path)
+            result, results['process_file'] = self._timed(processor.process_file, self.generator.rows)
+            if not result['success']:
+                raise RuntimeError(f"process_file failed: {result['error']}")
+
+            validator = DefaultValidator(data_file)
+            _, results['validate'] = self._timed(validator.validate, self.generator.rows)
+
+            report, results['save_validation_results'] = self._timed(
+                validator.save_validation_results, len(validator.errors)
+            )
+
+            request = RequestFactory().get(f'/validation-report/{report.id}/')
+            view = ValidationReportView.as_view()
+            _, results['report_view'] = self._timed(
+                lambda: view(request, report_id=report.id).render(),
+                min(report.error_count, 50)
+            )
+
+            # The move is benchmarked regardless of injected errors
+            report.passed = True
+            mover = DataMover(data_file, report)
+            result, results['move_validated_data'] = self._timed(
+                mover.move_validated_data, self.generator.rows
+            )
+            if not result['success']:
+                raise RuntimeError(f"move_validated_data failed: {result['error']}")
+        finally:
+            self._cleanup(data_file)
+
+        return results
+
+    def _cleanup(self, data_file: DataFile) -> None:
+        """Drop the benchmark tables and records"""
+        table_name = data_file.table_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                DROP TABLE IF EXISTS {settings.DATABASE_SCHEMAS['RAW']}."raw_{table_name}" CASCADE;
+            """)
+            cursor.execute(f"""
+                DROP TABLE IF EXISTS {settings.DATABASE_SCHEMAS['VALIDATED']}."validated_{table_name}" CASCADE;
+            """)
+        data_file.delete()
+
+
+def compare_with_baseline(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float,
+                          rss_tolerance: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Compare a benchmark run with a baseline
+
+    Args:
+        tolerance: Allowed slowdown, 0.10 flags scenarios over 110% of the
+            baseline time
+        rss_tolerance: Allowed growth of peak_rss, memory is not compared
+            when None or when either side did not measure it
+
+    Returns:
+        List of regressions, each with the scenario, the metric (seconds
+        or peak_rss), its value, the baseline value and their ratio
+    """
+    if results['params'] != baseline.get('params'):
+        logger.warning('Benchmark parameters differ from the baseline, comparison may not be meaningful')
+
+    limits = {'seconds': tolerance}
+    if rss_tolerance is not None:
+        limits['peak_rss'] = rss_tolerance
+
+    regressions = []
+    for name, result in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(name) or {}
+        for metric, limit in limits.items():
+            if not reference.get(metric) or not result.get(metric):
+                continue
+            ratio = result[metric] / reference[metric]
+            if ratio > 1 + limit:
+                regressions.append({
+                    'scenario': name,
+                    'metric': metric,
+                    'value': result[metric],
+                    'baseline': reference[metric],
+                    'ratio': ratio,
+                })
+    return regressions
+
+
+def describe_regression(regression: Dict[str, Any]) -> str:
+    """One line summary of a regression from compare_with_baseline"""
+    if regression['metric'] == 'peak_rss':
+        value = f"{regression['value'] / 1024 / 1024:.1f} MB peak RSS"
+        baseline = f"{regression['baseline'] / 1024 / 1024:.1f} MB"
+    else:
+        value = f"{regression['value']:.3f}s"
+        baseline = f"{regression['baseline']:.3f}s"
+    return f"Regression in {regression['scenario']}: {value} vs {baseline} baseline ({regression['ratio']:.2f}x)"
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save_results(results: Dict[str, Any], path: str) -> None:
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
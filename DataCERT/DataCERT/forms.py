@@ -1,13 +1,35 @@
 from django import forms
+from django.conf import settings
+import zipfile
 from .models import DataFile
+from .utils.batch import is_batch_file
+from .utils.compression import COMPRESSED_SUFFIXES, find_zip_member
+from .utils.progress import PROGRESS_ID_PATTERN
+import uuid
 
-class CSVUploadForm(forms.ModelForm):
+
+class ProgressFormMixin(forms.Form):
+    """Hidden token the page uses to follow the job's progress stream"""
+    progress_id = forms.CharField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.is_bound:
+            self.initial.setdefault('progress_id', uuid.uuid4().hex)
+
+    def clean_progress_id(self):
+        progress_id = self.cleaned_data.get('progress_id')
+        if progress_id and not PROGRESS_ID_PATTERN.match(progress_id):
+            return ''
+        return progress_id
+
+class CSVUploadForm(ProgressFormMixin, forms.ModelForm):
     file = forms.FileField(
         label='Select a CSV file',
-        help_text='Max file size: 2GB. CSV files only.',
+        help_text='Max file size: 2GB. CSV files, optionally compressed (.csv.gz, .csv.zst, .zip).',
         widget=forms.FileInput(attrs={
             'class': 'form-control',
-            'accept': '.csv'
+            'accept': '.csv,.gz,.zst,.zip'
         })
     )
 
@@ -21,13 +43,74 @@ class CSVUploadForm(forms.ModelForm):
     def clean_file(self):
         file = self.cleaned_data.get('file')
         if file:
-            if not file.name.endswith('.csv'):
-                raise forms.ValidationError('Only CSV files are allowed.')
+            name = file.name.lower()
+            if not name.endswith(('.csv',) + COMPRESSED_SUFFIXES):
+                raise forms.ValidationError('Only CSV files (optionally .gz, .zst or .zip compressed) are allowed.')
             if file.size > 2 * 1024 * 1024 * 1024:  # 2GB limit
                 raise forms.ValidationError('File size must be under 2GB.')
+            if name.endswith('.zip'):
+                self._check_zip(file)
         return file
 
-class ValidationForm(forms.Form):
+    def _check_zip(self, file):
+        """Reject zip archives whose CSV is over the decompressed limit"""
+        try:
+            with zipfile.ZipFile(file) as archive:
+                member = find_zip_member(archive)
+        except (zipfile.BadZipFile, ValueError) as e:
+            raise forms.ValidationError(f'Invalid zip archive: {str(e)}')
+        finally:
+            file.seek(0)
+        if member.file_size > settings.DATACERT_MAX_DECOMPRESSED_BYTES:
+            raise forms.ValidationError('Decompressed file size exceeds the allowed limit.')
+
+class MultipleFileInput(forms.ClearableFileInput):
+    allow_multiple_selected = True
+
+class MultipleFileField(forms.FileField):
+    """File field accepting several files, cleaned to a list"""
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('widget', MultipleFileInput())
+        super().__init__(*args, **kwargs)
+
+    def clean(self, data, initial=None):
+        single_file_clean = super().clean
+        if isinstance(data, (list, tuple)):
+            return [single_file_clean(item, initial) for item in data]
+        return [single_file_clean(data, initial)]
+
+class BatchUploadForm(forms.Form):
+    name = forms.CharField(
+        max_length=255,
+        required=False,
+        help_text='Defaults to the upload date and time.',
+        widget=forms.TextInput(attrs={'class': 'form-control'})
+    )
+    files = MultipleFileField(
+        label='Select CSV files',
+        help_text='Several CSV files (optionally .csv.gz, .csv.zst) or zip archives of CSV files. Max 2GB each.',
+        widget=MultipleFileInput(attrs={
+            'class': 'form-control',
+            'accept': '.csv,.gz,.zst,.zip'
+        })
+    )
+    validate = forms.BooleanField(
+        label='Validate each file after loading',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+
+    def clean_files(self):
+        files = self.cleaned_data.get('files', [])
+        for file in files:
+            if not is_batch_file(file.name):
+                raise forms.ValidationError(f'{file.name}: only CSV files (optionally .gz, .zst or .zip compressed) are allowed.')
+            if file.size > 2 * 1024 * 1024 * 1024:  # 2GB limit
+                raise forms.ValidationError(f'{file.name}: file size must be under 2GB.')
+        return files
+
+class ValidationForm(ProgressFormMixin, forms.Form):
     data_file = forms.ModelChoiceField(
         queryset=DataFile.objects.filter(status='uploaded'),
         label='Select File to Validate',
@@ -42,6 +125,28 @@ class ValidationForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-control'})
     )
     
+    mode = forms.ChoiceField(
+        choices=[
+            ('full', 'Full Validation'),
+            ('preview', 'Preview (random sample, estimated error rates)')
+        ],
+        initial='full',
+        widget=forms.Select(attrs={'class': 'form-control'})
+    )
+
+    abort_error_rate = forms.FloatField(
+        label='Stop early above error rate (%)',
+        required=False,
+        min_value=0,
+        max_value=100,
+        initial=lambda: settings.DATACERT_ABORT_ERROR_RATE or None,
+        help_text=(
+            'Full validation stops once clearly more rows than this fail. '
+            'Empty uses the DATACERT_ABORT_ERROR_RATE setting, 0 never stops.'
+        ),
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': 'any'})
+    )
+    
     custom_validator_code = forms.CharField(
         widget=forms.Textarea(attrs={
             'class': 'form-control',
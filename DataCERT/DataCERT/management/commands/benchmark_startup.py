@@ -0,0 +1,64 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.cold_start import TARGETS, run_cold_start
+from ...benchmarks.runner import compare_with_baseline, describe_regression, load_baseline, save_results
+
+
+class Command(BaseCommand):
+    help = 'Measure import time and memory of a cold start of wsgi.py, asgi.py and manage.py'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target',
+            dest='targets',
+            action='append',
+            choices=list(TARGETS),
+            help='Entry point to measure, may be repeated (default: all)',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Repetitions, the fastest one is kept')
+        parser.add_argument('--output', default=None, help='Write results to this JSON file')
+        parser.add_argument('--baseline', default=None, help='Compare results with this JSON baseline')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.10,
+            help='Allowed slowdown against the baseline before flagging a regression (default: 0.10)',
+        )
+        parser.add_argument(
+            '--rss-tolerance',
+            type=float,
+            default=0.10,
+            help='Allowed growth of peak RSS against the baseline before flagging a regression (default: 0.10)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = run_cold_start(options['targets'], repeat=options['repeat'])
+        except RuntimeError as e:
+            raise CommandError(str(e))
+
+        for name, result in results['scenarios'].items():
+            rss = f"{result['peak_rss'] / 1024 / 1024:>8.1f} MB" if result['peak_rss'] else '       - MB'
+            heavy = ', '.join(result['heavy_modules']) or '-'
+            self.stdout.write(
+                f"{name:<16} {result['seconds']:>8.3f}s  {result['process_seconds']:>8.3f}s total  {rss}  heavy: {heavy}"
+            )
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+
+        if options['baseline']:
+            regressions = compare_with_baseline(
+                results, load_baseline(options['baseline']), options['tolerance'],
+                rss_tolerance=options['rss_tolerance']
+            )
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(describe_regression(regression)))
+            if regressions:
+                raise CommandError(f"{len(regressions)} target(s) regressed against the baseline")
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,52 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...utils.data_exporter import DataExporter
+
+
+class Command(BaseCommand):
+    help = 'Stream a validated table to CSV, gzip-compressed CSV or Parquet using COPY TO STDOUT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table_name', help='Table name of the uploaded file, e.g. username for username.csv')
+        parser.add_argument(
+            '--format',
+            dest='export_format',
+            choices=list(DataExporter.FORMATS),
+            default='csv',
+        )
+        parser.add_argument(
+            '--columns',
+            default='',
+            help='Comma-separated list of columns to export (default: all)',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            default='-',
+            help='Output file path, "-" writes to stdout',
+        )
+
+    def handle(self, *args, **options):
+        columns = [col for col in options['columns'].split(',') if col]
+
+        try:
+            exporter = DataExporter(
+                options['table_name'],
+                columns=columns,
+                export_format=options['export_format'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['output'] == '-':
+            exporter.write_to(sys.stdout.buffer)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['output'], 'wb') as output:
+            written = exporter.write_to(output)
+
+        self.stderr.write(
+            self.style.SUCCESS(f'Wrote {written} bytes to {options["output"]}')
+        )
@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.generator import SyntheticCSVGenerator, parse_type_mix
+
+
+def add_generator_arguments(parser):
+    """Arguments shared by the generator and benchmark commands"""
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Number of data rows (default: 1M)')
+    parser.add_argument('--columns', type=int, default=8, help='Number of columns')
+    parser.add_argument(
+        '--types',
+        default='int:1,float:1,text:2,date:1,bool:1',
+        help='Column type mix as type:weight pairs, types are int, float, text, date, bool',
+    )
+    parser.add_argument('--delimiter', default=';')
+    parser.add_argument('--encoding', default='utf-8')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of cells made missing or invalid')
+    parser.add_argument('--seed', type=int, default=42)
+
+
+def build_generator(options) -> SyntheticCSVGenerator:
+    try:
+        return SyntheticCSVGenerator(
+            rows=options['rows'],
+            columns=options['columns'],
+            type_mix=parse_type_mix(options['types']),
+            delimiter=options['delimiter'],
+            encoding=options['encoding'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = 'Write a reproducible synthetic CSV file for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the CSV file to write')
+        add_generator_arguments(parser)
+
+    def handle(self, *args, **options):
+        stats = build_generator(options).write(options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {stats['rows']} rows, {stats['columns']} columns, {stats['bytes']} bytes "
+            f"with {stats['injected_errors']} injected errors to {options['output']}"
+        ))
@@ -0,0 +1,95 @@
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...models import ValidationReport
+from ...utils.error_storage import (
+    archive_errors, drop_errors, drop_partitions_before, get_partitions, is_partitioned, partition_name
+)
+
+
+class Command(BaseCommand):
+    help = 'Remove the validation errors of old reports, optionally archiving them to compressed CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.DATACERT_ERROR_RETENTION_DAYS,
+            help='Purge reports validated more than this many days ago (default: DATACERT_ERROR_RETENTION_DAYS)',
+        )
+        parser.add_argument(
+            '--report',
+            type=int,
+            action='append',
+            default=[],
+            help='Purge this report whatever its age, may be repeated',
+        )
+        parser.add_argument(
+            '--archive-dir',
+            default='',
+            help='Write each report\'s errors to <dir>/report_<id>_errors.csv.gz before dropping them',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='List the reports that would be purged',
+        )
+
+    def handle(self, *args, **options):
+        reports = ValidationReport.objects.filter(errors_purged_at__isnull=True, error_count__gt=0)
+        cutoff = None
+        if options['report']:
+            reports = reports.filter(id__in=options['report'])
+        else:
+            cutoff = timezone.now() - timedelta(days=options['days'])
+            reports = reports.filter(validation_date__lt=cutoff)
+        reports = list(reports.select_related('data_file').order_by('validation_date'))
+
+        archive_dir = options['archive_dir']
+        if archive_dir:
+            if not is_partitioned():
+                raise CommandError('Archiving uses COPY and needs the partitioned Postgres error table')
+            os.makedirs(archive_dir, exist_ok=True)
+
+        if options['dry_run']:
+            for report in reports:
+                self.stdout.write(f'Would purge {self._label(report)}')
+            if cutoff is not None:
+                for name, _, end in get_partitions():
+                    if end <= cutoff:
+                        self.stdout.write(f'Would drop partition {name}')
+            return
+
+        archives = {}
+        if archive_dir:
+            for report in reports:
+                archives[report.id] = os.path.join(archive_dir, f'report_{report.id}_errors.csv.gz')
+                size = archive_errors(report.id, archives[report.id])
+                self.stdout.write(f'Archived {self._label(report)} to {archives[report.id]} ({size} bytes)')
+
+        # Whole months past the cutoff are detached, without blocking
+        # queries on other months, and dropped
+        dropped = set()
+        if cutoff is not None:
+            dropped = set(drop_partitions_before(cutoff, concurrently=True))
+            for name in sorted(dropped):
+                self.stdout.write(f'Dropped partition {name}')
+
+        for report in reports:
+            if partition_name(report.validation_date) not in dropped:
+                # The month also holds newer reports, or was picked with --report
+                drop_errors(report.id)
+            report.errors_purged_at = timezone.now()
+            report.errors_archive = archives.get(report.id, '')
+            report.save(update_fields=['errors_purged_at', 'errors_archive'])
+            self.stdout.write(f'Purged {self._label(report)}')
+
+        self.stderr.write(self.style.SUCCESS(f'Purged the errors of {len(reports)} reports'))
+
+    @staticmethod
+    def _label(report: ValidationReport) -> str:
+        return f'Report {report.id} ({report.data_file.file_name}, {report.error_count} errors)'
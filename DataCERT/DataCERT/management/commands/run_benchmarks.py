@@ -0,0 +1,49 @@
+import json
+import tempfile
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...benchmarks.runner import BenchmarkRunner, compare_with_baseline, describe_regression, load_baseline, save_results
+from .generate_synthetic_csv import add_generator_arguments, build_generator
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the ingest, validation, report and move paths against the configured database'
+
+    def add_arguments(self, parser):
+        add_generator_arguments(parser)
+        parser.add_argument('--repeat', type=int, default=1, help='Repetitions, the fastest one is kept')
+        parser.add_argument('--workdir', default=None, help='Directory for the generated file (default: temp dir)')
+        parser.add_argument('--output', default=None, help='Write results to this JSON file')
+        parser.add_argument('--baseline', default=None, help='Compare results with this JSON baseline')
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.10,
+            help='Allowed slowdown against the baseline before flagging a regression (default: 0.10)',
+        )
+
+    def handle(self, *args, **options):
+        generator = build_generator(options)
+
+        with tempfile.TemporaryDirectory(dir=options['workdir']) as workdir:
+            results = BenchmarkRunner(generator, workdir, repeat=options['repeat']).run()
+
+        for name, result in results['scenarios'].items():
+            self.stdout.write(f"{name:<28} {result['seconds']:>10.3f}s  {result['rows']:>12} rows")
+
+        if options['output']:
+            save_results(results, options['output'])
+            self.stdout.write(f"Results written to {options['output']}")
+        else:
+            self.stdout.write(json.dumps(results, indent=2))
+
+        if options['baseline']:
+            regressions = compare_with_baseline(
+                results, load_baseline(options['baseline']), options['tolerance']
+            )
+            for regression in regressions:
+                self.stderr.write(self.style.ERROR(describe_regression(regression)))
+            if regressions:
+                raise CommandError(f"{len(regressions)} scenario(s) regressed against the baseline")
+            self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,108 @@
+import os
+import shutil
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ...models import IngestBatch
+from ...utils.batch import BatchIngester, fail_stale_batches, is_batch_file
+
+# Processed files are moved here, below the watched directory
+PROCESSED_DIR = 'processed'
+
+
+class Command(BaseCommand):
+    help = 'Watch a directory and load every CSV dropped into it as a batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory receiving the files')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Files processed at once (default: DATACERT_BATCH_WORKERS)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=10.0,
+            help='Seconds between directory scans',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process the files present now and exit',
+        )
+        parser.add_argument(
+            '--no-validate',
+            action='store_true',
+            help='Only load the files, without running the default validator',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'{directory} is not a directory')
+        processed_dir = os.path.join(directory, PROCESSED_DIR)
+        os.makedirs(processed_dir, exist_ok=True)
+
+        # Sizes seen at the previous scan, a file is only picked up once
+        # its size stops changing so partial copies are left alone
+        last_sizes = {}
+        while True:
+            # Batches of a previous run of this command or of a web worker
+            # that stopped part way are closed, see fail_stale_batches
+            stale = fail_stale_batches()
+            if stale:
+                self.stderr.write(self.style.WARNING(f'Closed {stale} batches whose process stopped'))
+
+            sizes = self._scan(directory)
+            if options['once']:
+                ready = sorted(sizes)
+            else:
+                ready = sorted(name for name, size in sizes.items() if last_sizes.get(name) == size)
+            last_sizes = sizes
+
+            if ready:
+                self._run_batch(directory, processed_dir, ready, options)
+                for name in ready:
+                    last_sizes.pop(name, None)
+
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def _scan(self, directory):
+        sizes = {}
+        for entry in os.scandir(directory):
+            if entry.is_file() and is_batch_file(entry.name):
+                sizes[entry.name] = entry.stat().st_size
+        return sizes
+
+    def _run_batch(self, directory, processed_dir, names, options):
+        batch = IngestBatch.objects.create(
+            name=timezone.now().strftime(f'{os.path.basename(os.path.abspath(directory))} %Y-%m-%d %H:%M:%S'),
+            source='watch',
+            validate=not options['no_validate'],
+        )
+
+        # Files are moved out of the watched directory before loading, so
+        # a crash never loads them twice
+        batch_dir = os.path.join(processed_dir, f'batch_{batch.id}')
+        os.makedirs(batch_dir)
+        ingester = BatchIngester(batch, workers=options['workers'])
+        for name in names:
+            path = os.path.join(batch_dir, name)
+            shutil.move(os.path.join(directory, name), path)
+            ingester.add_file(path, name)
+
+        self.stderr.write(f'Batch {batch.name}: {len(ingester.files)} files')
+        ingester.run()
+
+        counts = batch.file_counts()
+        style = self.style.SUCCESS if batch.status == 'completed' else self.style.WARNING
+        self.stderr.write(style(
+            f'Batch {batch.name} {batch.get_status_display().lower()}: '
+            f'{counts["validated"] + counts["uploaded"]} succeeded, {counts["failed"]} failed'
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0002_create_schemas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ingest', 'Ingest'), ('validate', 'Validate'), ('move', 'Move to Validated')], max_length=20)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('success', models.BooleanField(null=True)),
+                ('data_file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_runs', to='DataCERT.datafile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StageMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(choices=[('detect_encoding', 'Encoding Detection'), ('parse', 'Parse'), ('create_table', 'Table Create'), ('load', 'Load'), ('validate', 'Validate'), ('save_errors', 'Save Errors'), ('move', 'Move'), ('cleanup', 'Cleanup')], max_length=30)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('wall_time', models.FloatField(default=0)),
+                ('cpu_time', models.FloatField(default=0)),
+                ('rows', models.BigIntegerField(null=True)),
+                ('bytes', models.BigIntegerField(null=True)),
+                ('peak_rss', models.BigIntegerField(null=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stages', to='DataCERT.pipelinerun')),
+            ],
+            options={
+                'ordering': ['run', 'position'],
+            },
+        ),
+    ]
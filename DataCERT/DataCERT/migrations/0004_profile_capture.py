@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:50
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0003_pipeline_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileCapture',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(max_length=255)),
+                ('path', models.CharField(max_length=500)),
+                ('method', models.CharField(max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('duration', models.FloatField()),
+                ('query_count', models.IntegerField(default=0)),
+                ('query_time', models.FloatField(default=0)),
+                ('stats_file', models.FileField(upload_to='profiles/')),
+                ('summary', models.TextField()),
+                ('allocations', models.TextField()),
+                ('slow_queries', models.JSONField(default=list)),
+                ('data_file', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='profile_captures', to='DataCERT.datafile')),
+            ],
+        ),
+    ]
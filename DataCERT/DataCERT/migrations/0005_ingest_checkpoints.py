@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:54
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0004_profile_capture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_path', models.CharField(max_length=500)),
+                ('table_name', models.CharField(blank=True, max_length=255)),
+                ('rows', models.BigIntegerField(default=0)),
+                ('byte_offset', models.BigIntegerField(null=True)),
+                ('completed', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('data_file', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='checkpoint', to='DataCERT.datafile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('upload_length', models.BigIntegerField()),
+                ('upload_offset', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('completed_at', models.DateTimeField(null=True)),
+                ('data_file', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='upload_sessions', to='DataCERT.datafile')),
+            ],
+        ),
+    ]
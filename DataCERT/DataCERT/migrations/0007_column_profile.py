@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0006_stage_finalize_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datafile',
+            name='profile',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='stagemetric',
+            name='stage',
+            field=models.CharField(choices=[('detect_encoding', 'Encoding Detection'), ('parse', 'Parse'), ('create_table', 'Table Create'), ('profile', 'Profile'), ('load', 'Load'), ('finalize_table', 'Table Finalize'), ('validate', 'Validate'), ('save_errors', 'Save Errors'), ('move', 'Move'), ('cleanup', 'Cleanup')], max_length=30),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0007_column_profile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationreport',
+            name='aborted',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='validationreport',
+            name='estimates',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='validationreport',
+            name='mode',
+            field=models.CharField(choices=[('full', 'Full'), ('preview', 'Preview')], default='full', max_length=10),
+        ),
+    ]
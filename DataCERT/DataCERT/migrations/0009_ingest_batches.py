@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:09
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0008_validation_preview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('source', models.CharField(choices=[('upload', 'Upload'), ('watch', 'Directory Watch')], default='upload', max_length=10)),
+                ('validate', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('finished_at', models.DateTimeField(null=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('partial', 'Partially Failed'), ('failed', 'Failed')], default='running', max_length=20)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='datafile',
+            name='error_message',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AlterField(
+            model_name='datafile',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('uploaded', 'Uploaded'), ('validating', 'Validation In Progress'), ('validated', 'Validation Complete'), ('failed', 'Validation Failed')], default='uploaded', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='datafile',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='files', to='DataCERT.ingestbatch'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0009_ingest_batches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stagemetric',
+            name='stage',
+            field=models.CharField(choices=[('detect_encoding', 'Encoding Detection'), ('parse', 'Parse'), ('create_table', 'Table Create'), ('profile', 'Profile'), ('load', 'Load'), ('finalize_table', 'Table Finalize'), ('validate', 'Validate'), ('check_keys', 'Key Checks'), ('save_errors', 'Save Errors'), ('move', 'Move'), ('cleanup', 'Cleanup')], max_length=30),
+        ),
+    ]
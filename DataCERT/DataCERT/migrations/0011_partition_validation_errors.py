@@ -0,0 +1,109 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+TABLE = '"DataCERT_validationerror"'
+SEQUENCE = '"DataCERT_validationerror_id_seq"'
+
+
+def partition_errors(apps, schema_editor):
+    """Rebuild the error table list partitioned by report, one partition per report"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO "DataCERT_validationerror_old";')
+        # The partition key has to be part of the primary key
+        cursor.execute(f'''
+            CREATE TABLE {TABLE} (
+                id bigint NOT NULL,
+                row_number integer NOT NULL,
+                column_name varchar(255) NOT NULL,
+                error_message text NOT NULL,
+                raw_data jsonb NOT NULL,
+                report_id bigint NOT NULL
+                    REFERENCES "DataCERT_validationreport" (id) DEFERRABLE INITIALLY DEFERRED,
+                PRIMARY KEY (report_id, id)
+            ) PARTITION BY LIST (report_id);
+        ''')
+        cursor.execute('SELECT DISTINCT report_id FROM "DataCERT_validationerror_old";')
+        for (report_id,) in cursor.fetchall():
+            cursor.execute(
+                f'CREATE TABLE "DataCERT_validationerror_r{report_id}" '
+                f'PARTITION OF {TABLE} FOR VALUES IN ({report_id});'
+            )
+        cursor.execute(f'''
+            INSERT INTO {TABLE} (id, row_number, column_name, error_message, raw_data, report_id)
+            SELECT id, row_number, column_name, error_message, raw_data, report_id
+            FROM "DataCERT_validationerror_old";
+        ''')
+        # Pending deferred foreign key checks of the copied rows block
+        # altering and indexing the tables
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE;')
+        cursor.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM "DataCERT_validationerror_old";')
+        next_id = cursor.fetchone()[0]
+        # Also drops the old identity sequence
+        cursor.execute('DROP TABLE "DataCERT_validationerror_old";')
+        cursor.execute(f'CREATE SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id;')
+        cursor.execute(f"SELECT setval('{SEQUENCE}', %s, false);", [next_id])
+        cursor.execute(f"ALTER TABLE {TABLE} ALTER COLUMN id SET DEFAULT nextval('{SEQUENCE}');")
+        cursor.execute(f'CREATE INDEX "validationerror_report_row" ON {TABLE} (report_id, row_number);')
+
+
+def unpartition_errors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE {TABLE} RENAME TO "DataCERT_validationerror_partitioned";')
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE;')
+        cursor.execute(f'''
+            CREATE TABLE {TABLE} (
+                id bigint NOT NULL PRIMARY KEY DEFAULT nextval('{SEQUENCE}'),
+                row_number integer NOT NULL,
+                column_name varchar(255) NOT NULL,
+                error_message text NOT NULL,
+                raw_data jsonb NOT NULL,
+                report_id bigint NOT NULL
+                    REFERENCES "DataCERT_validationreport" (id) DEFERRABLE INITIALLY DEFERRED
+            );
+        ''')
+        cursor.execute(f'''
+            INSERT INTO {TABLE} (id, row_number, column_name, error_message, raw_data, report_id)
+            SELECT id, row_number, column_name, error_message, raw_data, report_id
+            FROM "DataCERT_validationerror_partitioned";
+        ''')
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE;')
+        cursor.execute('DROP TABLE "DataCERT_validationerror_partitioned" CASCADE;')
+        cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id;')
+        cursor.execute(f'CREATE INDEX "DataCERT_validationerror_report_id" ON {TABLE} (report_id);')
+        cursor.execute(f'CREATE INDEX "validationerror_report_row" ON {TABLE} (report_id, row_number);')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0010_stage_check_keys'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationreport',
+            name='errors_archive',
+            field=models.CharField(blank=True, max_length=500),
+        ),
+        migrations.AddField(
+            model_name='validationreport',
+            name='errors_purged_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='validationerror',
+            name='report',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.DO_NOTHING, to='DataCERT.validationreport'),
+        ),
+        migrations.AddIndex(
+            model_name='validationerror',
+            index=models.Index(fields=['report', 'row_number'], name='validationerror_report_row'),
+        ),
+        migrations.RunPython(partition_errors, unpartition_errors),
+    ]
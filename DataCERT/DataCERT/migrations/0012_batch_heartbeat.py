@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0011_partition_validation_errors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestbatch',
+            name='heartbeat_at',
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:48
+
+from django.db import migrations, models
+
+
+def fill_table_names(apps, schema_editor):
+    """Keep the tables existing files were loaded into"""
+    DataFile = apps.get_model('DataCERT', 'DataFile')
+    for data_file in DataFile.objects.select_related('checkpoint').iterator():
+        checkpoint = getattr(data_file, 'checkpoint', None)
+        if checkpoint is not None and checkpoint.table_name.startswith('raw_'):
+            data_file.table_name = checkpoint.table_name[len('raw_'):]
+        else:
+            data_file.table_name = data_file.file_name.split('.')[0].lower()
+        data_file.save(update_fields=['table_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0012_batch_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datafile',
+            name='table_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(fill_table_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 00:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0013_data_file_table_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ingestcheckpoint',
+            name='input_rows',
+            field=models.BigIntegerField(null=True),
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.1.6 on 2026-10-19 16:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+TABLE = '"DataCERT_validationerror"'
+SEQUENCE = '"DataCERT_validationerror_id_seq"'
+COLUMNS = 'id, row_number, column_name, error_message, raw_data, report_id, validation_date'
+
+
+def _rebuild(cursor, partition_by: str, primary_key: str) -> str:
+    """Move the error table aside and create an empty partitioned one, returns the old name"""
+    cursor.execute(f'ALTER TABLE {TABLE} RENAME TO "DataCERT_validationerror_old";')
+    cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY NONE;')
+    cursor.execute('DROP INDEX "validationerror_report_row";')
+    # The partition key has to be part of the primary key
+    cursor.execute(f'''
+        CREATE TABLE {TABLE} (
+            id bigint NOT NULL DEFAULT nextval('{SEQUENCE}'),
+            row_number integer NOT NULL,
+            column_name varchar(255) NOT NULL,
+            error_message text NOT NULL,
+            raw_data jsonb NOT NULL,
+            report_id bigint NOT NULL
+                REFERENCES "DataCERT_validationreport" (id) DEFERRABLE INITIALLY DEFERRED,
+            validation_date timestamp with time zone NOT NULL,
+            PRIMARY KEY ({primary_key})
+        ) PARTITION BY {partition_by};
+    ''')
+    return '"DataCERT_validationerror_old"'
+
+
+def _finish(cursor, old_table: str) -> None:
+    cursor.execute(f'INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {old_table};')
+    # Pending deferred foreign key checks of the copied rows block indexing
+    # and altering the table later in the migration
+    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE;')
+    # Also drops the partitions of the old table
+    cursor.execute(f'DROP TABLE {old_table} CASCADE;')
+    cursor.execute(f'ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id;')
+    cursor.execute(f'CREATE INDEX "validationerror_report_row" ON {TABLE} (report_id, row_number);')
+
+
+def partition_by_month(apps, schema_editor):
+    """Rebuild the error table range partitioned by month of the report's validation date"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'''
+            UPDATE {TABLE} error SET validation_date = report.validation_date
+            FROM "DataCERT_validationreport" report WHERE report.id = error.report_id;
+        ''')
+        old_table = _rebuild(cursor, 'RANGE (validation_date)', 'id, validation_date')
+        cursor.execute(f'''
+            SELECT DISTINCT date_trunc('month', validation_date AT TIME ZONE 'UTC') FROM {old_table};
+        ''')
+        for (start,) in cursor.fetchall():
+            cursor.execute(f'''
+                CREATE TABLE "DataCERT_validationerror_p{start:%Y_%m}" PARTITION OF {TABLE}
+                FOR VALUES FROM (%s::timestamp AT TIME ZONE 'UTC')
+                TO ((%s::timestamp + interval '1 month') AT TIME ZONE 'UTC');
+            ''', [start, start])
+        _finish(cursor, old_table)
+
+
+def partition_by_report(apps, schema_editor):
+    """Back to list partitioning, one partition per report"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        old_table = _rebuild(cursor, 'LIST (report_id)', 'report_id, id')
+        cursor.execute(f'SELECT DISTINCT report_id FROM {old_table};')
+        for (report_id,) in cursor.fetchall():
+            cursor.execute(
+                f'CREATE TABLE "DataCERT_validationerror_r{report_id}" '
+                f'PARTITION OF {TABLE} FOR VALUES IN ({report_id});'
+            )
+        _finish(cursor, old_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('DataCERT', '0014_checkpoint_input_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='validationerror',
+            name='validation_date',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(partition_by_month, partition_by_report),
+    ]
@@ -1,6 +1,26 @@
 from django.db import models
 from django.db.models import JSONField
 from django.utils import timezone
+import re
+import uuid
+
+from .utils.compression import strip_compression_suffix
+
+# Room for the validated_ prefix and index suffixes in a 63 byte identifier
+TABLE_NAME_LENGTH = 40
+
+
+def table_name_for(file_name: str) -> str:
+    """
+    Base name of the raw_ and validated_ tables of an uploaded file
+
+    orders.csv.gz -> orders, My File.v2.csv -> my_file_v2. Only lowercase
+    letters, digits and _ are kept, so the name never needs escaping.
+    """
+    base_name = strip_compression_suffix(file_name.replace('\\', '/').split('/')[-1])
+    base_name = base_name.rsplit('.', 1)[0] if '.' in base_name else base_name
+    return re.sub(r'[^a-z0-9_]', '_', base_name.lower())[:TABLE_NAME_LENGTH] or 'file'
+
 
 class DataFile(models.Model):
     """
@@ -11,6 +31,7 @@ class DataFile(models.Model):
     status = models.CharField(
         max_length=20,
         choices=[
+            ('queued', 'Queued'),
             ('uploaded', 'Uploaded'),
             ('validating', 'Validation In Progress'),
             ('validated', 'Validation Complete'),
@@ -19,10 +40,116 @@ class DataFile(models.Model):
         default='uploaded'
     )
     row_count = models.IntegerField(null=True)
+    # Per-column statistics gathered while loading, see utils.profiler
+    profile = JSONField(null=True, blank=True)
+    batch = models.ForeignKey('IngestBatch', on_delete=models.SET_NULL, null=True, blank=True, related_name='files')
+    error_message = models.TextField(blank=True)  # why loading or validating failed
+    # Base name of its raw_ and validated_ tables, fixed when the file is
+    # created so every stage reads and locks the same tables
+    table_name = models.CharField(max_length=255, blank=True)
+
+    def save(self, *args, **kwargs):
+        if not self.table_name:
+            self.table_name = table_name_for(self.file_name)
+        super().save(*args, **kwargs)
+
+    @property
+    def raw_table(self) -> str:
+        return f"raw_{self.table_name or table_name_for(self.file_name)}"
+
+    @property
+    def validated_table(self) -> str:
+        return f"validated_{self.table_name or table_name_for(self.file_name)}"
     
     def __str__(self):
         return f"{self.file_name} ({self.status})"
 
+class IngestCheckpoint(models.Model):
+    """
+    Progress of loading a file into the raw schema, committed with each chunk
+    """
+    data_file = models.OneToOneField(DataFile, on_delete=models.CASCADE, related_name='checkpoint')
+    file_path = models.CharField(max_length=500)
+    table_name = models.CharField(max_length=255, blank=True)
+    rows = models.BigIntegerField(default=0)  # rows committed to the raw table
+    # Rows of the file consumed, loaded or dropped as malformed, when known
+    input_rows = models.BigIntegerField(null=True)
+    byte_offset = models.BigIntegerField(null=True)  # start of the next row, uncompressed files only
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.data_file.file_name} at row {self.rows}"
+
+class IngestBatch(models.Model):
+    """
+    A group of files loaded and validated together, e.g. a partner's daily drop
+    """
+    name = models.CharField(max_length=255)
+    source = models.CharField(
+        max_length=10,
+        choices=[
+            ('upload', 'Upload'),
+            ('watch', 'Directory Watch'),
+        ],
+        default='upload'
+    )
+    validate = models.BooleanField(default=True)  # run DefaultValidator after loading
+    created_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True)
+    heartbeat_at = models.DateTimeField(null=True)  # last sign of life of the process running it
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('running', 'Running'),
+            ('completed', 'Completed'),
+            ('partial', 'Partially Failed'),
+            ('failed', 'Failed'),
+        ],
+        default='running'
+    )
+
+    def file_counts(self) -> dict:
+        """Number of files per DataFile status"""
+        counts = dict.fromkeys(['queued', 'uploaded', 'validating', 'validated', 'failed'], 0)
+        for row in self.files.values('status').annotate(count=models.Count('id')):
+            counts[row['status']] = row['count']
+        return counts
+
+    def refresh_status(self, finished: bool = False) -> None:
+        """Derive the batch status from its files"""
+        counts = self.file_counts()
+        succeeded = counts['validated'] if self.validate else counts['uploaded'] + counts['validated']
+        if not finished:
+            self.status = 'running'
+        elif succeeded == sum(counts.values()):
+            self.status = 'completed'
+        elif succeeded == 0:
+            self.status = 'failed'
+        else:
+            self.status = 'partial'
+        if finished:
+            self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'finished_at'])
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+class UploadSession(models.Model):
+    """
+    A resumable upload, written in pieces by the tus-style upload endpoint
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    file_name = models.CharField(max_length=255)
+    upload_length = models.BigIntegerField()
+    upload_offset = models.BigIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True)
+    data_file = models.ForeignKey(DataFile, on_delete=models.SET_NULL, null=True, related_name='upload_sessions')
+
+    def __str__(self):
+        return f"{self.file_name} ({self.upload_offset}/{self.upload_length})"
+
 class ValidationReport(models.Model):
     """
     Stores validation results for each file
@@ -32,13 +159,115 @@ class ValidationReport(models.Model):
     passed = models.BooleanField()
     error_count = models.IntegerField(default=0)
     summary = models.TextField()
+    mode = models.CharField(
+        max_length=10,
+        choices=[
+            ('full', 'Full'),
+            ('preview', 'Preview'),
+        ],
+        default='full'
+    )
+    aborted = models.BooleanField(default=False)  # stopped early over the error rate limit
+    # Error rates per column and rule with 95% confidence intervals
+    estimates = JSONField(null=True, blank=True)
+    # Set when the retention policy removed the errors, see purge_validation_errors
+    errors_purged_at = models.DateTimeField(null=True, blank=True)
+    errors_archive = models.CharField(max_length=500, blank=True)  # archive file of the purged errors
 
 class ValidationError(models.Model):
     """
     Stores individual validation errors
+
+    On Postgres the table is range partitioned by validation_date, one
+    partition per month, see utils/error_storage.py. Old months are
+    removed by dropping their partition, a deleted report's errors are
+    deleted with it.
     """
-    report = models.ForeignKey(ValidationReport, on_delete=models.CASCADE)
+    report = models.ForeignKey(ValidationReport, on_delete=models.DO_NOTHING)
+    validation_date = models.DateTimeField(default=timezone.now)  # of the report, the partition key
     row_number = models.IntegerField()
     column_name = models.CharField(max_length=255)
     error_message = models.TextField()
-    raw_data = JSONField()  # Stores the problematic row as JSON
\ No newline at end of file
+    raw_data = JSONField()  # Stores the problematic row as JSON
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['report', 'row_number'], name='validationerror_report_row'),
+        ]
+
+class PipelineRun(models.Model):
+    """
+    One execution of a pipeline step (ingest, validate, move) for a file
+    """
+    data_file = models.ForeignKey(DataFile, on_delete=models.CASCADE, related_name='pipeline_runs')
+    kind = models.CharField(
+        max_length=20,
+        choices=[
+            ('ingest', 'Ingest'),
+            ('validate', 'Validate'),
+            ('move', 'Move to Validated'),
+        ]
+    )
+    started_at = models.DateTimeField(default=timezone.now)
+    finished_at = models.DateTimeField(null=True)
+    success = models.BooleanField(null=True)
+
+    def __str__(self):
+        return f"{self.kind} run for {self.data_file.file_name}"
+
+class StageMetric(models.Model):
+    """
+    Resource usage of a single stage within a pipeline run
+    """
+    run = models.ForeignKey(PipelineRun, on_delete=models.CASCADE, related_name='stages')
+    stage = models.CharField(
+        max_length=30,
+        choices=[
+            ('detect_encoding', 'Encoding Detection'),
+            ('parse', 'Parse'),
+            ('create_table', 'Table Create'),
+            ('profile', 'Profile'),
+            ('load', 'Load'),
+            ('finalize_table', 'Table Finalize'),
+            ('validate', 'Validate'),
+            ('check_keys', 'Key Checks'),
+            ('save_errors', 'Save Errors'),
+            ('move', 'Move'),
+            ('cleanup', 'Cleanup'),
+        ]
+    )
+    position = models.PositiveSmallIntegerField(default=0)
+    wall_time = models.FloatField(default=0)  # seconds
+    cpu_time = models.FloatField(default=0)  # seconds
+    rows = models.BigIntegerField(null=True)
+    bytes = models.BigIntegerField(null=True)
+    peak_rss = models.BigIntegerField(null=True)  # bytes
+
+    class Meta:
+        ordering = ['run', 'position']
+
+class ProfileCapture(models.Model):
+    """
+    Profiling data captured for a single request
+    """
+    data_file = models.ForeignKey(
+        DataFile,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='profile_captures'
+    )
+    view_name = models.CharField(max_length=255)
+    path = models.CharField(max_length=500)
+    method = models.CharField(max_length=10)
+    created_at = models.DateTimeField(default=timezone.now)
+    duration = models.FloatField()  # seconds
+    query_count = models.IntegerField(default=0)
+    query_time = models.FloatField(default=0)  # seconds
+    stats_file = models.FileField(upload_to='profiles/')  # marshalled cProfile stats, loadable with pstats
+    summary = models.TextField()  # top functions by cumulative time
+    allocations = models.TextField()  # tracemalloc top allocations
+    slow_queries = JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.view_name} {self.method} {self.path} ({self.duration:.2f}s)"
@@ -95,6 +95,55 @@ DATABASES = {
     }
 }
 
+# Connection reuse. DATACERT_DB_POOL switches on Django's native connection
+# pool, which needs psycopg 3 (pip install "psycopg[pool]"). Otherwise each
+# worker keeps its connections open for DATACERT_CONN_MAX_AGE seconds.
+DATACERT_DB_POOL = os.getenv('DATACERT_DB_POOL', 'False') == 'True'
+if DATACERT_DB_POOL:
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.getenv('DATACERT_DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DATACERT_DB_POOL_MAX_SIZE', 10)),
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DATACERT_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Separate connection for COPY, raw/validated DDL and full table scans, so
+# bulk loads never share a transaction with ORM queries. Its sessions skip
+# waiting for the WAL flush on commit and get more memory for sorts, hashes
+# and index builds. Same database, so tests mirror the default alias.
+DATABASES['bulk'] = {
+    **DATABASES['default'],
+    'OPTIONS': {
+        **DATABASES['default']['OPTIONS'],
+        'options': ' '.join([
+            DATABASES['default']['OPTIONS']['options'],
+            '-c synchronous_commit=off',
+            f"-c work_mem={os.getenv('DATACERT_BULK_WORK_MEM', '256MB')}",
+            f"-c maintenance_work_mem={os.getenv('DATACERT_BULK_MAINTENANCE_WORK_MEM', '1GB')}",
+        ]),
+    },
+    'TEST': {'MIRROR': 'default'},
+}
+
+# Progress of running ingest and validation jobs is shared through the
+# 'progress' cache. The in-memory default only works with a single worker
+# process; set DATACERT_REDIS_URL to share progress between processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'progress': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'datacert-progress',
+    },
+}
+if os.getenv('DATACERT_REDIS_URL'):
+    CACHES['progress'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('DATACERT_REDIS_URL'),
+    }
+
 # Define schema names as constants
 DATABASE_SCHEMAS = {
     'RAW': 'raw',
@@ -102,6 +151,72 @@ DATABASE_SCHEMAS = {
     'PUBLIC': 'public'
 }
 
+# CSV parser backend: 'auto', 'pandas', 'arrow' or 'stream'. In auto mode
+# files of at least DATACERT_ARROW_MIN_BYTES use PyArrow when installed.
+DATACERT_CSV_PARSER = os.getenv('DATACERT_CSV_PARSER', 'auto')
+DATACERT_ARROW_MIN_BYTES = int(os.getenv('DATACERT_ARROW_MIN_BYTES', 64 * 1024 * 1024))
+
+# Upper bound on the decompressed size of .csv.gz, .csv.zst and .zip uploads
+DATACERT_MAX_DECOMPRESSED_BYTES = int(os.getenv('DATACERT_MAX_DECOMPRESSED_BYTES', 20 * 1024 * 1024 * 1024))
+
+# Opt-in request profiling for the upload, validation and move views.
+# When enabled, only requests sent with profile=1 or an X-DataCERT-Profile: 1
+# header are profiled; captures are viewable in the admin.
+DATACERT_PROFILING = os.getenv('DATACERT_PROFILING', 'False') == 'True'
+
+# Raw tables are range partitioned on id, this many rows per partition.
+# 0 keeps one plain table per upload. Partitions are scanned by up to
+# DATACERT_SCAN_WORKERS threads during validation and are detached and
+# re-attached instead of copied when data is moved to the validated schema.
+# Loading still writes one partition after the other on one connection.
+DATACERT_RAW_PARTITION_ROWS = int(os.getenv('DATACERT_RAW_PARTITION_ROWS', 0))
+DATACERT_SCAN_WORKERS = int(os.getenv('DATACERT_SCAN_WORKERS', 4))
+
+# Staging load mode: raw tables are UNLOGGED and loaded without a primary
+# key or sequence. The key is built and the table analyzed after the load,
+# the data is only written to the WAL when it is promoted to validated.
+# Unlogged tables are emptied by a crash, interrupted loads then restart.
+DATACERT_STAGING_LOAD = os.getenv('DATACERT_STAGING_LOAD', 'False') == 'True'
+
+# Memory the chunks of loads, validations and error inserts may use, in MB.
+# Chunk sizes are measured from the first chunks and resized to fill it,
+# concurrent pipelines share it. 0 keeps fixed chunk sizes.
+DATACERT_MEMORY_BUDGET_MB = int(os.getenv('DATACERT_MEMORY_BUDGET_MB', 256))
+
+# Profile every column while loading: nulls, type histogram, min/max,
+# approximate distinct count and most frequent values. Stored on the
+# DataFile and used by DefaultValidator to skip checks a column passes.
+DATACERT_COLUMN_PROFILE = os.getenv('DATACERT_COLUMN_PROFILE', 'True') == 'True'
+
+# Preview validation checks a uniform random sample of about this many rows,
+# drawn with TABLESAMPLE BERNOULLI, and reports estimated error rates.
+DATACERT_PREVIEW_SAMPLE_ROWS = int(os.getenv('DATACERT_PREVIEW_SAMPLE_ROWS', 100000))
+
+# Full validation stops early once the share of failing rows is clearly
+# above this percentage (0 disables). It is judged on the rows checked so
+# far after at least DATACERT_ABORT_MIN_ROWS, or at once when the failures
+# already exceed the limit for the whole file.
+DATACERT_ABORT_ERROR_RATE = float(os.getenv('DATACERT_ABORT_ERROR_RATE', 0))
+DATACERT_ABORT_MIN_ROWS = int(os.getenv('DATACERT_ABORT_MIN_ROWS', 10000))
+
+# Rows listed in a report per key rule (unique or foreign key) of a
+# validator. Violations past the limit are still counted.
+DATACERT_KEY_ERROR_LIMIT = int(os.getenv('DATACERT_KEY_ERROR_LIMIT', 100000))
+
+# Validation errors of reports older than this many days are removed by
+# the purge_validation_errors command. Errors are partitioned by month,
+# months wholly past the limit are dropped as tables instead of row by row.
+DATACERT_ERROR_RETENTION_DAYS = int(os.getenv('DATACERT_ERROR_RETENTION_DAYS', 90))
+
+# Files of a batch (multi-file upload or watched directory) loaded and
+# validated at the same time
+DATACERT_BATCH_WORKERS = int(os.getenv('DATACERT_BATCH_WORKERS', 4))
+
+# pandas, numpy and chardet are imported on the first ingest or validation.
+# Set to True in worker processes that handle those, wsgi.py and asgi.py
+# then import them at startup, see utils/preload.py.
+DATACERT_PRELOAD = os.getenv('DATACERT_PRELOAD', 'False') == 'True'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import connections
+from django.test import TransactionTestCase
+import gzip
+import os
+import tempfile
+
+
+class PipelineTestCase(TransactionTestCase):
+    """
+    Loads, validates and moves files in the test database
+
+    Transactional, as the bulk connection only sees committed rows of the
+    default one. Tables left in the raw and validated schemas are dropped
+    after each test.
+    """
+    databases = {'default', 'bulk'}
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.addCleanup(self.drop_tables)
+
+    def write_csv(self, name: str, lines, header: str = 'Username;Identifier;First name;Last name') -> str:
+        """Write a CSV below the temporary directory, gzipped for a .gz name"""
+        path = os.path.join(self.tmp, name)
+        data = '\n'.join([header, *lines]).encode('utf-8') + b'\n'
+        opener = gzip.open if name.endswith('.gz') else open
+        with opener(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def users(self, count: int, start: int = 1):
+        return [f'user{i};{i};First{i};Last{i}' for i in range(start, start + count)]
+
+    def query(self, sql: str, params=None):
+        with connections['default'].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def table_exists(self, schema_name: str, table_name: str) -> bool:
+        return self.query('SELECT to_regclass(%s) IS NOT NULL;', [f'{schema_name}."{table_name}"'])[0][0]
+
+    def count_rows(self, schema_name: str, table_name: str) -> int:
+        return self.query(f'SELECT COUNT(*) FROM {schema_name}."{table_name}";')[0][0]
+
+    def drop_tables(self):
+        schemas = [settings.DATABASE_SCHEMAS['RAW'], settings.DATABASE_SCHEMAS['VALIDATED']]
+        tables = self.query("""
+            SELECT schemaname, tablename FROM pg_tables
+            WHERE schemaname = ANY(%s)
+            ORDER BY tablename DESC;
+        """, [schemas])
+        sequences = self.query('SELECT schemaname, sequencename FROM pg_sequences WHERE schemaname = ANY(%s);', [schemas])
+        with connections['default'].cursor() as cursor:
+            for schema_name, table_name in tables:
+                cursor.execute(f'DROP TABLE IF EXISTS {schema_name}."{table_name}" CASCADE;')
+            for schema_name, sequence_name in sequences:
+                cursor.execute(f'DROP SEQUENCE IF EXISTS {schema_name}."{sequence_name}";')
@@ -0,0 +1,40 @@
+from django.db import connections
+import threading
+from unittest import mock
+
+from ..models import IngestBatch
+from ..utils.batch import BatchIngester
+from .db import PipelineTestCase
+
+
+class BatchThreadTests(PipelineTestCase):
+    def test_started_batch_closes_its_connections(self):
+        batch = IngestBatch.objects.create(name='daily', validate=False)
+        ingester = BatchIngester(batch, workers=2)
+        ingester.add_file(self.write_csv('users.csv', self.users(20)))
+        ingester.add_file(self.write_csv('orders.csv.gz', self.users(30)))
+
+        closed_by = []
+        close_all = connections.close_all
+
+        def record_close():
+            closed_by.append(threading.current_thread().name)
+            close_all()
+
+        with mock.patch.object(connections, 'close_all', side_effect=record_close):
+            ingester.start().join(timeout=60)
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual(self.count_rows('raw', 'raw_orders'), 30)
+        self.assertIn(f'batch-{batch.id}', closed_by)
+
+    def test_failing_batch_still_closes_its_connections(self):
+        batch = IngestBatch.objects.create(name='daily')
+        ingester = BatchIngester(batch)
+        with mock.patch.object(ingester, 'run', side_effect=RuntimeError('worker pool failed')), \
+                mock.patch.object(connections, 'close_all') as close_all, \
+                self.assertLogs('DataCERT.utils.batch', 'ERROR') as logs:
+            ingester.start().join(timeout=60)
+        close_all.assert_called_once_with()
+        self.assertIn('worker pool failed', logs.output[0])
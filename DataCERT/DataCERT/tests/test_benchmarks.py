@@ -0,0 +1,62 @@
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+import io
+import json
+import os
+import tempfile
+from unittest import mock
+
+from ..benchmarks.runner import compare_with_baseline, describe_regression
+
+MB = 1024 * 1024
+
+
+def cold_start(seconds: float, peak_rss):
+    return {
+        'params': {'targets': ['wsgi'], 'repeat': 1},
+        'environment': {},
+        'scenarios': {'wsgi': {
+            'seconds': seconds, 'process_seconds': seconds, 'peak_rss': peak_rss, 'heavy_modules': [],
+        }},
+    }
+
+
+class CompareWithBaselineTests(SimpleTestCase):
+    def test_rss_growth_is_flagged(self):
+        regressions = compare_with_baseline(cold_start(1.0, 60 * MB), cold_start(1.0, 50 * MB), 0.10,
+                                            rss_tolerance=0.10)
+        self.assertEqual([(r['metric'], r['ratio']) for r in regressions], [('peak_rss', 1.2)])
+        self.assertEqual(describe_regression(regressions[0]),
+                         'Regression in wsgi: 60.0 MB peak RSS vs 50.0 MB baseline (1.20x)')
+
+    def test_rss_is_only_compared_on_request(self):
+        self.assertEqual(compare_with_baseline(cold_start(1.0, 60 * MB), cold_start(1.0, 50 * MB), 0.10), [])
+
+    def test_unmeasured_rss_is_skipped(self):
+        regressions = compare_with_baseline(cold_start(1.5, None), cold_start(1.0, 50 * MB), 0.10,
+                                            rss_tolerance=0.10)
+        self.assertEqual([r['metric'] for r in regressions], ['seconds'])
+        self.assertEqual(describe_regression(regressions[0]), 'Regression in wsgi: 1.500s vs 1.000s baseline (1.50x)')
+
+
+class BenchmarkStartupTests(SimpleTestCase):
+    def run_command(self, result, *args):
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = os.path.join(tmp, 'baseline.json')
+            with open(baseline, 'w') as file:
+                json.dump(cold_start(1.0, 50 * MB), file)
+            stderr = io.StringIO()
+            with mock.patch('DataCERT.management.commands.benchmark_startup.run_cold_start', return_value=result):
+                try:
+                    call_command('benchmark_startup', '--baseline', baseline, *args,
+                                 stdout=io.StringIO(), stderr=stderr)
+                finally:
+                    self.stderr = stderr.getvalue()
+
+    def test_rss_regression_fails(self):
+        with self.assertRaisesMessage(CommandError, '1 target(s) regressed against the baseline'):
+            self.run_command(cold_start(1.0, 80 * MB))
+        self.assertIn('80.0 MB peak RSS vs 50.0 MB baseline', self.stderr)
+
+    def test_rss_tolerance(self):
+        self.run_command(cold_start(1.0, 80 * MB), '--rss-tolerance', '0.7')
@@ -0,0 +1,95 @@
+import gc
+
+from django.test import SimpleTestCase, override_settings
+
+import pandas as pd
+
+from ..utils.chunking import (
+    CHUNK_HEADROOM, MEASURE_CHUNKS, AdaptiveChunker, frame_row_bytes, memory_budget_bytes
+)
+
+BUDGET = 64 * 1024 * 1024
+
+
+class AdaptiveChunkerTests(SimpleTestCase):
+    def setUp(self):
+        # Chunkers of earlier tests would take a share of the budget
+        gc.collect()
+
+    def test_no_budget_keeps_initial_rows(self):
+        chunker = AdaptiveChunker(initial_rows=5000, budget_bytes=0)
+        chunker.observe(pd.DataFrame({'a': range(10)}))
+        self.assertIsNone(chunker.row_bytes)
+        self.assertEqual(chunker.rows, 5000)
+
+    @override_settings(DATACERT_MEMORY_BUDGET_MB=3)
+    def test_budget_from_settings(self):
+        self.assertEqual(memory_budget_bytes(), 3 * 1024 * 1024)
+        self.assertEqual(AdaptiveChunker(initial_rows=10).budget_bytes, 3 * 1024 * 1024)
+
+    def test_first_chunk_is_initial_rows(self):
+        # Loads take the column types from the first chunk
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        self.assertEqual(chunker.rows, 10000)
+
+    def test_sized_from_budget(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        chunker.observe_bytes(64)
+        self.assertEqual(chunker.rows, BUDGET // CHUNK_HEADROOM // 64)
+
+    def test_budget_shared_between_live_chunkers(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        chunker.observe_bytes(64)
+        alone = chunker.rows
+        other = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        self.assertEqual(chunker.rows, alone // 2)
+        del other
+        gc.collect()
+        self.assertEqual(chunker.rows, alone)
+
+    def test_clamped_to_min_and_max(self):
+        chunker = AdaptiveChunker(initial_rows=10000, min_rows=500, max_rows=20000, budget_bytes=BUDGET)
+        chunker.observe_bytes(1024 * 1024)
+        self.assertEqual(chunker.rows, 500)
+        chunker = AdaptiveChunker(initial_rows=10000, min_rows=500, max_rows=20000, budget_bytes=BUDGET)
+        chunker.observe_bytes(1)
+        self.assertEqual(chunker.rows, 20000)
+
+    def test_widest_rows_kept(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        chunker.observe_bytes(100)
+        chunker.observe_bytes(300)
+        chunker.observe_bytes(200)
+        self.assertEqual(chunker.row_bytes, 300)
+
+    def test_only_first_chunks_measured(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        narrow = pd.DataFrame({'a': range(100)})
+        for _ in range(MEASURE_CHUNKS):
+            chunker.observe(narrow)
+        measured = chunker.row_bytes
+        chunker.observe(pd.DataFrame({'a': ['x' * 1000] * 100}))
+        self.assertEqual(chunker.measured, MEASURE_CHUNKS)
+        self.assertEqual(chunker.row_bytes, measured)
+
+    def test_empty_chunk_not_measured(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        chunker.observe(pd.DataFrame({'a': []}))
+        self.assertEqual(chunker.measured, 0)
+        self.assertEqual(chunker.rows, 10000)
+
+    def test_observe_records(self):
+        chunker = AdaptiveChunker(initial_rows=10000, budget_bytes=BUDGET)
+        chunker.observe_records([{'row': i, 'error': 'x' * 90} for i in range(10)])
+        self.assertGreater(chunker.row_bytes, 90)
+        self.assertLess(chunker.row_bytes, 150)
+
+
+class FrameRowBytesTests(SimpleTestCase):
+    def test_empty(self):
+        self.assertEqual(frame_row_bytes(pd.DataFrame({'a': []})), 0.0)
+
+    def test_counts_text(self):
+        narrow = frame_row_bytes(pd.DataFrame({'a': ['x'] * 5000}))
+        wide = frame_row_bytes(pd.DataFrame({'a': ['x' * 1000] * 5000}))
+        self.assertGreater(wide - narrow, 900)
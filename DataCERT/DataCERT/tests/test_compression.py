@@ -0,0 +1,77 @@
+from django.test import SimpleTestCase, override_settings
+import gzip
+import os
+import tempfile
+import zipfile
+
+from ..utils.compression import open_source, source_size, strip_compression_suffix
+
+CSV = b'Username;Identifier\n' + b''.join(f'user{i};{i}\n'.encode() for i in range(1000))
+
+
+class OpenSourceTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def write_zip(self, name: str, members: dict) -> str:
+        path = os.path.join(self.tmp.name, name)
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for member, data in members.items():
+                archive.writestr(member, data)
+        return path
+
+    def test_plain_file(self):
+        with open_source(self.write('users.csv', CSV)) as source:
+            self.assertEqual(source.read(), CSV)
+
+    def test_gzip_is_decompressed(self):
+        with open_source(self.write('users.csv.gz', gzip.compress(CSV))) as source:
+            self.assertEqual(source.read(), CSV)
+
+    def test_zip_uses_the_csv_member(self):
+        path = self.write_zip('users.zip', {'readme.txt': b'notes', 'data/users.csv': CSV})
+        with open_source(path) as source:
+            self.assertEqual(source.read(), CSV)
+        self.assertEqual(source_size(path), len(CSV))
+
+    def test_empty_zip_is_rejected(self):
+        with self.assertRaises(ValueError):
+            open_source(self.write_zip('empty.zip', {}))
+
+    @override_settings(DATACERT_MAX_DECOMPRESSED_BYTES=len(CSV))
+    def test_limit_allows_exact_size(self):
+        with open_source(self.write('users.csv.gz', gzip.compress(CSV))) as source:
+            self.assertEqual(len(source.read()), len(CSV))
+
+    @override_settings(DATACERT_MAX_DECOMPRESSED_BYTES=len(CSV) - 1)
+    def test_gzip_over_limit_fails(self):
+        with open_source(self.write('users.csv.gz', gzip.compress(CSV))) as source:
+            with self.assertRaisesMessage(ValueError, 'exceeds the limit'):
+                source.read()
+
+    @override_settings(DATACERT_MAX_DECOMPRESSED_BYTES=1024)
+    def test_zip_over_limit_fails(self):
+        with open_source(self.write_zip('users.zip', {'users.csv': CSV})) as source:
+            with self.assertRaisesMessage(ValueError, 'exceeds the limit'):
+                source.read()
+
+    def test_start_offset_keeps_the_header(self):
+        header, first, rest = CSV.split(b'\n', 2)
+        offset = len(header) + len(first) + 2
+        with open_source(self.write('users.csv', CSV), start_offset=offset) as source:
+            self.assertEqual(source.read(), header + b'\n' + rest)
+
+
+class StripCompressionSuffixTests(SimpleTestCase):
+    def test_suffixes(self):
+        self.assertEqual(strip_compression_suffix('users.csv.gz'), 'users.csv')
+        self.assertEqual(strip_compression_suffix('users.csv.zst'), 'users.csv')
+        self.assertEqual(strip_compression_suffix('Users.ZIP'), 'Users')
+        self.assertEqual(strip_compression_suffix('users.csv'), 'users.csv')
@@ -0,0 +1,128 @@
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+from datetime import datetime, timedelta, timezone as dt_timezone
+import csv
+import gzip
+import io
+import os
+import tempfile
+
+from ..models import DataFile, ValidationError, ValidationReport
+from ..utils.error_storage import (
+    create_partition, drop_partitions_before, get_partitions, month_bounds, partition_name
+)
+from ..utils.validators.base import BaseValidator
+
+
+class ErrorValidator(BaseValidator):
+    def validate(self) -> bool:
+        return False
+
+
+class MonthBoundsTests(SimpleTestCase):
+    def test_bounds(self):
+        start, end = month_bounds(datetime(2026, 12, 31, 23, 59, tzinfo=dt_timezone.utc))
+        self.assertEqual(start, datetime(2026, 12, 1, tzinfo=dt_timezone.utc))
+        self.assertEqual(end, datetime(2027, 1, 1, tzinfo=dt_timezone.utc))
+
+    def test_months_are_utc(self):
+        moment = datetime(2026, 11, 1, 0, 30, tzinfo=dt_timezone(timedelta(hours=2)))
+        self.assertEqual(partition_name(moment), 'DataCERT_validationerror_p2026_10')
+
+
+class ErrorStorageTests(TransactionTestCase):
+    def setUp(self):
+        self.data_file = DataFile.objects.create(file_name='users.csv')
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        # Flushing empties the partitions but keeps them
+        self.addCleanup(drop_partitions_before, datetime(9999, 1, 1, tzinfo=dt_timezone.utc))
+
+    def report(self, validation_date: datetime, errors: int = 2) -> ValidationReport:
+        report = ValidationReport.objects.create(
+            data_file=self.data_file, passed=False, error_count=errors, summary='',
+            validation_date=validation_date
+        )
+        create_partition(validation_date)
+        ValidationError.objects.bulk_create([
+            ValidationError(
+                report=report, validation_date=validation_date, row_number=row,
+                column_name='Identifier', error_message='Invalid numeric value', raw_data={'id': row}
+            ) for row in range(1, errors + 1)
+        ])
+        return report
+
+    def error_counts(self):
+        return {
+            report_id: ValidationError.objects.filter(report_id=report_id).count()
+            for report_id in ValidationReport.objects.values_list('id', flat=True)
+        }
+
+    def test_errors_go_to_the_month_of_their_report(self):
+        validator = ErrorValidator(self.data_file)
+        validator.add_error(row_number=7, column_name='Identifier', error_message='Invalid numeric value',
+                            raw_data={'id': 7, 'Identifier': 'abc'})
+        report = validator.save_validation_results()
+
+        error = ValidationError.objects.get(report=report)
+        self.assertEqual(error.validation_date, report.validation_date)
+        self.assertIn(partition_name(report.validation_date), [name for name, _, _ in get_partitions()])
+
+    def test_deleted_report_takes_only_its_errors(self):
+        month = datetime(2026, 3, 10, tzinfo=dt_timezone.utc)
+        deleted = self.report(month)
+        kept = self.report(month + timedelta(days=1))
+
+        deleted.delete()
+        self.assertEqual(self.error_counts(), {kept.id: 2})
+        self.assertIn(partition_name(month), [name for name, _, _ in get_partitions()])
+
+    def purge(self, *args) -> str:
+        out = io.StringIO()
+        call_command('purge_validation_errors', *args, stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_purge_drops_old_months_and_deletes_the_rest(self):
+        cutoff = timezone.now() - timedelta(days=90)
+        old = self.report(datetime(2025, 1, 15, tzinfo=dt_timezone.utc))
+        straddling = self.report(cutoff - timedelta(hours=1))
+        recent = self.report(cutoff + timedelta(hours=1), errors=3)
+
+        output = self.purge('--days', '90', '--archive-dir', self.tmp)
+
+        self.assertIn('Dropped partition DataCERT_validationerror_p2025_01', output)
+        partitions = [name for name, _, _ in get_partitions()]
+        self.assertNotIn(partition_name(old.validation_date), partitions)
+        self.assertIn(partition_name(recent.validation_date), partitions)
+        self.assertEqual(self.error_counts(), {old.id: 0, straddling.id: 0, recent.id: 3})
+
+        for report in (old, straddling):
+            report.refresh_from_db()
+            self.assertIsNotNone(report.errors_purged_at)
+            with gzip.open(report.errors_archive, 'rt') as archive:
+                rows = list(csv.reader(archive))
+            self.assertEqual(rows[0], ['row_number', 'column_name', 'error_message', 'raw_data'])
+            self.assertEqual([row[0] for row in rows[1:]], ['1', '2'])
+        recent.refresh_from_db()
+        self.assertIsNone(recent.errors_purged_at)
+
+    def test_purge_one_report(self):
+        month = datetime(2025, 2, 10, tzinfo=dt_timezone.utc)
+        purged = self.report(month)
+        kept = self.report(month)
+
+        self.purge('--report', str(purged.id))
+        self.assertEqual(self.error_counts(), {purged.id: 0, kept.id: 2})
+        self.assertIn(partition_name(month), [name for name, _, _ in get_partitions()])
+        purged.refresh_from_db()
+        self.assertEqual(purged.errors_archive, '')
+        self.assertFalse(os.listdir(self.tmp))
+
+    def test_dry_run_changes_nothing(self):
+        old = self.report(datetime(2025, 1, 15, tzinfo=dt_timezone.utc))
+        output = self.purge('--days', '90', '--dry-run')
+        self.assertIn(f'Would purge Report {old.id} (users.csv, 2 errors)', output)
+        self.assertIn('Would drop partition DataCERT_validationerror_p2025_01', output)
+        self.assertEqual(self.error_counts(), {old.id: 2})
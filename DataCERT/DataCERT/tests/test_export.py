@@ -0,0 +1,110 @@
+from django.db import DatabaseError, connections
+from django.urls import reverse
+import csv
+import gzip
+import io
+import threading
+from unittest import mock
+
+from ..models import DataFile, ValidationReport
+from ..utils.data_exporter import DataExporter
+from ..utils.parsers.arrow_parser import ArrowParser
+from .db import PipelineTestCase
+
+
+def create_table(sql: str, params=None) -> None:
+    with connections['default'].cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+class FailingOutput(io.BytesIO):
+    """Output that breaks after its first block, e.g. a full disk"""
+    def write(self, data):
+        if self.tell():
+            raise OSError('No space left on device')
+        return super().write(data)
+
+
+class DataExporterTests(PipelineTestCase):
+    rows = 20000
+
+    def setUp(self):
+        super().setUp()
+        create_table('''
+            CREATE TABLE validated."validated_users" AS
+            SELECT i::bigint AS "Identifier", 'user' || i AS "Username", (i / 2.0)::double precision AS "Score"
+            FROM generate_series(1, %s) AS i;
+        ''', [self.rows])
+
+    def export(self, export_format: str = 'csv', columns=None) -> bytes:
+        output = io.BytesIO()
+        DataExporter('users', columns=columns, export_format=export_format).write_to(output)
+        return output.getvalue()
+
+    def assertWorkerStopped(self):
+        for thread in threading.enumerate():
+            if thread.name == 'export-validated_users':
+                thread.join(timeout=10)
+                self.assertFalse(thread.is_alive())
+
+    def test_csv(self):
+        rows = list(csv.reader(io.StringIO(self.export().decode('utf-8'))))
+        self.assertEqual(rows[0], ['Identifier', 'Username', 'Score'])
+        self.assertEqual(len(rows), self.rows + 1)
+        self.assertEqual(rows[3], ['3', 'user3', '1.5'])
+
+    def test_gzip_matches_csv(self):
+        self.assertEqual(gzip.decompress(self.export('csv.gz')), self.export('csv'))
+
+    def test_selected_columns(self):
+        rows = list(csv.reader(io.StringIO(self.export(columns=['Username']).decode('utf-8'))))
+        self.assertEqual(rows[:2], [['Username'], ['user1']])
+
+    def test_parquet(self):
+        if not ArrowParser.is_available():
+            self.skipTest('pyarrow is not installed')
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(self.export('parquet')))
+        self.assertEqual(table.num_rows, self.rows)
+        self.assertEqual(str(table.schema.field('Identifier').type), 'int64')
+        self.assertEqual(str(table.schema.field('Score').type), 'double')
+        self.assertEqual(table.column('Username')[1].as_py(), 'user2')
+
+    def test_failing_writer_stops_the_copy(self):
+        exporter = DataExporter('users')
+        with mock.patch('DataCERT.utils.data_exporter.READ_BLOCK_SIZE', 4096), \
+                self.assertLogs('DataCERT.utils.data_exporter', 'INFO') as logs:
+            with self.assertRaisesMessage(OSError, 'No space left on device'):
+                exporter.write_to(FailingOutput())
+            self.assertWorkerStopped()
+        self.assertIn('cancelled by the reader', logs.output[0])
+
+    def test_failing_copy_is_raised(self):
+        with mock.patch('DataCERT.utils.data_exporter.copy_to', side_effect=DatabaseError('canceling statement')), \
+                self.assertLogs('DataCERT.utils.data_exporter', 'ERROR'):
+            for export_format in DataExporter.FORMATS:
+                if export_format == 'parquet' and not ArrowParser.is_available():
+                    continue
+                with self.subTest(format=export_format):
+                    with self.assertRaisesMessage(DatabaseError, 'canceling statement'):
+                        self.export(export_format)
+        self.assertWorkerStopped()
+
+    def test_unknown_table_and_columns(self):
+        with self.assertRaisesMessage(ValueError, 'Validated table validated_orders does not exist'):
+            DataExporter('orders')
+        with self.assertRaisesMessage(ValueError, 'Unknown columns: Email'):
+            DataExporter('users', columns=['Email'])
+
+
+class ExportViewTests(PipelineTestCase):
+    def test_export_uses_the_stored_table_name(self):
+        data_file = DataFile.objects.create(file_name='My File.v2.csv')
+        report = ValidationReport.objects.create(data_file=data_file, passed=True, error_count=0, summary='')
+        create_table('CREATE TABLE validated."validated_my_file_v2" AS SELECT 1 AS "Identifier";')
+
+        response = self.client.get(reverse('export_validated', args=[report.id]), {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'Identifier\n1\n')
+        self.assertIn('validated_my_file_v2.csv', response['Content-Disposition'])
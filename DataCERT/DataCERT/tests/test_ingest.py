@@ -0,0 +1,201 @@
+from django.db import connection
+from django.db.backends.utils import CursorWrapper
+from django.test import SimpleTestCase
+import csv
+import io
+import os
+import tempfile
+from unittest import mock
+
+import pandas as pd
+
+from ..models import TABLE_NAME_LENGTH, DataFile, table_name_for
+from ..utils.csv_processor import CSVProcessor
+from ..utils.data_mover import DataMover
+from ..utils.database import COPY_NULL, copy_dataframe, table_lock
+from ..utils.parsers import PARSERS, Dialect
+from ..utils.parsers.arrow_parser import ArrowParser
+from ..utils.ingest import ingest_file, validate_file
+from ..utils.profiling import QueryRecorder
+from ..utils.validators.default import DefaultValidator
+from .db import PipelineTestCase
+
+
+class CopyRecorder:
+    """Stands in for a psycopg2 cursor, keeps what COPY FROM STDIN would read"""
+    def __init__(self):
+        self.data = b''
+
+    def copy_expert(self, sql, source, size=None):
+        self.sql = sql
+        self.data += source.read()
+
+    def rows(self):
+        return list(csv.reader(io.StringIO(self.data.decode('utf-8'))))
+
+
+class ConformChunkTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'users.csv')
+        lines = ['Username;Identifier;Score']
+        for i in range(1, 201):
+            # The only missing identifier is in the second chunk
+            lines.append(f"user{i};{'' if i == 150 else i};{i / 2}")
+        with open(self.path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def load(self, parser_name: str) -> CopyRecorder:
+        """Run the chunks through what _process_chunk does before the database"""
+        parser = PARSERS[parser_name](self.path, Dialect(delimiter=';'), 'utf-8', 100)
+        processor = CSVProcessor(self.path, chunk_size=100)
+        recorder = CopyRecorder()
+        for chunk in parser.iter_chunks():
+            if not processor.integer_columns:
+                processor.integer_columns = [
+                    col for col, sql_type in processor._column_types(chunk).items() if sql_type == 'BIGINT'
+                ]
+            copy_dataframe(CursorWrapper(recorder, connection), 'raw', 'raw_users', processor._conform_chunk(chunk))
+            processor.processed_rows += len(chunk)
+        return recorder
+
+    def test_null_in_second_chunk_keeps_integers(self):
+        backends = ['pandas', 'stream'] + (['arrow'] if ArrowParser.is_available() else [])
+        for name in backends:
+            with self.subTest(backend=name):
+                rows = self.load(name)
+                identifiers = [row[1] for row in rows.rows()]
+                self.assertEqual(len(identifiers), 200)
+                self.assertEqual(identifiers[10], '11')
+                self.assertEqual(identifiers[149], COPY_NULL)
+                self.assertEqual(identifiers[150], '151')
+                self.assertFalse([value for value in identifiers if value.endswith('.0')])
+
+    def test_float_columns_are_untouched(self):
+        rows = self.load('pandas').rows()
+        self.assertEqual(rows[1][2], '1.0')
+
+    def test_decimals_in_integer_column_are_rejected(self):
+        processor = CSVProcessor(self.path, chunk_size=100)
+        processor.integer_columns = ['Identifier']
+        parser = PARSERS['pandas'](self.path, Dialect(delimiter=';'), 'utf-8', 100)
+        chunk = next(parser.iter_chunks())
+        chunk['Identifier'] = chunk['Identifier'] / 2
+        with self.assertRaisesMessage(ValueError, 'Column "Identifier" holds decimal values'):
+            processor._conform_chunk(chunk)
+
+
+class CopyProfilingTests(SimpleTestCase):
+    def test_copy_goes_through_execute_wrappers(self):
+        queries = QueryRecorder()
+        raw = CopyRecorder()
+        with connection.execute_wrapper(queries):
+            copy_dataframe(CursorWrapper(raw, connection), 'raw', 'raw_users', pd.DataFrame({'a': [1, 2]}))
+        self.assertEqual(raw.rows(), [['1'], ['2']])
+        self.assertEqual(len(queries.queries), 1)
+        self.assertTrue(queries.queries[0]['sql'].startswith('COPY raw."raw_users" ("a") FROM STDIN'))
+
+    def test_wrappers_nest_like_execute(self):
+        calls = []
+
+        def wrapper(name):
+            def wrap(execute, sql, params, many, context):
+                calls.append((name, context['cursor'].cursor is raw))
+                return execute(sql, params, many, context)
+            return wrap
+
+        raw = CopyRecorder()
+        with connection.execute_wrapper(wrapper('outer')), connection.execute_wrapper(wrapper('inner')):
+            copy_dataframe(CursorWrapper(raw, connection), 'raw', 'raw_users', pd.DataFrame({'a': [1]}))
+        self.assertEqual(calls, [('outer', True), ('inner', True)])
+        self.assertEqual(raw.rows(), [['1']])
+
+
+class FakeLockCursor:
+    def __init__(self, granted: bool, statements: list):
+        self.granted = granted
+        self.statements = statements
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def execute(self, sql, params):
+        self.statements.append((sql, params))
+
+    def fetchone(self):
+        return [self.granted]
+
+
+class FakeLockConnection:
+    vendor = 'postgresql'
+
+    def __init__(self, granted: bool):
+        self.granted = granted
+        self.statements = []
+
+    def cursor(self):
+        return FakeLockCursor(self.granted, self.statements)
+
+
+class TableLockTests(SimpleTestCase):
+    def test_lock_is_released(self):
+        fake = FakeLockConnection(granted=True)
+        with mock.patch('DataCERT.utils.database.bulk_connection', return_value=fake):
+            with table_lock('raw', 'raw_orders', shared=True):
+                pass
+        self.assertEqual(fake.statements, [
+            ('SELECT pg_try_advisory_lock_shared(hashtext(%s));', ['raw.raw_orders']),
+            ('SELECT pg_advisory_unlock_shared(hashtext(%s));', ['raw.raw_orders']),
+        ])
+
+    def test_busy_table_is_refused(self):
+        fake = FakeLockConnection(granted=False)
+        with mock.patch('DataCERT.utils.database.bulk_connection', return_value=fake):
+            with self.assertRaisesMessage(ValueError, 'raw_orders is being loaded or validated'):
+                with table_lock('raw', 'raw_orders'):
+                    self.fail('entered a locked table')
+        self.assertEqual(len(fake.statements), 1)
+
+
+class TableNameTests(SimpleTestCase):
+    def test_names(self):
+        self.assertEqual(table_name_for('orders.csv.gz'), 'orders')
+        self.assertEqual(table_name_for('My File.v2.csv'), 'my_file_v2')
+        self.assertEqual(table_name_for('/tmp/uploads/Users.csv'), 'users')
+        self.assertEqual(table_name_for('.csv'), 'file')
+        self.assertEqual(len(table_name_for('x' * 100 + '.csv')), TABLE_NAME_LENGTH)
+
+    def test_data_file_tables(self):
+        data_file = DataFile(file_name='My File.v2.csv')
+        self.assertEqual(data_file.raw_table, 'raw_my_file_v2')
+        self.assertEqual(data_file.validated_table, 'validated_my_file_v2')
+        data_file.table_name = 'users'
+        self.assertEqual(data_file.raw_table, 'raw_users')
+
+
+class RenamedUploadTests(PipelineTestCase):
+    def test_every_stage_uses_the_stored_table_name(self):
+        # The storage renamed the upload, e.g. because users.csv existed
+        path = self.write_csv('my file.v2_AbC12.csv.gz', self.users(50))
+        data_file = DataFile.objects.create(file_name='My File.v2.csv.gz')
+        self.assertEqual(data_file.table_name, 'my_file_v2')
+
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(result['table_name'], 'raw_my_file_v2')
+        self.assertEqual(self.count_rows('raw', 'raw_my_file_v2'), 50)
+
+        validator = DefaultValidator(data_file)
+        report = validate_file(validator)
+        self.assertEqual(validator.rows_checked, 50)
+        self.assertTrue(report.passed, report.summary)
+
+        mover = DataMover(data_file, report)
+        moved = mover.move_validated_data()
+        self.assertTrue(moved['success'], moved.get('error'))
+        self.assertEqual(moved['target_table'], 'validated_my_file_v2')
+        self.assertEqual(self.count_rows('validated', 'validated_my_file_v2'), 50)
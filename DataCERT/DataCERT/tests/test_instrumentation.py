@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+import time
+from unittest import mock
+
+from ..utils.instrumentation import PipelineMetrics, RSSSampler, get_rss
+
+MB = 1024 * 1024
+
+
+class PeakRSSTests(SimpleTestCase):
+    def setUp(self):
+        if get_rss() is None:
+            self.skipTest('No procfs to read the resident set size from')
+
+    def test_peak_inside_the_stage_is_caught(self):
+        metrics = PipelineMetrics('ingest')
+        with metrics.stage('parse'):
+            block = b'x' * (64 * MB)
+            time.sleep(0.3)
+            del block
+        after = get_rss()
+        # Freed before the stage ended, so only the background samples saw it
+        self.assertGreater(metrics.stages['parse']['peak_rss'], after + 48 * MB)
+
+    def test_watches_keep_their_own_peak(self):
+        rss = {'value': 100}
+        sampler = RSSSampler(interval=0.01)
+        with mock.patch('DataCERT.utils.instrumentation.get_rss', side_effect=lambda: rss['value']):
+            with sampler.watch() as outer:
+                # Equal peaks, leaving the inner watch must not end the outer one
+                with sampler.watch() as inner:
+                    pass
+                rss['value'] = 300
+                time.sleep(0.1)
+                rss['value'] = 200
+        self.assertEqual((outer, inner), ({'rss': 300}, {'rss': 100}))
+        self.assertFalse(sampler._peaks)
+
+    def test_without_procfs(self):
+        sampler = RSSSampler()
+        with mock.patch('DataCERT.utils.instrumentation.get_rss', return_value=None):
+            with sampler.watch() as peak:
+                pass
+            metrics = PipelineMetrics('ingest')
+            with metrics.stage('parse'):
+                pass
+        self.assertEqual(peak, {})
+        self.assertIsNone(sampler._thread)
+        self.assertIsNone(metrics.stages['parse']['peak_rss'])
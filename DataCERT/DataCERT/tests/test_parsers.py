@@ -0,0 +1,148 @@
+from django.test import SimpleTestCase
+from typing import List
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from ..utils.chunking import AdaptiveChunker
+from ..utils.parsers import PARSERS, Dialect
+from ..utils.parsers.arrow_parser import ArrowParser
+
+HEADER = 'Username;Identifier;Score;Active;Joined;City'
+BAD_LINE_EVERY = 50
+
+
+def write_csv(directory: str, rows: int = 400) -> str:
+    """Typed columns with missing values, every BAD_LINE_EVERY-th line has an extra field"""
+    lines = [HEADER]
+    for i in range(1, rows + 1):
+        if i % BAD_LINE_EVERY == 0:
+            lines.append(f'bad{i};{i};1.5;true;2024-01-01;Paris;extra')
+            continue
+        score = '' if i % 7 == 0 else str(i / 4)
+        active = 'true' if i % 2 else 'false'
+        city = '' if i % 11 == 0 else f'City {i % 5}'
+        lines.append(f'user{i};{i};{score};{active};2024-01-{i % 28 + 1:02d};{city}')
+    path = os.path.join(directory, 'users.csv')
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(lines) + '\n')
+    return path
+
+
+def combine(chunks: List[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate chunks, missing text is None or NaN depending on the backend"""
+    df = pd.concat(chunks, ignore_index=True)
+    text = df.select_dtypes('object').columns
+    df[text] = df[text].where(df[text].notna(), None)
+    return df
+
+
+class ParserParityTests(SimpleTestCase):
+    """Every backend yields the same chunks, dtypes and values for the same file"""
+    chunk_size = 100
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = write_csv(tmp.name)
+        self.backends = [
+            name for name, parser in PARSERS.items()
+            if parser is not ArrowParser or ArrowParser.is_available()
+        ]
+
+    def parse(self, name: str, **kwargs):
+        """Chunks of a backend with the bad line count seen after each one"""
+        parser = PARSERS[name](self.path, Dialect(delimiter=';'), 'utf-8', self.chunk_size, **kwargs)
+        chunks: List[pd.DataFrame] = []
+        bad_lines: List[int] = []
+        with self.assertNoLogs(level='ERROR'):
+            for chunk in parser.iter_chunks():
+                chunks.append(chunk)
+                bad_lines.append(parser.bad_lines)
+        return parser, chunks, bad_lines
+
+    def test_same_chunks_and_dtypes(self):
+        _, expected, _ = self.parse('pandas')
+        for name in self.backends:
+            with self.subTest(backend=name):
+                _, chunks, _ = self.parse(name)
+                self.assertEqual([len(chunk) for chunk in chunks], [len(chunk) for chunk in expected])
+                for chunk, reference in zip(chunks, expected):
+                    self.assertEqual(list(chunk.columns), HEADER.split(';'))
+                    self.assertEqual(chunk.dtypes.to_dict(), reference.dtypes.to_dict())
+
+    def test_same_values(self):
+        _, expected, _ = self.parse('pandas')
+        expected = combine(expected)
+        self.assertEqual(expected['Identifier'].dtype, 'int64')
+        self.assertEqual(expected['Score'].dtype, 'float64')
+        self.assertEqual(expected['Active'].dtype, 'bool')
+        for name in self.backends:
+            with self.subTest(backend=name):
+                _, chunks, _ = self.parse(name)
+                pd.testing.assert_frame_equal(combine(chunks), expected)
+
+    def test_bad_lines_per_chunk(self):
+        # Bad lines up to the last row of each chunk, what a resume offset relies on
+        expected = [self.chunk_size * (n + 1) // (BAD_LINE_EVERY - 1) for n in range(3)] + [400 // BAD_LINE_EVERY]
+        for name in self.backends:
+            with self.subTest(backend=name):
+                parser, _, bad_lines = self.parse(name)
+                self.assertEqual(bad_lines[-1], 400 // BAD_LINE_EVERY)
+                if parser.exact_bad_lines:
+                    self.assertEqual(bad_lines, expected)
+
+    def test_skip_rows(self):
+        _, expected, _ = self.parse('pandas')
+        expected = combine(expected).iloc[30:].reset_index(drop=True)
+        for name in self.backends:
+            with self.subTest(backend=name):
+                # The first 30 lines hold no bad line, so 30 rows are 30 lines
+                _, chunks, _ = self.parse(name, skip_rows=30)
+                pd.testing.assert_frame_equal(combine(chunks), expected)
+
+    def test_skip_rows_counts_bad_lines(self):
+        _, expected, _ = self.parse('pandas')
+        expected = combine(expected)
+        expected = expected[expected['Identifier'] > 60].reset_index(drop=True)
+        for name in self.backends:
+            with self.subTest(backend=name):
+                # Line 50 is malformed, 60 rows read leave 59 loaded
+                _, chunks, _ = self.parse(name, skip_rows=60)
+                pd.testing.assert_frame_equal(combine(chunks), expected)
+
+    def test_skip_rows_ignores_blank_lines(self):
+        with open(self.path, 'w') as file:
+            file.write('id;name\n1;a\n\n2;b\n\n3;c\n')
+        for name in self.backends:
+            with self.subTest(backend=name):
+                parser = PARSERS[name](self.path, Dialect(delimiter=';'), 'utf-8', 10, skip_rows=2)
+                self.assertEqual(combine(list(parser.iter_chunks())).values.tolist(), [[3, 'c']])
+
+    def test_start_offset(self):
+        _, expected, _ = self.parse('pandas')
+        expected = combine(expected).iloc[30:].reset_index(drop=True)
+        with open(self.path, 'rb') as file:
+            for _ in range(31):
+                file.readline()
+            offset = file.tell()
+        for name in self.backends:
+            with self.subTest(backend=name):
+                _, chunks, _ = self.parse(name, start_offset=offset)
+                pd.testing.assert_frame_equal(combine(chunks), expected)
+
+    def test_chunker_sizes(self):
+        for name in self.backends:
+            with self.subTest(backend=name):
+                chunker = AdaptiveChunker(initial_rows=100, min_rows=10, budget_bytes=0)
+                _, chunks, _ = self.parse(name, chunker=chunker)
+                self.assertEqual([len(chunk) for chunk in chunks], [100, 100, 100, 92])
+
+    @unittest.skipUnless(ArrowParser.is_available(), 'pyarrow is not installed')
+    def test_arrow_counts_bad_lines_ahead(self):
+        # Documents why Arrow loads are not checkpointed by byte offset
+        parser, _, bad_lines = self.parse('arrow')
+        self.assertFalse(parser.exact_bad_lines)
+        self.assertEqual(bad_lines[0], 400 // BAD_LINE_EVERY)
@@ -0,0 +1,101 @@
+from django.test import override_settings
+import threading
+import time
+
+from ..models import DataFile
+from ..utils.data_mover import DataMover
+from ..utils.database import bulk_connection
+from ..utils.ingest import ingest_file, validate_file
+from ..utils.partitions import get_partitions, scan_partitions
+from ..utils.validators.default import DefaultValidator
+from .db import PipelineTestCase
+
+
+@override_settings(DATACERT_RAW_PARTITION_ROWS=100, DATACERT_SCAN_WORKERS=2)
+class PartitionedLoadTests(PipelineTestCase):
+    def load(self, lines) -> DataFile:
+        path = self.write_csv('users.csv', lines)
+        data_file = DataFile.objects.create(file_name='users.csv')
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        return data_file
+
+    def partitions(self, schema_name: str, table_name: str):
+        with bulk_connection().cursor() as cursor:
+            return get_partitions(cursor, schema_name, table_name)
+
+    def relkind(self, schema_name: str, table_name: str) -> str:
+        return self.query('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);',
+                          [f'{schema_name}."{table_name}"'])[0][0]
+
+    def test_rows_land_in_their_id_range(self):
+        self.load(self.users(250))
+        self.assertEqual(self.partitions('raw', 'raw_users'), [
+            ('raw_users_p00000', "FOR VALUES FROM ('1') TO ('101')"),
+            ('raw_users_p00001', "FOR VALUES FROM ('101') TO ('201')"),
+            ('raw_users_p00002', "FOR VALUES FROM ('201') TO ('301')"),
+        ])
+        self.assertEqual(
+            [self.count_rows('raw', f'raw_users_p0000{index}') for index in range(3)], [100, 100, 50]
+        )
+        # Ids follow the file
+        self.assertEqual(self.query('SELECT "Identifier" FROM raw."raw_users" WHERE id = 150;'), [(150,)])
+
+    def test_validation_scans_every_partition(self):
+        lines = self.users(250)
+        lines[179] = 'user180;180;;Last180'
+        data_file = self.load(lines)
+
+        validator = DefaultValidator(data_file)
+        report = validate_file(validator)
+        self.assertEqual(validator.rows_checked, 250)
+        self.assertEqual([(error['row_number'], error['column_name']) for error in validator.errors],
+                         [(180, 'First name')])
+        self.assertFalse(report.passed)
+
+    def test_promotion_reattaches_the_partitions(self):
+        data_file = self.load(self.users(250))
+        report = validate_file(DefaultValidator(data_file))
+
+        result = DataMover(data_file, report).move_validated_data()
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(result['rows_moved'], 250)
+
+        # The raw partitions are gone, moving again must keep the validated rows
+        with self.assertLogs('DataCERT.utils.data_mover', 'ERROR'):
+            again = DataMover(data_file, report).move_validated_data()
+        self.assertFalse(again['success'])
+        self.assertIn('already moved', again['error'])
+        self.assertEqual(self.count_rows('validated', 'validated_users'), 250)
+
+        self.assertEqual(self.relkind('validated', 'validated_users'), 'p')
+        self.assertEqual([name for name, _ in self.partitions('validated', 'validated_users')],
+                         ['validated_users_p00000', 'validated_users_p00001', 'validated_users_p00002'])
+        self.assertEqual(self.partitions('raw', 'raw_users'), [])
+        # LIKE ... INCLUDING ALL copied the primary key and column defaults to the parent
+        self.assertEqual(self.query("""
+            SELECT pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = 'validated."validated_users"'::regclass AND contype = 'p';
+        """), [('PRIMARY KEY (id)',)])
+        self.assertEqual(self.query("""
+            SELECT column_default IS NOT NULL FROM information_schema.columns
+            WHERE table_schema = 'validated' AND table_name = 'validated_users' AND column_name = '_processed_at';
+        """), [(True,)])
+        self.assertEqual(self.query('SELECT MIN(id), MAX(id) FROM validated."validated_users";'), [(1, 250)])
+
+    def test_scan_stops_when_the_reader_does(self):
+        self.load(self.users(1000))
+        partitions = [name for name, _ in self.partitions('raw', 'raw_users')]
+
+        chunks = scan_partitions('raw', partitions, chunk_size=10)
+        self.assertEqual(len(next(chunks)), 10)
+        started = time.monotonic()
+        chunks.close()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith('scan')])
+
+    def test_scan_error_is_raised(self):
+        self.load(self.users(150))
+        with self.assertLogs('DataCERT.utils.partitions', 'ERROR'):
+            with self.assertRaisesMessage(Exception, 'raw_users_p00009'):
+                list(scan_partitions('raw', ['raw_users_p00000', 'raw_users_p00009']))
@@ -0,0 +1,123 @@
+from django.test import SimpleTestCase
+
+import numpy as np
+import pandas as pd
+
+from ..utils.profiler import HyperLogLog, TableProfile, TopK, _bit_length, column_is_clean
+
+
+def hashes(values) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+class BitLengthTests(SimpleTestCase):
+    def test_matches_int_bit_length(self):
+        values = [0, 1, 2, 3, 255, 2 ** 31, 2 ** 32 - 1, 2 ** 32, 2 ** 53 + 1, 2 ** 64 - 1]
+        self.assertEqual(
+            _bit_length(np.array(values, dtype=np.uint64)).tolist(),
+            [value.bit_length() for value in values]
+        )
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def assertClose(self, estimate: int, actual: int, tolerance: float = 0.05):
+        self.assertLessEqual(abs(estimate - actual), actual * tolerance, f'{estimate} vs {actual}')
+
+    def test_empty(self):
+        self.assertEqual(HyperLogLog().estimate(), 0)
+
+    def test_small_cardinality_is_exact_enough(self):
+        sketch = HyperLogLog()
+        sketch.add_hashes(hashes([f'v{i}' for i in range(100)] * 5))
+        self.assertClose(sketch.estimate(), 100, 0.02)
+
+    def test_large_cardinality(self):
+        sketch = HyperLogLog()
+        sketch.add_hashes(hashes([f'v{i}' for i in range(200000)]))
+        self.assertClose(sketch.estimate(), 200000)
+
+    def test_merge_equals_single_pass(self):
+        values = [f'v{i}' for i in range(50000)]
+        whole = HyperLogLog()
+        whole.add_hashes(hashes(values))
+        left, right = HyperLogLog(), HyperLogLog()
+        # Overlapping halves, shared values are not counted twice
+        left.add_hashes(hashes(values[:30000]))
+        right.add_hashes(hashes(values[20000:]))
+        left.merge(right)
+        np.testing.assert_array_equal(left.registers, whole.registers)
+        self.assertEqual(left.estimate(), whole.estimate())
+
+
+class TopKTests(SimpleTestCase):
+    def test_exact_below_capacity(self):
+        top = TopK(capacity=8)
+        top.update_series(pd.Series(['a'] * 5 + ['b'] * 3 + ['c']))
+        self.assertEqual(top.top(2), [['a', 5], ['b', 3]])
+
+    def test_heavy_hitters_survive_trimming(self):
+        top = TopK(capacity=4)
+        values = ['hot'] * 500 + ['warm'] * 200 + [f'rare{i}' for i in range(300)]
+        top.update_series(pd.Series(values).sample(frac=1, random_state=1))
+        ranked = top.top(2)
+        self.assertEqual([value for value, _ in ranked], ['hot', 'warm'])
+        # Counts are lower bounds off by at most n / (capacity + 1)
+        self.assertLessEqual(ranked[0][1], 500)
+        self.assertGreaterEqual(ranked[0][1], 500 - len(values) // 5)
+
+    def test_merge(self):
+        left, right = TopK(capacity=4), TopK(capacity=4)
+        left.update_series(pd.Series(['a'] * 10 + ['b'] * 4))
+        right.update_series(pd.Series(['b'] * 9 + ['c'] * 2))
+        left.merge(right)
+        self.assertEqual(left.top(3), [['b', 13], ['a', 10], ['c', 2]])
+
+    def test_merge_trims_to_capacity(self):
+        left, right = TopK(capacity=2), TopK(capacity=2)
+        left.update({'a': 10, 'b': 5})
+        right.update({'c': 7, 'd': 1})
+        left.merge(right)
+        self.assertLessEqual(len(left.counts), 2)
+        self.assertEqual(left.top(1)[0][0], 'a')
+
+    def test_integral_floats_are_reported_as_integers(self):
+        top = TopK()
+        top.update_series(pd.Series([7.0, 7.0, 1.5]))
+        self.assertEqual(top.top(), [[7, 2], [1.5, 1]])
+
+
+class TableProfileTests(SimpleTestCase):
+    def frame(self, start: int, stop: int) -> pd.DataFrame:
+        return pd.DataFrame({
+            'Identifier': range(start, stop),
+            'City': [None if i % 10 == 0 else f'City {i % 3}' for i in range(start, stop)],
+        })
+
+    def test_merge_equals_single_pass(self):
+        whole = TableProfile()
+        whole.update(self.frame(0, 1000))
+        left, right = TableProfile(), TableProfile()
+        left.update(self.frame(0, 400))
+        right.update(self.frame(400, 1000))
+        left.merge(right)
+        self.assertEqual(left.to_dict(), whole.to_dict())
+
+    def test_column_stats(self):
+        profile = TableProfile()
+        profile.update(self.frame(0, 100))
+        stats = profile.to_dict()
+        identifier = stats['columns']['Identifier']
+        self.assertEqual((identifier['min'], identifier['max'], identifier['null_count']), (0, 99, 0))
+        self.assertEqual(identifier['types']['integer'], 100)
+        city = stats['columns']['City']
+        self.assertEqual(city['null_count'], 10)
+        self.assertEqual(city['distinct'], 3)
+        self.assertTrue(column_is_clean(stats, 'Identifier', 'not_null'))
+        self.assertTrue(column_is_clean(stats, 'Identifier', 'numeric'))
+        self.assertFalse(column_is_clean(stats, 'City', 'not_null'))
+        self.assertFalse(column_is_clean(stats, 'City', 'numeric'))
+
+    def test_partial_profile_proves_nothing(self):
+        profile = TableProfile()
+        profile.update(self.frame(1, 100))
+        self.assertFalse(column_is_clean(profile.to_dict(partial=True), 'Identifier', 'not_null'))
@@ -0,0 +1,43 @@
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+import tempfile
+import tracemalloc
+
+from ..models import ProfileCapture
+from ..utils.profiling import profile_request
+
+
+class ProfileRequestTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def profiled(self, view):
+        with override_settings(DATACERT_PROFILING=True):
+            return profile_request(view)
+
+    def test_capture_is_saved_and_tracing_stopped(self):
+        view = self.profiled(lambda request: HttpResponse('ok'))
+        response = view(RequestFactory().get('/upload/', {'profile': '1'}))
+        self.assertEqual(response.content, b'ok')
+        self.assertFalse(tracemalloc.is_tracing())
+        capture = ProfileCapture.objects.get()
+        self.assertTrue(capture.allocations)
+
+    def test_view_that_stops_tracing(self):
+        def view(request):
+            tracemalloc.stop()
+            return HttpResponse('ok')
+
+        response = self.profiled(view)(RequestFactory().get('/upload/', {'profile': '1'}))
+        self.assertEqual(response.content, b'ok')
+        capture = ProfileCapture.objects.get()
+        self.assertEqual(capture.allocations, '')
+
+    def test_unselected_request_is_not_profiled(self):
+        view = self.profiled(lambda request: HttpResponse('ok'))
+        view(RequestFactory().get('/upload/'))
+        self.assertFalse(ProfileCapture.objects.exists())
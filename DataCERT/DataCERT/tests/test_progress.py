@@ -0,0 +1,93 @@
+from django.core.cache import caches
+from django.test import SimpleTestCase
+import json
+from unittest import mock
+
+from ..utils.progress import PROGRESS_CACHE, ProgressReporter, get_progress, progress_key
+from ..views import ProgressStreamView
+
+JOB_ID = 'a' * 32
+OTHER_ID = 'b' * 32
+
+
+class ProgressReporterTests(SimpleTestCase):
+    def setUp(self):
+        caches[PROGRESS_CACHE].clear()
+
+    def test_keys(self):
+        self.assertEqual(progress_key(JOB_ID), f'datacert:progress:{JOB_ID}')
+        ProgressReporter(JOB_ID, 'ingest').update(force=True, rows=10)
+        self.assertEqual(get_progress(JOB_ID)['rows'], 10)
+        self.assertIsNone(get_progress(OTHER_ID))
+
+    def test_invalid_id(self):
+        for progress_id in ('A' * 32, 'a' * 31, '../' + 'a' * 29):
+            with self.assertRaisesMessage(ValueError, 'Invalid progress id'):
+                ProgressReporter(progress_id, 'ingest')
+
+    def test_updates_are_throttled_until_the_stage_changes(self):
+        reporter = ProgressReporter(JOB_ID, 'ingest')
+        reporter.update(stage='load', rows=10)
+        reporter.update(rows=20)
+        self.assertEqual(get_progress(JOB_ID)['rows'], 10)
+        reporter.update(stage='finalize', rows=30)
+        self.assertEqual((get_progress(JOB_ID)['stage'], get_progress(JOB_ID)['rows']), ('finalize', 30))
+
+    def test_terminal_states(self):
+        reporter = ProgressReporter(JOB_ID, 'ingest')
+        reporter.update(stage='load', rows=10)
+        reporter.finish(True, 'Loaded 10 rows')
+        snapshot = get_progress(JOB_ID)
+        self.assertEqual(
+            (snapshot['stage'], snapshot['done'], snapshot['success'], snapshot['message']),
+            ('done', True, True, 'Loaded 10 rows')
+        )
+
+        ProgressReporter(OTHER_ID, 'validate').finish(False, 'Table is locked')
+        snapshot = get_progress(OTHER_ID)
+        self.assertEqual((snapshot['stage'], snapshot['done'], snapshot['success']), ('failed', True, False))
+
+
+@mock.patch.object(ProgressStreamView, 'poll_interval', 0.01)
+class ProgressStreamTests(SimpleTestCase):
+    def setUp(self):
+        caches[PROGRESS_CACHE].clear()
+
+    async def events(self, progress_id: str, on_event=None):
+        response = await self.async_client.get(f'/progress/{progress_id}/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = []
+        async for chunk in response.streaming_content:
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            events.append(text)
+            if on_event is not None:
+                on_event(text)
+        return events
+
+    async def test_stream_ends_at_the_terminal_state(self):
+        reporter = ProgressReporter(JOB_ID, 'ingest')
+        reporter.update(stage='load', rows=10)
+
+        def finish(event):
+            if event.startswith('event: progress') and not json.loads(event.split('data: ')[1])['done']:
+                reporter.finish(True, 'Loaded 10 rows')
+
+        events = await self.events(JOB_ID, finish)
+        self.assertEqual(events[0], 'retry: 2000\n\n')
+        snapshots = [json.loads(event.split('data: ')[1]) for event in events[1:]]
+        self.assertEqual([(s['stage'], s['done']) for s in snapshots], [('load', False), ('done', True)])
+
+    async def test_jobs_are_kept_apart(self):
+        ProgressReporter(OTHER_ID, 'ingest').finish(False, 'other job')
+        ProgressReporter(JOB_ID, 'ingest').finish(True, 'this job')
+        events = await self.events(JOB_ID)
+        self.assertEqual(json.loads(events[1].split('data: ')[1])['message'], 'this job')
+
+    async def test_job_that_never_starts_times_out(self):
+        with mock.patch.object(ProgressStreamView, 'start_timeout', 0.05):
+            events = await self.events(JOB_ID)
+        self.assertEqual(events[-1], 'event: timeout\ndata: {}\n\n')
+
+    async def test_invalid_id(self):
+        response = await self.async_client.get('/progress/not-a-token/')
+        self.assertEqual(response.status_code, 404)
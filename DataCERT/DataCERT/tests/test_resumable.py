@@ -0,0 +1,309 @@
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+import base64
+import io
+import os
+import tempfile
+import unittest
+
+from ..models import DataFile, IngestCheckpoint
+from ..utils.csv_processor import CSVProcessor, _RowOffsets, _ascii_compatible
+from ..utils.data_mover import DataMover
+from ..utils.database import bulk_connection
+from ..utils.ingest import ingest_file, validate_file
+from ..utils.parsers import PARSERS, Dialect, RowReader
+from ..utils.parsers.arrow_parser import ArrowParser
+from ..utils.profiling import QueryRecorder
+from ..utils.validators.default import DefaultValidator
+from ..views import _parse_upload_metadata
+from .db import PipelineTestCase
+
+
+def encode(value: str) -> str:
+    return base64.b64encode(value.encode('utf-8')).decode('ascii')
+
+
+class ParseUploadMetadataTests(SimpleTestCase):
+    def test_pairs_are_decoded(self):
+        header = f"filename {encode('orders 2024.csv')},filetype {encode('text/csv')}"
+        self.assertEqual(
+            _parse_upload_metadata(header),
+            {'filename': 'orders 2024.csv', 'filetype': 'text/csv'}
+        )
+
+    def test_key_without_value(self):
+        self.assertEqual(_parse_upload_metadata(f"is_confidential,filename {encode('a.csv')}"),
+                         {'is_confidential': '', 'filename': 'a.csv'})
+
+    def test_spaces_and_empty_pairs_are_ignored(self):
+        self.assertEqual(_parse_upload_metadata(f" filename {encode('a.csv')} , "), {'filename': 'a.csv'})
+        self.assertEqual(_parse_upload_metadata(''), {})
+
+    def test_unicode_file_name(self):
+        self.assertEqual(_parse_upload_metadata(f"filename {encode('clients_é.csv')}"), {'filename': 'clients_é.csv'})
+
+    def test_invalid_base64_raises_value_error(self):
+        # The creation view answers 400 to a ValueError
+        with self.assertRaises(ValueError):
+            _parse_upload_metadata('filename not*base64')
+
+
+class RowOffsetsTests(SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, 'users.csv')
+        with open(self.path, 'wb') as file:
+            file.write(b'name;id\na;1\n\nb;2\nc;3\n')
+
+    def test_blank_lines_are_not_counted(self):
+        offsets = _RowOffsets(self.path, Dialect())
+        self.addCleanup(offsets.close)
+        self.assertEqual(offsets.advance(1), len(b'name;id\na;1\n'))
+        self.assertEqual(offsets.advance(1), len(b'name;id\na;1\n\nb;2\n'))
+
+    def test_start_offset(self):
+        offsets = _RowOffsets(self.path, Dialect(), start_offset=len(b'name;id\na;1\n'))
+        self.addCleanup(offsets.close)
+        self.assertEqual(offsets.advance(2), len(b'name;id\na;1\n\nb;2\nc;3\n'))
+
+    def test_end_of_file(self):
+        offsets = _RowOffsets(self.path, Dialect())
+        self.addCleanup(offsets.close)
+        self.assertEqual(offsets.advance(10), os.path.getsize(self.path))
+
+
+class RowReaderTests(SimpleTestCase):
+    def rows(self, data: bytes, dialect: Dialect = None):
+        reader = RowReader(io.BytesIO(data), dialect or Dialect())
+        return list(iter(reader.read, b''))
+
+    def test_quoted_line_breaks_stay_in_their_row(self):
+        self.assertEqual(self.rows(b'id;note\n1;"x\ny"\n2;"a\n\nb"\n3;z\n'),
+                         [b'id;note\n', b'1;"x\ny"\n', b'2;"a\n\nb"\n', b'3;z\n'])
+
+    def test_doubled_quotes(self):
+        self.assertEqual(self.rows(b'1;"say ""hi""\nthere"\n2;""\n'),
+                         [b'1;"say ""hi""\nthere"\n', b'2;""\n'])
+
+    def test_escaped_quotes(self):
+        dialect = Dialect(doublequote=False, escapechar='\\')
+        self.assertEqual(self.rows(b'1;"a\\"\nb"\n2;c\n', dialect), [b'1;"a\\"\nb"\n', b'2;c\n'])
+
+    def test_unterminated_quote_runs_to_the_end(self):
+        self.assertEqual(self.rows(b'1;"x\n2;y\n'), [b'1;"x\n2;y\n'])
+
+    def test_skip_counts_non_blank_rows(self):
+        stream = io.BytesIO(b'1;"x\n\ny"\n\n2;y\n3;z\n')
+        self.assertEqual(RowReader(stream, Dialect()).skip(2), 2)
+        self.assertEqual(stream.read(), b'3;z\n')
+        self.assertEqual(RowReader(io.BytesIO(b'1;x\n'), Dialect()).skip(5), 1)
+
+    def test_ascii_compatible(self):
+        self.assertTrue(_ascii_compatible('utf-8'))
+        self.assertTrue(_ascii_compatible('utf-8-sig'))
+        self.assertTrue(_ascii_compatible('latin-1'))
+        self.assertFalse(_ascii_compatible('utf-16'))
+        self.assertFalse(_ascii_compatible('no-such-codec'))
+
+
+class MultiLineOffsetsTests(SimpleTestCase):
+    def test_resume_after_quoted_line_break(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'notes.csv')
+        with open(path, 'wb') as file:
+            file.write(b'id;note\n1;"x\ny"\n2;"multi\nline"\n3;z\n4;w\n')
+        offsets = _RowOffsets(path, Dialect())
+        self.addCleanup(offsets.close)
+        offset = offsets.advance(2)
+        for name in ('pandas', 'stream'):
+            with self.subTest(backend=name):
+                parser = PARSERS[name](path, Dialect(), 'utf-8', 10, start_offset=offset)
+                rows = [row for chunk in parser.iter_chunks() for row in chunk.values.tolist()]
+                self.assertEqual(rows, [[3, 'z'], [4, 'w']])
+
+
+class ResumableUploadTests(PipelineTestCase):
+    def test_renamed_upload_loads_into_its_own_table(self):
+        with override_settings(MEDIA_ROOT=self.tmp):
+            # An earlier upload with the same name makes the storage rename this one
+            os.makedirs(os.path.join(self.tmp, 'csv_uploads'))
+            open(os.path.join(self.tmp, 'csv_uploads', 'users.csv'), 'w').close()
+            with open(self.write_csv('source.csv', self.users(20)), 'rb') as file:
+                data = file.read()
+
+            response = self.client.post(
+                reverse('resumable_upload'),
+                HTTP_UPLOAD_LENGTH=str(len(data)),
+                HTTP_UPLOAD_METADATA=f"filename {encode('users.csv')}",
+            )
+            self.assertEqual(response.status_code, 201)
+            response = self.client.patch(
+                response['Location'], data,
+                content_type='application/offset+octet-stream',
+                HTTP_UPLOAD_OFFSET='0',
+            )
+            self.assertEqual(response.status_code, 204)
+            self.assertEqual(response['DataCERT-Status'], 'uploaded', response.get('DataCERT-Error'))
+
+            stored = sorted(os.listdir(os.path.join(self.tmp, 'csv_uploads')))
+            self.assertEqual(len([name for name in stored if name.startswith('users')]), 2)
+        data_file = DataFile.objects.get(id=response['DataCERT-Data-File'])
+        self.assertEqual(data_file.raw_table, 'raw_users')
+        self.assertEqual(self.count_rows('raw', 'raw_users'), 20)
+        self.assertEqual(self.query("SELECT COUNT(*) FROM pg_tables WHERE schemaname = 'raw';")[0][0], 1)
+
+
+class InterruptedLoadTests(PipelineTestCase):
+    """A load stopped part way resumes without losing or repeating rows"""
+    def load(self, path: str, data_file: DataFile, fail_after: int = None):
+        processor = CSVProcessor(path, chunk_size=2, data_file=data_file)
+        if fail_after is not None:
+            process_chunk = processor._process_chunk
+            calls = []
+
+            def interrupted(*args, **kwargs):
+                if len(calls) == fail_after:
+                    raise RuntimeError('server closed the connection unexpectedly')
+                calls.append(args)
+                return process_chunk(*args, **kwargs)
+            processor._process_chunk = interrupted
+            with self.assertLogs('DataCERT.utils.csv_processor', 'ERROR'):
+                return processor.process_file()
+        return processor.process_file()
+
+    def loaded(self, data_file: DataFile):
+        return [row[0] for row in self.query(f'SELECT "Username" FROM raw."{data_file.raw_table}" ORDER BY id;')]
+
+    def test_resume_after_quoted_line_breaks(self):
+        lines = [f'user{i};"line one\nline two {i}"' for i in range(1, 10)]
+        path = self.write_csv('notes.csv', lines, header='Username;Note')
+        data_file = DataFile.objects.create(file_name='notes.csv')
+
+        result = self.load(path, data_file, fail_after=2)
+        self.assertFalse(result['success'])
+        checkpoint = IngestCheckpoint.objects.get(data_file=data_file)
+        self.assertEqual(checkpoint.rows, 4)
+        self.assertIsNotNone(checkpoint.byte_offset)
+
+        result = self.load(path, data_file)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertTrue(result['resumed'])
+        self.assertEqual(self.loaded(data_file), [f'user{i}' for i in range(1, 10)])
+        self.assertEqual(
+            self.query('SELECT "Note" FROM raw."raw_notes" WHERE "Username" = %s;', ['user7']),
+            [('line one\nline two 7',)]
+        )
+
+    def test_resume_by_rows_skips_malformed_lines(self):
+        # 1;x, 2;y;extra, 3;z, 4;w from the review: after two loaded rows
+        # the malformed line has been read too
+        lines = self.users(10)
+        lines[1] += ';extra'
+        path = self.write_csv('users.csv.gz', lines)
+        for name in ('pandas', 'stream'):
+            with self.subTest(backend=name), override_settings(DATACERT_CSV_PARSER=name):
+                data_file = DataFile.objects.create(file_name='users.csv.gz')
+                self.assertFalse(self.load(path, data_file, fail_after=1)['success'])
+                checkpoint = IngestCheckpoint.objects.get(data_file=data_file)
+                self.assertEqual((checkpoint.rows, checkpoint.input_rows, checkpoint.byte_offset), (2, 3, None))
+
+                result = self.load(path, data_file)
+                self.assertTrue(result['success'], result.get('error'))
+                self.assertTrue(result['resumed'])
+                self.assertEqual(self.loaded(data_file), [f'user{i}' for i in range(1, 11) if i != 2])
+
+    @unittest.skipUnless(ArrowParser.is_available(), 'pyarrow is not installed')
+    def test_arrow_restarts_when_malformed_lines_were_counted_ahead(self):
+        lines = self.users(10)
+        lines[8] += ';extra'
+        path = self.write_csv('users.csv.gz', lines)
+        data_file = DataFile.objects.create(file_name='users.csv.gz')
+        with override_settings(DATACERT_CSV_PARSER='arrow'):
+            self.assertFalse(self.load(path, data_file, fail_after=1)['success'])
+            self.assertIsNone(IngestCheckpoint.objects.get(data_file=data_file).input_rows)
+            result = self.load(path, data_file)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertFalse(result['resumed'])
+        self.assertEqual(self.loaded(data_file), [f'user{i}' for i in range(1, 11) if i != 9])
+
+
+@override_settings(DATACERT_STAGING_LOAD=True)
+class StagingLoadTests(PipelineTestCase):
+    """Staging loads write UNLOGGED tables, which a database crash empties"""
+    load = InterruptedLoadTests.load
+    loaded = InterruptedLoadTests.loaded
+
+    def persistence(self, schema_name: str, table_name: str) -> str:
+        return self.query('SELECT relpersistence FROM pg_class WHERE oid = to_regclass(%s);',
+                          [f'{schema_name}."{table_name}"'])[0][0]
+
+    def crash(self, data_file: DataFile) -> None:
+        """What crash recovery does to an unlogged table"""
+        with connections['default'].cursor() as cursor:
+            cursor.execute(f'TRUNCATE raw."{data_file.raw_table}";')
+
+    def test_table_is_unlogged_until_promoted(self):
+        path = self.write_csv('users.csv', self.users(10))
+        data_file = DataFile.objects.create(file_name='users.csv')
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(self.persistence('raw', 'raw_users'), 'u')
+        # Deferred to the end of the load
+        self.assertEqual(self.query("""
+            SELECT COUNT(*) FROM pg_constraint WHERE conrelid = 'raw."raw_users"'::regclass AND contype = 'p';
+        """), [(1,)])
+
+        report = validate_file(DefaultValidator(data_file))
+        moved = DataMover(data_file, report).move_validated_data()
+        self.assertTrue(moved['success'], moved.get('error'))
+        self.assertEqual(self.persistence('validated', 'validated_users'), 'p')
+        self.assertEqual(self.count_rows('validated', 'validated_users'), 10)
+
+    @override_settings(DATACERT_RAW_PARTITION_ROWS=4)
+    def test_partitions_are_set_logged_at_promotion(self):
+        path = self.write_csv('users.csv', self.users(10))
+        data_file = DataFile.objects.create(file_name='users.csv')
+        self.assertTrue(ingest_file(data_file, path)['success'])
+        self.assertEqual(self.persistence('raw', 'raw_users_p00000'), 'u')
+
+        report = validate_file(DefaultValidator(data_file))
+        recorder = QueryRecorder()
+        with bulk_connection().execute_wrapper(recorder):
+            moved = DataMover(data_file, report).move_validated_data()
+        self.assertTrue(moved['success'], moved.get('error'))
+        self.assertEqual(
+            [self.persistence('validated', f'validated_users_p0000{index}') for index in range(3)], ['p'] * 3
+        )
+        # Pipelined, the statements of all partitions go out as one query
+        self.assertEqual(sum(query['sql'].count('SET LOGGED') for query in recorder.queries), 3)
+
+    def test_emptied_table_restarts_the_load(self):
+        path = self.write_csv('users.csv', self.users(9))
+        data_file = DataFile.objects.create(file_name='users.csv')
+        self.assertFalse(self.load(path, data_file, fail_after=2)['success'])
+        self.assertEqual(IngestCheckpoint.objects.get(data_file=data_file).rows, 4)
+        self.crash(data_file)
+
+        result = self.load(path, data_file)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertFalse(result['resumed'])
+        self.assertEqual(self.loaded(data_file), [f'user{i}' for i in range(1, 10)])
+
+    def test_emptied_table_is_not_validated(self):
+        path = self.write_csv('users.csv', self.users(9))
+        data_file = DataFile.objects.create(file_name='users.csv')
+        self.assertTrue(ingest_file(data_file, path)['success'])
+        self.crash(data_file)
+
+        with self.assertRaisesMessage(ValueError, 'raw_users holds 0 of the 9 rows loaded'):
+            validate_file(DefaultValidator(data_file))
+        data_file.refresh_from_db()
+        self.assertEqual(data_file.status, 'failed')
+        self.assertFalse(IngestCheckpoint.objects.get(data_file=data_file).completed)
+
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        self.assertEqual(self.count_rows('raw', 'raw_users'), 9)
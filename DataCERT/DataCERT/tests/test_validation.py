@@ -0,0 +1,230 @@
+from django.db import connections
+from django.test import SimpleTestCase, override_settings
+
+from ..models import DataFile, ValidationError
+from ..utils.database import bulk_connection
+from ..utils.ingest import ingest_file, validate_file
+from ..utils.profiling import QueryRecorder
+from ..utils.sampling import rate_estimate, sample_percent, wilson_interval
+from ..utils.validators.base import BaseValidator
+from ..utils.validators.default import DefaultValidator
+from ..utils.validators.keys import ForeignKey, UniqueKey, has_index
+from .db import PipelineTestCase
+
+
+class WilsonIntervalTests(SimpleTestCase):
+    def test_known_values(self):
+        low, high = wilson_interval(10, 100)
+        self.assertAlmostEqual(low, 0.0552, places=4)
+        self.assertAlmostEqual(high, 0.1744, places=4)
+
+    def test_no_failures_has_a_positive_upper_bound(self):
+        low, high = wilson_interval(0, 1000)
+        self.assertAlmostEqual(low, 0.0)
+        self.assertAlmostEqual(high, 0.00383, places=5)
+
+    def test_bounds_stay_in_range(self):
+        for failures, trials in [(0, 1), (1, 1), (5, 5), (3, 7)]:
+            with self.subTest(failures=failures, trials=trials):
+                low, high = wilson_interval(failures, trials)
+                self.assertTrue(0.0 <= low <= failures / trials <= high <= 1.0)
+
+    def test_no_trials(self):
+        self.assertEqual(wilson_interval(0, 0), (0.0, 1.0))
+
+    def test_failures_are_capped_at_trials(self):
+        self.assertEqual(wilson_interval(12, 10), wilson_interval(10, 10))
+
+    def test_narrows_with_more_rows(self):
+        small = wilson_interval(20, 100)
+        large = wilson_interval(2000, 10000)
+        self.assertLess(large[1] - large[0], small[1] - small[0])
+
+    def test_rate_estimate(self):
+        self.assertEqual(rate_estimate(0, 0)['rate'], 0.0)
+        estimate = rate_estimate(25, 100)
+        self.assertEqual((estimate['failures'], estimate['rows'], estimate['rate']), (25, 100, 0.25))
+        self.assertEqual((estimate['low'], estimate['high']), wilson_interval(25, 100))
+
+
+class SamplePercentTests(SimpleTestCase):
+    def test_percentage_of_total(self):
+        self.assertEqual(sample_percent(100000, 10000000), 1.0)
+
+    def test_whole_table(self):
+        self.assertEqual(sample_percent(100000, 50000), 100.0)
+        self.assertEqual(sample_percent(100000, 100000), 100.0)
+        self.assertEqual(sample_percent(100000, None), 100.0)
+        self.assertEqual(sample_percent(100000, 0), 100.0)
+
+    def test_lower_bound(self):
+        self.assertEqual(sample_percent(1, 10 ** 12), 0.0001)
+
+
+class CountingValidator(BaseValidator):
+    def validate(self) -> bool:
+        return True
+
+
+class AbortErrorRateTests(SimpleTestCase):
+    def validator(self, row_count: int = 1000000) -> CountingValidator:
+        return CountingValidator(DataFile(file_name='users.csv', row_count=row_count))
+
+    @override_settings(DATACERT_ABORT_ERROR_RATE=5)
+    def test_default_from_setting(self):
+        self.assertEqual(self.validator().abort_error_rate, 0.05)
+
+    @override_settings(DATACERT_ABORT_ERROR_RATE=0)
+    def test_disabled_by_default(self):
+        validator = self.validator()
+        self.assertIsNone(validator.abort_error_rate)
+        validator.rows_checked = 20000
+        validator.failed_rows = set(range(20000))
+        self.assertFalse(validator._should_abort())
+
+    @override_settings(DATACERT_ABORT_ERROR_RATE=5, DATACERT_ABORT_MIN_ROWS=10000)
+    def test_aborts_once_clearly_over(self):
+        validator = self.validator()
+        validator.rows_checked = 5000
+        validator.failed_rows = set(range(1000))
+        self.assertFalse(validator._should_abort())  # too few rows checked
+        validator.rows_checked = 10000
+        validator.failed_rows = set(range(700))
+        self.assertTrue(validator._should_abort())
+        validator.failed_rows = set(range(520))
+        self.assertFalse(validator._should_abort())  # over 5% but not clearly
+
+    @override_settings(DATACERT_ABORT_ERROR_RATE=5, DATACERT_ABORT_MIN_ROWS=10000)
+    def test_aborts_when_over_for_the_whole_file(self):
+        validator = self.validator(row_count=1000)
+        validator.rows_checked = 100
+        validator.failed_rows = set(range(51))
+        self.assertTrue(validator._should_abort())
+
+    @override_settings(DATACERT_ABORT_ERROR_RATE=5)
+    def test_samples_never_abort(self):
+        validator = self.validator(row_count=100)
+        validator.sample_rows = 10
+        validator.rows_checked = 100
+        validator.failed_rows = set(range(100))
+        self.assertFalse(validator._should_abort())
+
+
+class DefaultValidatorTests(PipelineTestCase):
+    def load(self, lines) -> DataFile:
+        path = self.write_csv('users.csv', lines)
+        data_file = DataFile.objects.create(file_name='users.csv')
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        return data_file
+
+    def test_one_bad_value_is_one_error(self):
+        # In the first chunk loaded, which makes Identifier a text column
+        lines = self.users(20000)
+        lines[4999] = 'user5000;abc;First5000;Last5000'
+        data_file = self.load(lines)
+
+        validator = DefaultValidator(data_file)
+        validator.abort_error_rate = 0.05
+        report = validate_file(validator)
+
+        self.assertFalse(report.aborted)
+        self.assertEqual(validator.rows_checked, 20000)
+        self.assertEqual(report.error_count, 1)
+        error = ValidationError.objects.get(report=report)
+        self.assertEqual((error.row_number, error.column_name), (5000, 'Identifier'))
+        self.assertEqual(error.raw_data['Username'], 'user5000')
+        self.assertEqual(report.estimates['overall']['failures'], 1)
+        self.assertAlmostEqual(report.estimates['overall']['rate'], 1 / 20000)
+
+    def test_row_numbers_are_row_ids(self):
+        lines = self.users(3000)
+        lines[2499] = 'user2500;2500;;Last2500'
+        data_file = self.load(lines)
+
+        validator = DefaultValidator(data_file)
+        for chunk in validator.get_table_data(chunk_size=1000):
+            validator._validate_chunk(chunk)
+        self.assertEqual([(error['row_number'], error['column_name']) for error in validator.errors],
+                         [(2500, 'First name')])
+
+
+class KeyCheckValidator(BaseValidator):
+    def validate(self) -> bool:
+        return True
+
+
+class KeyCheckTests(PipelineTestCase):
+    def load(self, name: str, lines, header: str = 'Username;Identifier;First name;Last name') -> DataFile:
+        path = self.write_csv(name, lines, header=header)
+        data_file = DataFile.objects.create(file_name=name)
+        result = ingest_file(data_file, path)
+        self.assertTrue(result['success'], result.get('error'))
+        return data_file
+
+    def check(self, data_file: DataFile, **rules) -> KeyCheckValidator:
+        validator = KeyCheckValidator(data_file)
+        for name, value in rules.items():
+            setattr(validator, name, value)
+        recorder = QueryRecorder()
+        with bulk_connection().execute_wrapper(recorder):
+            validate_file(validator)
+        self.statements = [query['sql'] for query in recorder.queries]
+        return validator
+
+    def create_users(self):
+        with connections['default'].cursor() as cursor:
+            cursor.execute("""
+                CREATE TABLE validated."validated_users" AS
+                SELECT 'user' || i AS "Username" FROM generate_series(1, 10) AS i;
+            """)
+
+    def test_default_validator_allows_duplicate_identifiers(self):
+        data_file = self.load('users.csv', self.users(10) + self.users(1))
+        validator = DefaultValidator(data_file)
+        self.assertFalse(validator.unique_keys)
+        report = validate_file(validator)
+        self.assertTrue(report.passed, report.summary)
+
+    def test_unique_key_opted_in(self):
+        data_file = self.load('users.csv', self.users(10) + self.users(1, start=3))
+        validator = self.check(data_file, unique_keys=[UniqueKey(['Identifier'])])
+        self.assertEqual([(error['row_number'], error['error_message']) for error in validator.errors],
+                         [(11, 'Duplicate key Identifier=3, first seen in row 3')])
+
+    def test_foreign_key_builds_its_own_index_concurrently(self):
+        self.create_users()
+        lines = [f'order{i};user{i}' for i in range(1, 13)]
+        data_file = self.load('orders.csv', lines, header='Order;Username')
+
+        validator = self.check(data_file, foreign_keys=[ForeignKey(['Username'], table='users')])
+        self.assertEqual([error['row_number'] for error in validator.errors], [11, 12])
+
+        created = [sql for sql in self.statements if sql.startswith('CREATE INDEX')]
+        dropped = [sql for sql in self.statements if sql.startswith('DROP INDEX')]
+        self.assertEqual(len(created), 1)
+        self.assertTrue(created[0].startswith('CREATE INDEX CONCURRENTLY "validated_users_key_'))
+        index_name = created[0].split('"')[1]
+        self.assertEqual(dropped, [f'DROP INDEX CONCURRENTLY IF EXISTS validated."{index_name}";'])
+        self.assertFalse(self.table_exists('validated', index_name))
+
+    def test_index_names_differ_per_run(self):
+        self.create_users()
+        data_file = self.load('orders.csv', ['order1;user1'], header='Order;Username')
+        names = []
+        for _ in range(2):
+            self.check(data_file, foreign_keys=[ForeignKey(['Username'], table='users')])
+            names += [sql.split('"')[1] for sql in self.statements if sql.startswith('CREATE INDEX')]
+        self.assertEqual(len(set(names)), 2)
+
+    def test_existing_index_is_used_and_kept(self):
+        self.create_users()
+        with connections['default'].cursor() as cursor:
+            cursor.execute('CREATE INDEX users_username ON validated."validated_users" ("Username");')
+            self.assertTrue(has_index(cursor, 'validated', 'validated_users', ['Username']))
+            self.assertFalse(has_index(cursor, 'validated', 'validated_users', ['Username', 'Identifier']))
+        data_file = self.load('orders.csv', ['order1;user1'], header='Order;Username')
+
+        self.check(data_file, foreign_keys=[ForeignKey(['Username'], table='users')])
+        self.assertFalse([sql for sql in self.statements if 'INDEX' in sql])
+        self.assertTrue(self.table_exists('validated', 'users_username'))
@@ -16,12 +16,24 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path
-from .views import CSVUploadView, ValidationView, ValidationReportView, MoveToValidatedView
+from .views import (
+    CSVUploadView, ValidationView, ValidationReportView, MoveToValidatedView,
+    ExportValidatedView, MetricsView, RetryIngestView, ResumableUploadView,
+    ResumableUploadDetailView, ProgressStreamView, BatchUploadView, BatchDetailView
+)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('upload/', CSVUploadView.as_view(), name='csv_upload'),
+    path('upload/resume/<int:data_file_id>/', RetryIngestView.as_view(), name='retry_ingest'),
+    path('uploads/', ResumableUploadView.as_view(), name='resumable_upload'),
+    path('uploads/<uuid:upload_id>/', ResumableUploadDetailView.as_view(), name='resumable_upload_detail'),
+    path('batches/', BatchUploadView.as_view(), name='batch_upload'),
+    path('batches/<int:batch_id>/', BatchDetailView.as_view(), name='batch_detail'),
+    path('progress/<str:progress_id>/', ProgressStreamView.as_view(), name='progress_stream'),
     path('validate/', ValidationView.as_view(), name='validate'),
     path('validation-report/<int:report_id>/', ValidationReportView.as_view(), name='validation_report'),
-    path('move-to-validated/<int:report_id>/', MoveToValidatedView.as_view(), name='move_to_validated')
+    path('move-to-validated/<int:report_id>/', MoveToValidatedView.as_view(), name='move_to_validated'),
+    path('export/<int:report_id>/', ExportValidatedView.as_view(), name='export_validated'),
+    path('metrics', MetricsView.as_view(), name='metrics')
 ]
@@ -0,0 +1,212 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, Optional, Tuple
+import logging
+import os
+import shutil
+import threading
+import zipfile
+
+from ..models import DataFile, IngestBatch, table_name_for
+from .compression import COMPRESSED_SUFFIXES
+from .ingest import ingest_file, validate_file
+
+logger = logging.getLogger(__name__)
+
+# Names of the files a batch accepts
+BATCH_SUFFIXES = ('.csv',) + COMPRESSED_SUFFIXES
+
+# Seconds between two heartbeats of a running batch
+HEARTBEAT_INTERVAL = 60
+
+# A running batch without a heartbeat for this long lost its process
+STALE_AFTER = timedelta(minutes=10)
+
+
+def is_batch_file(file_name: str) -> bool:
+    return file_name.lower().endswith(BATCH_SUFFIXES)
+
+
+def expand_zip(zip_path: str, target_dir: str) -> List[str]:
+    """
+    Extract every CSV of an archive
+
+    Members are written flat into target_dir under their base name and
+    each one is held to DATACERT_MAX_DECOMPRESSED_BYTES.
+
+    Returns:
+        Paths of the extracted files
+    """
+    limit = settings.DATACERT_MAX_DECOMPRESSED_BYTES
+    paths = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name.lower().endswith('.csv'):
+                continue
+            if info.file_size > limit:
+                raise ValueError(f"{name} exceeds the decompressed size limit")
+            path = os.path.join(target_dir, name)
+            with archive.open(info) as source, open(path, 'wb') as target:
+                shutil.copyfileobj(source, target, 1024 * 1024)
+            paths.append(path)
+    return paths
+
+
+def fail_stale_batches() -> int:
+    """
+    Close the batches whose process stopped, e.g. a recycled web worker
+
+    Their unfinished files are marked failed. Files that were part way
+    through loading keep their checkpoint and can be resumed from the
+    upload page.
+
+    Returns:
+        Number of batches closed
+    """
+    cutoff = timezone.now() - STALE_AFTER
+    stale = IngestBatch.objects.filter(status='running').annotate(
+        last_seen=Coalesce('heartbeat_at', 'created_at')
+    ).filter(last_seen__lt=cutoff)
+    closed = 0
+    for batch in stale:
+        for data_file in batch.files.filter(status__in=['queued', 'validating']).select_related('checkpoint'):
+            checkpoint = getattr(data_file, 'checkpoint', None)
+            if data_file.status == 'validating':
+                data_file.error_message = 'The batch stopped during validation, validate the file again.'
+                data_file.status = 'uploaded'
+            elif checkpoint is not None and checkpoint.rows > 0:
+                data_file.error_message = 'The batch stopped during the load, resume it from the upload page.'
+                data_file.status = 'failed'
+            else:
+                data_file.error_message = 'The batch stopped before the file was loaded, upload it again.'
+                data_file.status = 'failed'
+            data_file.save(update_fields=['status', 'error_message'])
+        batch.refresh_status(finished=True)
+        logger.warning(f"Batch {batch.name} had no heartbeat since {batch.last_seen}, marked {batch.status}")
+        closed += 1
+    return closed
+
+
+class BatchIngester:
+    """
+    Loads and validates the files of a batch on a bounded worker pool
+
+    Each file has its own DataFile and is handled independently: a large
+    or broken file occupies one worker while the others carry on. Files
+    are started smallest first, so most results are in early.
+    """
+    def __init__(self, batch: IngestBatch, workers: Optional[int] = None):
+        """
+        Initialize the ingester
+
+        Args:
+            batch: Batch the files belong to
+            workers: Files processed at once, DATACERT_BATCH_WORKERS by default
+        """
+        self.batch = batch
+        self.workers = workers or settings.DATACERT_BATCH_WORKERS
+        self.files: List[Tuple[DataFile, str]] = []
+        self.table_names = set()
+
+    def add_file(self, file_path: str, file_name: Optional[str] = None) -> List[DataFile]:
+        """
+        Queue a stored file, zip archives are expanded into one file per CSV
+
+        Returns:
+            The DataFiles created for it
+        """
+        file_name = file_name or os.path.basename(file_path)
+        if file_name.lower().endswith('.zip'):
+            target_dir = os.path.join(os.path.dirname(file_path), os.path.splitext(file_name)[0])
+            os.makedirs(target_dir, exist_ok=True)
+            try:
+                paths = expand_zip(file_path, target_dir)
+            except (zipfile.BadZipFile, ValueError) as e:
+                return [self._add_failed(file_name, f"Cannot expand archive: {str(e)}")]
+            return [self._add(path, os.path.basename(path)) for path in paths]
+        return [self._add(file_path, file_name)]
+
+    def _add(self, file_path: str, file_name: str) -> DataFile:
+        # Raw tables are named after the file, see table_name_for
+        table_name = table_name_for(file_name)
+        if table_name in self.table_names:
+            return self._add_failed(file_name, f"Another file in the batch loads into raw_{table_name}")
+        self.table_names.add(table_name)
+
+        data_file = DataFile.objects.create(file_name=file_name, status='queued', batch=self.batch)
+        self.files.append((data_file, file_path))
+        return data_file
+
+    def _add_failed(self, file_name: str, error: str) -> DataFile:
+        return DataFile.objects.create(file_name=file_name, status='failed', batch=self.batch, error_message=error)
+
+    def run(self) -> IngestBatch:
+        """Process every queued file, then set the aggregate batch status"""
+        queued = sorted(self.files, key=lambda item: os.path.getsize(item[1]))
+        logger.info(f"Batch {self.batch.name}: {len(queued)} files on {self.workers} workers")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(stop,), name=f'batch-{self.batch.id}-heartbeat')
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='batch') as pool:
+                list(pool.map(self._process, queued))
+        finally:
+            stop.set()
+            heartbeat.join()
+            self.batch.refresh_status(finished=True)
+        logger.info(f"Batch {self.batch.name} finished: {self.batch.status}")
+        return self.batch
+
+    def start(self) -> threading.Thread:
+        """
+        Run the batch on a daemon thread, e.g. from a request
+
+        Returns:
+            The started thread
+        """
+        thread = threading.Thread(target=self._run_in_thread, name=f'batch-{self.batch.id}', daemon=True)
+        thread.start()
+        return thread
+
+    def _run_in_thread(self) -> None:
+        try:
+            self.run()
+        except Exception as e:
+            logger.error(f"Error running batch {self.batch.name}: {str(e)}")
+        finally:
+            # The thread's own connections are not closed by the request cycle
+            connections.close_all()
+
+    def _heartbeat(self, stop: threading.Event) -> None:
+        """Record that the batch is alive until it ends, see fail_stale_batches"""
+        try:
+            while True:
+                IngestBatch.objects.filter(id=self.batch.id).update(heartbeat_at=timezone.now())
+                if stop.wait(HEARTBEAT_INTERVAL):
+                    return
+        except Exception as e:
+            logger.error(f"Error recording the heartbeat of batch {self.batch.name}: {str(e)}")
+        finally:
+            connections.close_all()
+
+    def _process(self, item: Tuple[DataFile, str]) -> None:
+        from .validators.default import DefaultValidator
+
+        data_file, file_path = item
+        try:
+            result = ingest_file(data_file, file_path)
+            if result['success'] and self.batch.validate:
+                validate_file(DefaultValidator(data_file))
+        except Exception as e:
+            logger.error(f"Error processing {data_file.file_name} in batch {self.batch.name}: {str(e)}")
+            data_file.status = 'failed'
+            data_file.error_message = str(e)
+            data_file.save()
+        finally:
+            # Worker threads open their own connections
+            connections.close_all()
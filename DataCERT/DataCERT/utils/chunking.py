@@ -0,0 +1,95 @@
+from django.conf import settings
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import json
+import threading
+import weakref
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# A chunk is copied a few times while it is processed (CSV buffer for
+# COPY, profile and validation intermediates), so it gets this share of
+# the budget
+CHUNK_HEADROOM = 4
+
+# Rows measured per chunk, enough for a stable bytes per row figure
+MEASURE_ROWS = 1000
+
+# Chunks measured before the size is fixed
+MEASURE_CHUNKS = 3
+
+# Chunkers alive in the process, they share the budget
+_live = weakref.WeakSet()
+_live_lock = threading.Lock()
+
+
+def memory_budget_bytes() -> int:
+    """Memory all chunked pipelines of the process may hold, 0 when unlimited"""
+    return settings.DATACERT_MEMORY_BUDGET_MB * 1024 * 1024
+
+
+def frame_row_bytes(df: 'pd.DataFrame') -> float:
+    """Memory per row of a DataFrame, text included, from evenly spaced rows"""
+    if df.empty:
+        return 0.0
+    step = max(1, len(df) // MEASURE_ROWS)
+    sample = df.iloc[::step]
+    return float(sample.memory_usage(index=False, deep=True).sum()) / len(sample)
+
+
+class AdaptiveChunker:
+    """
+    Picks chunk sizes that fill the memory budget
+
+    The first chunk has initial_rows rows, as loads take the column types
+    from it. The first few chunks are measured and later chunks are sized
+    from the widest rows seen. The
+    budget is split between the chunkers alive at the time, so concurrent
+    loads and scans shrink their chunks instead of adding up. With
+    DATACERT_MEMORY_BUDGET_MB set to 0 every chunk has initial_rows rows.
+    """
+    def __init__(self, initial_rows: int, min_rows: int = 100, max_rows: int = 1000000,
+                 budget_bytes: Optional[int] = None):
+        """
+        Initialize the chunker
+
+        Args:
+            initial_rows: Rows of the first chunk, and of every chunk when there is no budget
+            min_rows: Smallest chunk, however wide the rows
+            max_rows: Largest chunk, however narrow the rows
+            budget_bytes: Memory budget, memory_budget_bytes() by default
+        """
+        self.initial_rows = initial_rows
+        self.min_rows = min_rows
+        self.max_rows = max_rows
+        self.budget_bytes = memory_budget_bytes() if budget_bytes is None else budget_bytes
+        self.row_bytes: Optional[float] = None
+        self.measured = 0
+        with _live_lock:
+            _live.add(self)
+
+    @property
+    def rows(self) -> int:
+        """Rows for the next chunk"""
+        if not self.budget_bytes or not self.row_bytes:
+            return self.initial_rows
+        with _live_lock:
+            sharing = max(1, len(_live))
+        rows = int(self.budget_bytes / sharing / CHUNK_HEADROOM / self.row_bytes)
+        return max(self.min_rows, min(self.max_rows, rows))
+
+    def observe(self, df: 'pd.DataFrame') -> None:
+        """Measure a chunk, only the first MEASURE_CHUNKS are looked at"""
+        if self.budget_bytes and self.measured < MEASURE_CHUNKS and not df.empty:
+            self.observe_bytes(frame_row_bytes(df))
+
+    def observe_records(self, records: List[Dict[str, Any]]) -> None:
+        """Measure dict records, e.g. validation errors, by their JSON size"""
+        if self.budget_bytes and self.measured < MEASURE_CHUNKS and records:
+            sample = records[:MEASURE_ROWS]
+            self.observe_bytes(len(json.dumps(sample, default=str)) / len(sample))
+
+    def observe_bytes(self, row_bytes: float) -> None:
+        """Record a measured size per row, the widest one is kept"""
+        self.measured += 1
+        self.row_bytes = max(self.row_bytes or 0.0, row_bytes)
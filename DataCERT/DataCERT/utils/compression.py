@@ -0,0 +1,141 @@
+from django.conf import settings
+from typing import BinaryIO, Optional
+import gzip
+import io
+import os
+import zipfile
+
+# Suffixes of the compressed formats accepted for upload
+COMPRESSED_SUFFIXES = ('.csv.gz', '.csv.zst', '.zip')
+
+# Size of the buffer between the decompressor and the parser
+BUFFER_SIZE = 1024 * 1024
+
+
+def is_compressed(file_path: str) -> bool:
+    return file_path.lower().endswith(('.gz', '.zst', '.zip'))
+
+
+def strip_compression_suffix(file_name: str) -> str:
+    """username.csv.gz -> username.csv, other names are returned unchanged"""
+    for suffix in ('.gz', '.zst', '.zip'):
+        if file_name.lower().endswith(suffix):
+            return file_name[:-len(suffix)]
+    return file_name
+
+
+def find_zip_member(archive: zipfile.ZipFile) -> zipfile.ZipInfo:
+    """The CSV file inside a zip archive, the first file if none ends in .csv"""
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if not members:
+        raise ValueError('Zip archive is empty')
+    for info in members:
+        if info.filename.lower().endswith('.csv'):
+            return info
+    return members[0]
+
+
+class _LimitedReader(io.RawIOBase):
+    """Raw stream that fails once more than max_bytes have been read"""
+    def __init__(self, source: BinaryIO, max_bytes: Optional[int], archive: Optional[zipfile.ZipFile] = None):
+        self.source = source
+        self.max_bytes = max_bytes
+        self.archive = archive
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.bytes_read
+
+    def readinto(self, buffer) -> int:
+        data = self.source.read(len(buffer))
+        self.bytes_read += len(data)
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise ValueError(
+                f"Decompressed size exceeds the limit of {self.max_bytes} bytes"
+            )
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.source.close()
+            if self.archive is not None:
+                self.archive.close()
+        super().close()
+
+
+class _ResumedReader(io.RawIOBase):
+    """Raw stream serving the header line followed by the file from an offset"""
+    def __init__(self, file: BinaryIO, header: bytes, start_offset: Optional[int] = None):
+        self.file = file
+        self.pending = header
+        if start_offset is not None:
+            file.seek(start_offset)
+
+    def readable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def readinto(self, buffer) -> int:
+        if self.pending:
+            size = min(len(buffer), len(self.pending))
+            buffer[:size] = self.pending[:size]
+            self.pending = self.pending[size:]
+            return size
+        return self.file.readinto(buffer)
+
+    def close(self) -> None:
+        if not self.closed:
+            self.file.close()
+        super().close()
+
+
+def open_source(file_path: str, start_offset: Optional[int] = None) -> BinaryIO:
+    """
+    Open an uploaded file for reading, decompressing on the fly
+
+    Plain files are returned as-is, or from start_offset with the header
+    line in front when resuming. Compressed files are decompressed as a
+    stream, nothing is written to disk, and reading fails once more than
+    DATACERT_MAX_DECOMPRESSED_BYTES have been produced.
+    """
+    lowered = file_path.lower()
+    archive = None
+    if lowered.endswith('.gz'):
+        source = gzip.open(file_path, 'rb')
+    elif lowered.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError('Reading .zst files requires the zstandard package')
+        source = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+    elif lowered.endswith('.zip'):
+        archive = zipfile.ZipFile(file_path)
+        source = archive.open(find_zip_member(archive))
+    elif start_offset:
+        file = open(file_path, 'rb')
+        header = file.readline()
+        return io.BufferedReader(_ResumedReader(file, header, start_offset), buffer_size=BUFFER_SIZE)
+    else:
+        return open(file_path, 'rb')
+
+    limited = _LimitedReader(source, settings.DATACERT_MAX_DECOMPRESSED_BYTES, archive)
+    return io.BufferedReader(limited, buffer_size=BUFFER_SIZE)
+
+
+def resume_stream(stream: BinaryIO, header: bytes) -> BinaryIO:
+    """Serve the header in front of what is left of a stream, e.g. after skipped rows"""
+    return io.BufferedReader(_ResumedReader(stream, header), buffer_size=BUFFER_SIZE)
+
+
+def source_size(file_path: str) -> int:
+    """Best cheap estimate of the uncompressed size of an upload"""
+    if file_path.lower().endswith('.zip'):
+        with zipfile.ZipFile(file_path) as archive:
+            return find_zip_member(archive).file_size
+    return os.path.getsize(file_path)
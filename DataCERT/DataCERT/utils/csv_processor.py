@@ -1,89 +1,113 @@
 import pandas as pd
-import numpy as np
 from django.conf import settings
-from django.db import connection
+from django.db import transaction
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 import chardet
+from .instrumentation import PipelineMetrics
+from .progress import ProgressReporter
+from .parsers import Dialect, RowReader, get_parser
+from .compression import is_compressed, open_source
+from .chunking import AdaptiveChunker
+from .database import bulk_alias, bulk_connection, copy_dataframe, execute_pipelined
+from .partitions import create_partitions, partitioning_enabled
+from .profiler import TableProfile
+from ..models import DataFile, IngestCheckpoint, table_name_for
 
 logger = logging.getLogger(__name__)
 
+# Number of bytes read from the start of the file for encoding detection
+ENCODING_SAMPLE_SIZE = 1024 * 1024
+
+# Number of bytes used to sniff the delimiter and quoting
+DIALECT_SAMPLE_SIZE = 64 * 1024
+
+def _ascii_compatible(encoding: str) -> bool:
+    """Whether line breaks and quotes are single ASCII bytes in this encoding"""
+    try:
+        return '\n"'.encode(encoding)[-2:] == b'\n"'
+    except LookupError:
+        return False
+
+
+class _RowOffsets:
+    """
+    Follows the byte offset of row boundaries in an uncompressed file
+
+    Rows are found like the parsers find them, quoted fields may hold line
+    breaks. Blank lines between rows are skipped the same way the parsers
+    skip them.
+    """
+    def __init__(self, file_path: str, dialect: Dialect, start_offset: Optional[int] = None):
+        self.file = open(file_path, 'rb')
+        self.rows = RowReader(self.file, dialect)
+        self.rows.read()  # header
+        if start_offset:
+            self.file.seek(start_offset)
+
+    def advance(self, rows: int) -> int:
+        """Move past the given number of non-blank rows, returns the new offset"""
+        self.rows.skip(rows)
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
 class CSVProcessor:
-    def __init__(self, file_path: str, chunk_size: int = 10000):
+    def __init__(self, file_path: str, chunk_size: Optional[int] = None, data_file: Optional[DataFile] = None,
+                 progress: Optional[ProgressReporter] = None):
         """
         Initialize the CSV processor
         
         Args:
             file_path: Path to the CSV file
-            chunk_size: Number of rows to process at once
+            chunk_size: Number of rows to process at once, by default sized
+                from DATACERT_MEMORY_BUDGET_MB and the width of the rows
+            data_file: When given, progress is checkpointed after every chunk
+                and a later call resumes from the last checkpoint
+            progress: Optional reporter for live progress updates
         """
         self.file_path = file_path
         self.chunk_size = chunk_size
+        self.chunker = AdaptiveChunker(initial_rows=10000) if chunk_size is None else None
+        self.data_file = data_file
+        self.checkpoint: Optional[IngestCheckpoint] = None
         self.total_rows = 0
         self.processed_rows = 0
         self.schema_name = settings.DATABASE_SCHEMAS['RAW']
+        self.metrics = PipelineMetrics('ingest')
+        self.progress = progress
+        self.partitioned = partitioning_enabled()
+        self.staging = settings.DATACERT_STAGING_LOAD
+        self.profile = TableProfile() if settings.DATACERT_COLUMN_PROFILE else None
+        # BIGINT columns of the raw table, see _conform_chunk
+        self.integer_columns: List[str] = []
+
+    def _report(self, **fields) -> None:
+        if self.progress is not None:
+            self.progress.update(**fields)
         
     def _detect_encoding(self) -> str:
-        """Detect the file encoding"""
-        with open(self.file_path, 'rb') as file:
-            raw_data = file.read()
+        """Detect the file encoding from a sample of the file"""
+        with self.metrics.stage('detect_encoding') as stats:
+            with open_source(self.file_path) as file:
+                raw_data = file.read(ENCODING_SAMPLE_SIZE)
+            self.metrics.add(stats, bytes=len(raw_data))
             result = chardet.detect(raw_data)
             return result['encoding'] or 'utf-8'
-    
-    def _read_csv_with_encoding(self) -> pd.DataFrame:
-        """Try to read CSV with detected encoding"""
-        try:
-            encoding = self._detect_encoding()
-            logger.info(f"Detected encoding: {encoding}")
-            
-            return pd.read_csv(
-                self.file_path,
-                encoding=encoding,
-                sep=None,  # Let pandas detect the separator
-                engine='python',  # More flexible but slower engine
-                encoding_errors='replace'  # Replace invalid characters
-            )
-        except Exception as e:
-            logger.error(f"Error reading CSV with detected encoding: {str(e)}")
-            # Fallback to common encodings
-            encodings = ['utf-8', 'latin1', 'iso-8859-1', 'cp1252']
-            
-            for enc in encodings:
-                try:
-                    logger.info(f"Trying encoding: {enc}")
-                    return pd.read_csv(
-                        self.file_path,
-                        encoding=enc,
-                        sep=None,
-                        engine='python',
-                        encoding_errors='replace'
-                    )
-                except Exception as e:
-                    logger.error(f"Failed with encoding {enc}: {str(e)}")
-                    continue
-            
-            raise ValueError("Unable to read CSV file with any supported encoding")
 
-class CSVProcessor:
-    def __init__(self, file_path: str, chunk_size: int = 10000):
-        """
-        Initialize the CSV processor
-        
-        Args:
-            file_path: Path to the CSV file
-            chunk_size: Number of rows to process at once
-        """
-        self.file_path = file_path
-        self.chunk_size = chunk_size
-        self.total_rows = 0
-        self.processed_rows = 0
-        self.schema_name = settings.DATABASE_SCHEMAS['RAW']
-        
-    def _create_temp_table(self, df: pd.DataFrame, table_name: str) -> None:
-        """
-        Create a temporary table based on DataFrame structure
-        """
+    def _detect_dialect(self, encoding: str) -> Dialect:
+        """Detect delimiter and quoting from the first lines of the file"""
+        with open_source(self.file_path) as file:
+            sample = file.read(DIALECT_SAMPLE_SIZE).decode(encoding, errors='replace')
+        # Only sniff complete lines
+        if '\n' in sample:
+            sample = sample[:sample.rindex('\n')]
+        return Dialect.sniff(sample)
+    
+    def _column_types(self, df: pd.DataFrame) -> Dict[str, str]:
+        """SQL type of each column of a DataFrame"""
         dtype_mapping = {
             'object': 'TEXT',
             'int64': 'BIGINT',
@@ -91,28 +115,160 @@ class CSVProcessor:
             'datetime64[ns]': 'TIMESTAMP',
             'bool': 'BOOLEAN'
         }
-        
-        columns = []
-        for col, dtype in df.dtypes.items():
-            sql_type = dtype_mapping.get(str(dtype), 'TEXT')
-            columns.append(f'"{col}" {sql_type}')
-            
-        create_table_sql = f"""
-        DROP TABLE IF EXISTS {self.schema_name}."{table_name}";
-        CREATE TABLE {self.schema_name}."{table_name}" (
-            id SERIAL PRIMARY KEY,
-            {', '.join(columns)},
-            _processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
+        return {col: dtype_mapping.get(str(dtype), 'TEXT') for col, dtype in df.dtypes.items()}
+
+    def _create_temp_table(self, df: pd.DataFrame, table_name: str) -> None:
         """
+        Create a temporary table based on DataFrame structure
+        """
+        column_types = self._column_types(df)
+        self.integer_columns = [col for col, sql_type in column_types.items() if sql_type == 'BIGINT']
+
+        columns = [f'"{col}" {sql_type}' for col, sql_type in column_types.items()]
+
+        # Partitioned and staging tables take their ids from the ingest row
+        # counter, so each chunk knows which partition it lands in and no
+        # sequence is hit per row. Staging tables get their primary key and
+        # _processed_at column once the load is done, see _finalize_table.
+        if self.staging:
+            key = 'id BIGINT NOT NULL'
+        elif self.partitioned:
+            key = 'id BIGINT PRIMARY KEY'
+        else:
+            key = 'id SERIAL PRIMARY KEY'
+        if not self.staging:
+            columns.append('_processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP')
+        # Partitioned tables cannot be unlogged, their partitions are instead
+        persistence = 'UNLOGGED ' if self.staging and not self.partitioned else ''
+        partitioning = 'PARTITION BY RANGE (id)' if self.partitioned else ''
+            
+        statements = [
+            f'DROP TABLE IF EXISTS {self.schema_name}."{table_name}" CASCADE',
+            f"""
+            CREATE {persistence}TABLE {self.schema_name}."{table_name}" (
+                {key},
+                {', '.join(columns)}
+            ) {partitioning}
+            """,
+        ]
         
-        with connection.cursor() as cursor:
-            cursor.execute(create_table_sql)
+        with self.metrics.stage('create_table'):
+            with bulk_connection().cursor() as cursor:
+                execute_pipelined(cursor, statements)
     
     def _get_table_name(self) -> str:
-        """Generate table name from file name"""
-        base_name = os.path.splitext(os.path.basename(self.file_path))[0]
-        return f"raw_{base_name.lower().replace(' ', '_')}"
+        """
+        Raw table of the load
+
+        Named by the DataFile when there is one, as the stored file may
+        have been renamed to avoid overwriting another upload.
+        """
+        if self.data_file is not None:
+            return self.data_file.raw_table
+        return f"raw_{table_name_for(self.file_path)}"
+
+    def _table_exists(self, table_name: str) -> bool:
+        with bulk_connection().cursor() as cursor:
+            cursor.execute("""
+                SELECT 1 FROM information_schema.tables
+                WHERE table_schema = %s AND table_name = %s;
+            """, [self.schema_name, table_name])
+            return cursor.fetchone() is not None
+
+    def _get_integer_columns(self, table_name: str) -> List[str]:
+        """BIGINT columns of an existing raw table, when resuming its load"""
+        with bulk_connection().cursor() as cursor:
+            cursor.execute("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_schema = %s AND table_name = %s
+                AND data_type = 'bigint' AND column_name != 'id';
+            """, [self.schema_name, table_name])
+            return [row[0] for row in cursor.fetchall()]
+
+    def _conform_chunk(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Cast a chunk to the column types of the raw table
+
+        The table's types come from the first chunk. A missing value in a
+        later chunk turns an integer column into float64, which COPY would
+        write as 11.0 and BIGINT rejects, so those values go out as
+        nullable integers instead.
+        """
+        columns = [col for col in self.integer_columns if col in df.columns and df[col].dtype.kind == 'f']
+        if not columns:
+            return df
+        df = df.copy(deep=False)
+        for col in columns:
+            values = df[col]
+            if not values.dropna().mod(1).eq(0).all():
+                raise ValueError(
+                    f'Column "{col}" holds decimal values after row {self.processed_rows}, '
+                    f'but the first rows made it an integer column'
+                )
+            df[col] = values.astype('Int64')
+        return df
+
+    def _table_has_rows(self, table_name: str) -> bool:
+        """Unlogged tables come back empty after a crash"""
+        with bulk_connection().cursor() as cursor:
+            cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {self.schema_name}."{table_name}");')
+            return cursor.fetchone()[0]
+
+    def _finalize_table(self, table_name: str) -> None:
+        """
+        Build what staging mode deferred, then mark the load complete
+
+        Adds the primary key and the _processed_at column, which only
+        changes the catalog, and refreshes planner statistics. Runs in the
+        same transaction as the checkpoint update so it is never repeated.
+        """
+        alias = bulk_alias()
+        with self.metrics.stage('finalize_table'):
+            with transaction.atomic(using=alias):
+                if self.staging:
+                    with bulk_connection().cursor() as cursor:
+                        execute_pipelined(cursor, [
+                            f'ALTER TABLE {self.schema_name}."{table_name}" '
+                            f'ADD COLUMN _processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP',
+                            f'ALTER TABLE {self.schema_name}."{table_name}" ADD PRIMARY KEY (id)',
+                            f'ANALYZE {self.schema_name}."{table_name}"',
+                        ])
+                if self.checkpoint is not None:
+                    self.checkpoint.completed = True
+                    self.checkpoint.save(using=alias, update_fields=['completed', 'updated_at'])
+
+    def _load_checkpoint(self, table_name: str) -> bool:
+        """
+        Fetch or create the checkpoint for this file
+
+        Returns:
+            True when an interrupted load can be resumed, which needs the
+            byte offset or the number of rows of the file it stopped at
+        """
+        if self.data_file is None:
+            return False
+
+        self.checkpoint, _ = IngestCheckpoint.objects.get_or_create(
+            data_file=self.data_file,
+            defaults={'file_path': self.file_path, 'table_name': table_name}
+        )
+        resumable = (
+            self.checkpoint.rows > 0
+            and not self.checkpoint.completed
+            and (self.checkpoint.byte_offset is not None or self.checkpoint.input_rows is not None)
+            and self.checkpoint.file_path == self.file_path
+            and self._table_exists(table_name)
+            and self._table_has_rows(table_name)
+        )
+        if not resumable:
+            self.checkpoint.file_path = self.file_path
+            self.checkpoint.table_name = table_name
+            self.checkpoint.rows = 0
+            self.checkpoint.input_rows = 0
+            self.checkpoint.byte_offset = None
+            self.checkpoint.completed = False
+            self.checkpoint.save()
+        return resumable
         
     def process_file(self) -> Dict[str, Any]:
         """
@@ -122,62 +278,159 @@ class CSVProcessor:
             Dict containing processing statistics
         """
         try:
-            # First pass to get total rows and create table
-            total_rows = sum(1 for _ in open(self.file_path)) - 1  # subtract header
-            self.total_rows = total_rows
-            
-            # Create iterator for processing in chunks
-            chunks = pd.read_csv(
-                self.file_path,
-                chunksize=self.chunk_size,
-                low_memory=False,
-                on_bad_lines='warn',
-                sep=';'
-            )
-            
-            # Process first chunk to get structure and create table
-            first_chunk = next(chunks)
+            self._report(stage='detect_encoding')
+            encoding = self._detect_encoding()
+            logger.info(f"Detected encoding: {encoding}")
+
             table_name = self._get_table_name()
-            self._create_temp_table(first_chunk, table_name)
-            
-            # Process first chunk
-            self._process_chunk(first_chunk, table_name)
-            self.processed_rows += len(first_chunk)
-            
-            # Process remaining chunks
-            for chunk in chunks:
-                self._process_chunk(chunk, table_name)
-                self.processed_rows += len(chunk)
+            resume = self._load_checkpoint(table_name)
+            compressed = is_compressed(self.file_path)
+
+            self._report(stage='parse')
+            with self.metrics.stage('parse') as stats:
+                # First pass to get total rows, compressed files are only
+                # decompressed once so their total is known at the end
+                if not compressed:
+                    with open(self.file_path, 'rb') as file:
+                        total_rows = sum(1 for _ in file) - 1  # subtract header
+                    self.total_rows = total_rows
+                self.metrics.add(stats, bytes=os.path.getsize(self.file_path))
+
+                dialect = self._detect_dialect(encoding)
+                start_offset = None
+                skip_rows = 0
+                if resume:
+                    self.processed_rows = self.checkpoint.rows
+                    self.integer_columns = self._get_integer_columns(table_name)
+                    # Seek straight to the next row when its offset is known,
+                    # otherwise skip the rows read, malformed ones included
+                    start_offset = self.checkpoint.byte_offset
+                    if start_offset is None:
+                        skip_rows = self.checkpoint.input_rows
+                    logger.info(f"Resuming {table_name} after row {self.checkpoint.rows}")
+                parser = get_parser(
+                    self.file_path, dialect, encoding, self.chunk_size or 10000,
+                    start_offset=start_offset, skip_rows=skip_rows, chunker=self.chunker
+                )
+                logger.info(f"Using {parser.name} parser with delimiter {dialect.delimiter!r}")
+
+                # Create iterator for processing in chunks
+                chunks = parser.iter_chunks()
+
+            # Row boundaries are only tracked for uncompressed files with a
+            # checkpoint, when the parser counts skipped lines per chunk and
+            # rows can be split as bytes. Otherwise a resume skips the loaded
+            # rows instead.
+            offsets = None
+            if (self.checkpoint is not None and not compressed and skip_rows == 0
+                    and parser.exact_bad_lines and _ascii_compatible(encoding)):
+                offsets = _RowOffsets(self.file_path, dialect, start_offset)
+
+            # Rows read from the file, loaded or malformed. Only known while
+            # the parser's bad line count is exact, Arrow's runs ahead and
+            # is only exact while it is 0.
+            input_base = self.checkpoint.input_rows if resume else 0
+            if not _ascii_compatible(encoding):
+                input_base = None
+            loaded_base = self.processed_rows
+
+            try:
+                bad_lines = 0
+                table_created = resume
+                while True:
+                    with self.metrics.stage('parse'):
+                        chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    if self.chunker is not None:
+                        self.chunker.observe(chunk)
+
+                    # The first chunk gives the structure of the table
+                    if not table_created:
+                        self._report(stage='create_table', total_rows=self.total_rows or None)
+                        self._create_temp_table(chunk, table_name)
+                        table_created = True
+
+                    if self.profile is not None:
+                        with self.metrics.stage('profile') as stats:
+                            self.profile.update(chunk)
+                            self.metrics.add(stats, rows=len(chunk))
+
+                    byte_offset = None
+                    if offsets is not None:
+                        byte_offset = offsets.advance(len(chunk) + parser.bad_lines - bad_lines)
+                        bad_lines = parser.bad_lines
+                    input_rows = None
+                    if input_base is not None and (parser.exact_bad_lines or parser.bad_lines == 0):
+                        input_rows = input_base + self.processed_rows + len(chunk) - loaded_base + parser.bad_lines
+                    self._process_chunk(chunk, table_name, byte_offset, input_rows)
+                    self.processed_rows += len(chunk)
+                    self._report(
+                        stage='load',
+                        rows=self.processed_rows,
+                        bytes=parser.bytes_read,
+                        errors=parser.bad_lines
+                    )
+            finally:
+                if offsets is not None:
+                    offsets.close()
+
+            if not table_created:
+                raise ValueError('File contains no rows')
+
+            if compressed:
+                self.total_rows = self.processed_rows
+
+            self._report(stage='finalize_table')
+            self._finalize_table(table_name)
+
+            if self.progress is not None:
+                self.progress.finish(True, f'{self.processed_rows} rows imported')
                 
             return {
                 'success': True,
                 'total_rows': self.total_rows,
                 'processed_rows': self.processed_rows,
-                'table_name': table_name
+                'table_name': table_name,
+                'parser': parser.name,
+                'resumed': resume,
+                # A resumed load only saw the rows after the checkpoint
+                'profile': self.profile.to_dict(partial=resume) if self.profile is not None else None
             }
             
         except Exception as e:
             logger.error(f"Error processing CSV file: {str(e)}")
+            if self.progress is not None:
+                self.progress.finish(False, str(e))
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def _process_chunk(self, df: pd.DataFrame, table_name: str) -> None:
-        """Process a single chunk of data"""
-        # Replace NaN with None for proper SQL NULL values
-        df = df.replace({np.nan: None})
-        
-        # Prepare the INSERT statement
-        columns = [f'"{col}"' for col in df.columns]
-        placeholders = ["%s" for _ in columns]
-        
-        insert_sql = f"""
-        INSERT INTO {self.schema_name}."{table_name}"
-        ({', '.join(columns)})
-        VALUES ({', '.join(placeholders)})
-        """
-        
-        # Execute the INSERT
-        with connection.cursor() as cursor:
-            cursor.executemany(insert_sql, df.values.tolist())
\ No newline at end of file
+    def _process_chunk(self, df: pd.DataFrame, table_name: str, byte_offset: Optional[int] = None,
+                       input_rows: Optional[int] = None) -> None:
+        """Process a single chunk of data, committing it together with the checkpoint"""
+        # The chunk and its checkpoint go through the bulk connection in one
+        # transaction. With synchronous_commit off a crash can lose the last
+        # commits, but always both together, so resuming stays exact.
+        alias = bulk_alias()
+        df = self._conform_chunk(df)
+        with self.metrics.stage('load') as stats:
+            with transaction.atomic(using=alias):
+                with bulk_connection().cursor() as cursor:
+                    if self.partitioned or self.staging:
+                        first_id = self.processed_rows + 1
+                        df = df.copy(deep=False)
+                        df.insert(0, 'id', range(first_id, first_id + len(df)))
+                    if self.partitioned:
+                        create_partitions(
+                            cursor, self.schema_name, table_name,
+                            first_id, first_id + len(df) - 1, unlogged=self.staging
+                        )
+                    copy_dataframe(cursor, self.schema_name, table_name, df)
+                if self.checkpoint is not None:
+                    self.checkpoint.rows = self.processed_rows + len(df)
+                    self.checkpoint.byte_offset = byte_offset
+                    self.checkpoint.input_rows = input_rows
+                    self.checkpoint.save(using=alias, update_fields=['rows', 'input_rows', 'byte_offset', 'updated_at'])
+            self.metrics.add(stats, rows=len(df))
\ No newline at end of file
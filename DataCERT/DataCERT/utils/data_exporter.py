@@ -0,0 +1,236 @@
+from django.db import connection
+from django.conf import settings
+from typing import Dict, Iterator, List, Optional
+import logging
+import os
+import threading
+import zlib
+from .database import bulk_connection, copy_to
+
+logger = logging.getLogger(__name__)
+
+# Size of each block read from the COPY pipe and handed to the client
+READ_BLOCK_SIZE = 256 * 1024
+
+# Postgres column types mapped to Arrow type names for Parquet export
+PARQUET_TYPE_MAPPING = {
+    'bigint': 'int64',
+    'integer': 'int32',
+    'smallint': 'int16',
+    'double precision': 'float64',
+    'real': 'float32',
+    'numeric': 'float64',
+    'boolean': 'bool_',
+    'timestamp without time zone': 'timestamp',
+    'timestamp with time zone': 'timestamp',
+    'date': 'date32',
+}
+
+
+class DataExporter:
+    """
+    Streams a validated table out of Postgres using COPY ... TO STDOUT.
+
+    COPY runs in a background thread and writes into an OS pipe, the
+    caller iterates over byte blocks read from the other end. Rows never
+    pass through Python one by one.
+    """
+    FORMATS = {
+        'csv': {'content_type': 'text/csv', 'extension': 'csv'},
+        'csv.gz': {'content_type': 'application/gzip', 'extension': 'csv.gz'},
+        'parquet': {'content_type': 'application/vnd.apache.parquet', 'extension': 'parquet'},
+    }
+
+    def __init__(self, table_name: str, columns: Optional[List[str]] = None, export_format: str = 'csv'):
+        """
+        Initialize the exporter
+
+        Args:
+            table_name: Table name of the uploaded file, see DataFile.table_name
+            columns: Optional list of columns to export, all columns when empty
+            export_format: One of csv, csv.gz or parquet
+        """
+        if export_format not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+
+        self.schema_name = settings.DATABASE_SCHEMAS['VALIDATED']
+        self.table_name = f"validated_{table_name.lower()}"
+        self.export_format = export_format
+        self.table_columns = self._get_columns()
+
+        if not self.table_columns:
+            raise ValueError(f"Validated table {self.table_name} does not exist")
+
+        if columns:
+            unknown = [col for col in columns if col not in self.table_columns]
+            if unknown:
+                raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+            self.columns = columns
+        else:
+            self.columns = list(self.table_columns)
+
+    @property
+    def content_type(self) -> str:
+        return self.FORMATS[self.export_format]['content_type']
+
+    @property
+    def file_name(self) -> str:
+        return f"{self.table_name}.{self.FORMATS[self.export_format]['extension']}"
+
+    def _get_columns(self) -> Dict[str, str]:
+        """Get column names and data types of the validated table"""
+        with connection.cursor() as cursor:
+            cursor.execute("""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = %s
+                AND table_name = %s
+                ORDER BY ordinal_position;
+            """, [self.schema_name, self.table_name])
+            return {row[0]: row[1] for row in cursor.fetchall()}
+
+    def _copy_sql(self) -> str:
+        """Build the COPY statement for the selected columns"""
+        column_list = ', '.join('"{}"'.format(col.replace('"', '""')) for col in self.columns)
+        return (
+            f'COPY (SELECT {column_list} FROM {self.schema_name}."{self.table_name}") '
+            f'TO STDOUT WITH (FORMAT csv, HEADER true)'
+        )
+
+    def _run_copy(self, write_fd: int, errors: List[Exception]) -> None:
+        """Run COPY TO STDOUT into the write end of a pipe"""
+        try:
+            with os.fdopen(write_fd, 'wb', buffering=READ_BLOCK_SIZE) as pipe:
+                with bulk_connection().cursor() as cursor:
+                    copy_to(cursor, self._copy_sql(), pipe)
+        except BrokenPipeError:
+            logger.info(f"Export of {self.table_name} cancelled by the reader")
+        except Exception as e:
+            logger.error(f"Error exporting {self.table_name}: {str(e)}")
+            errors.append(e)
+        finally:
+            # Each thread gets its own database connection
+            bulk_connection().close()
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Stream the table in the configured format
+
+        Yields:
+            Blocks of encoded output
+        """
+        read_fd, write_fd = os.pipe()
+        errors: List[Exception] = []
+        worker = threading.Thread(
+            target=self._run_copy,
+            args=(write_fd, errors),
+            name=f'export-{self.table_name}',
+            daemon=True,
+        )
+        worker.start()
+
+        try:
+            with os.fdopen(read_fd, 'rb', buffering=READ_BLOCK_SIZE) as pipe:
+                if self.export_format == 'parquet':
+                    yield from self._encode_parquet(pipe)
+                elif self.export_format == 'csv.gz':
+                    yield from self._encode_gzip(pipe)
+                else:
+                    yield from iter(lambda: pipe.read(READ_BLOCK_SIZE), b'')
+        except Exception:
+            # The encoder fails on the cut off output of a failed COPY,
+            # the COPY error is the one to report
+            worker.join()
+            if errors:
+                raise errors[0]
+            raise
+
+        worker.join()
+        if errors:
+            raise errors[0]
+
+    def write_to(self, output) -> int:
+        """Write the whole export to a binary file object, returns bytes written"""
+        written = 0
+        for block in self.stream():
+            output.write(block)
+            written += len(block)
+        return written
+
+    def _encode_gzip(self, pipe) -> Iterator[bytes]:
+        """Gzip-compress the CSV stream block by block"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+        for block in iter(lambda: pipe.read(READ_BLOCK_SIZE), b''):
+            compressed = compressor.compress(block)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+    def _encode_parquet(self, pipe) -> Iterator[bytes]:
+        """Convert the CSV stream to Parquet one record batch at a time"""
+        try:
+            import pyarrow as pa
+            import pyarrow.csv as pa_csv
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError('Parquet export requires the pyarrow package')
+
+        column_types = {}
+        for col in self.columns:
+            arrow_type = PARQUET_TYPE_MAPPING.get(self.table_columns[col])
+            if arrow_type == 'timestamp':
+                column_types[col] = pa.timestamp('us')
+            elif arrow_type:
+                column_types[col] = getattr(pa, arrow_type)()
+            else:
+                column_types[col] = pa.string()
+
+        reader = pa_csv.open_csv(
+            pipe,
+            read_options=pa_csv.ReadOptions(block_size=READ_BLOCK_SIZE * 4),
+            convert_options=pa_csv.ConvertOptions(
+                column_types=column_types,
+                true_values=['t'],
+                false_values=['f'],
+                strings_can_be_null=True,
+                quoted_strings_can_be_null=False,
+            ),
+        )
+
+        sink = _BlockSink()
+        writer = pq.ParquetWriter(sink, reader.schema)
+        for batch in reader:
+            writer.write_batch(batch)
+            block = sink.drain()
+            if block:
+                yield block
+        writer.close()
+        yield sink.drain()
+
+
+class _BlockSink:
+    """Write-only file object that hands written bytes back on drain()"""
+    def __init__(self):
+        self._blocks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._blocks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._blocks)
+        self._blocks = []
+        return data
@@ -1,8 +1,12 @@
-from django.db import connection
+from django.db import transaction
 from django.conf import settings
 from typing import List, Dict, Any
 import logging
 from ..models import DataFile, ValidationReport
+from .instrumentation import PipelineMetrics
+from .database import bulk_alias, bulk_connection, execute_pipelined, table_lock
+from .ingest import check_raw_table
+from .partitions import get_partitions, is_partitioned, move_partitions
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +16,7 @@ class DataMover:
         self.validation_report = validation_report
         self.source_schema = settings.DATABASE_SCHEMAS['RAW']
         self.target_schema = settings.DATABASE_SCHEMAS['VALIDATED']
+        self.metrics = PipelineMetrics('move')
         
     def move_validated_data(self) -> Dict[str, Any]:
         """
@@ -25,46 +30,20 @@ class DataMover:
             
         try:
             # Get table names
-            table_name = f"raw_{self.data_file.file_name.split('.')[0].lower()}"
-            validated_table_name = f"validated_{self.data_file.file_name.split('.')[0].lower()}"
-            
-            with connection.cursor() as cursor:
-                # Drop the validated table if it exists
-                cursor.execute(f"""
-                    DROP TABLE IF EXISTS {self.target_schema}."{validated_table_name}" CASCADE;
-                """)
-                
-                # Create the table in validated schema
-                cursor.execute(f"""
-                    CREATE TABLE {self.target_schema}."{validated_table_name}" (
-                        LIKE {self.source_schema}."{table_name}" INCLUDING ALL
-                    );
-                """)
-                
-                # Create a new sequence for the validated table
-                cursor.execute(f"""
-                    CREATE SEQUENCE IF NOT EXISTS {self.target_schema}."{validated_table_name}_id_seq";
-                """)
-                
-                # Set the sequence as the default for the id column
-                cursor.execute(f"""
-                    ALTER TABLE {self.target_schema}."{validated_table_name}"
-                    ALTER COLUMN id SET DEFAULT nextval('{self.target_schema}.{validated_table_name}_id_seq');
-                """)
-                
-                # Move the data with a fresh ID sequence
-                cursor.execute(f"""
-                    INSERT INTO {self.target_schema}."{validated_table_name}" 
-                    (SELECT (ROW_NUMBER() OVER ())::integer as id, 
-                            {', '.join(f'"{col}"' for col in self._get_columns(table_name) if col != 'id')}
-                     FROM {self.source_schema}."{table_name}");
-                """)
-                
-                # Get the number of rows moved
-                cursor.execute(f"""
-                    SELECT COUNT(*) FROM {self.target_schema}."{validated_table_name}";
-                """)
-                rows_moved = cursor.fetchone()[0]
+            table_name = self.data_file.raw_table
+            validated_table_name = self.data_file.validated_table
+
+            # No load of a file with the same name may replace the raw table
+            # while it moves, and one emptied by a crash must not be promoted
+            with table_lock(self.source_schema, table_name), self.metrics.stage('move') as stats:
+                check_raw_table(self.data_file)
+                with bulk_connection().cursor() as cursor:
+                    partitioned = is_partitioned(cursor, self.source_schema, table_name)
+                if partitioned:
+                    rows_moved = self._move_partitions(table_name, validated_table_name)
+                else:
+                    rows_moved = self._copy_rows(table_name, validated_table_name)
+                self.metrics.add(stats, rows=rows_moved)
                 
             return {
                 'success': True,
@@ -80,9 +59,76 @@ class DataMover:
                 'error': str(e)
             }
     
+    def _copy_rows(self, table_name: str, validated_table_name: str) -> int:
+        """Copy a plain raw table into a new validated table"""
+        columns = ', '.join(f'"{col}"' for col in self._get_columns(table_name) if col != 'id')
+        with transaction.atomic(using=bulk_alias()):
+            with bulk_connection().cursor() as cursor:
+                # Replace the validated table, the DDL goes out in one round trip.
+                # Promoted data must survive a crash, so this commit waits for the WAL.
+                execute_pipelined(cursor, [
+                    'SET LOCAL synchronous_commit = on',
+                    f'DROP TABLE IF EXISTS {self.target_schema}."{validated_table_name}" CASCADE',
+                    f"""
+                    CREATE TABLE {self.target_schema}."{validated_table_name}" (
+                        LIKE {self.source_schema}."{table_name}" INCLUDING ALL
+                    )
+                    """,
+                    # A new sequence as the default for the id column
+                    f'CREATE SEQUENCE IF NOT EXISTS {self.target_schema}."{validated_table_name}_id_seq"',
+                    f"""
+                    ALTER TABLE {self.target_schema}."{validated_table_name}"
+                    ALTER COLUMN id SET DEFAULT nextval('{self.target_schema}.{validated_table_name}_id_seq')
+                    """,
+                ])
+
+                # Move the data with a fresh ID sequence
+                cursor.execute(f"""
+                    INSERT INTO {self.target_schema}."{validated_table_name}" 
+                    (SELECT (ROW_NUMBER() OVER ())::integer as id, {columns}
+                     FROM {self.source_schema}."{table_name}");
+                """)
+                return cursor.rowcount
+
+    def _move_partitions(self, table_name: str, validated_table_name: str) -> int:
+        """
+        Promote a partitioned raw table by re-attaching its partitions
+
+        Ids were assigned in file order at ingest, so they already match
+        the numbering a copy would produce.
+
+        Raises:
+            ValueError: The partitions were already moved, the validated
+                table is left as it is
+        """
+        with transaction.atomic(using=bulk_alias()):
+            with bulk_connection().cursor() as cursor:
+                if not get_partitions(cursor, self.source_schema, table_name):
+                    raise ValueError(
+                        f"{table_name} has no partitions left, its rows were already moved to "
+                        f"{self.target_schema}.{validated_table_name}"
+                    )
+                execute_pipelined(cursor, [
+                    'SET LOCAL synchronous_commit = on',
+                    f'DROP TABLE IF EXISTS {self.target_schema}."{validated_table_name}" CASCADE',
+                    f"""
+                    CREATE TABLE {self.target_schema}."{validated_table_name}" (
+                        LIKE {self.source_schema}."{table_name}" INCLUDING ALL
+                    ) PARTITION BY RANGE (id)
+                    """,
+                ])
+                move_partitions(
+                    cursor, self.source_schema, table_name,
+                    self.target_schema, validated_table_name
+                )
+                cursor.execute(f"""
+                    SELECT COUNT(*) FROM {self.target_schema}."{validated_table_name}";
+                """)
+                return cursor.fetchone()[0]
+
     def _get_columns(self, table_name: str) -> List[str]:
         """Get column names for a table"""
-        with connection.cursor() as cursor:
+        with bulk_connection().cursor() as cursor:
             cursor.execute(f"""
                 SELECT column_name 
                 FROM information_schema.columns 
@@ -97,13 +143,14 @@ class DataMover:
         Cleanup data from raw schema after successful move
         """
         try:
-            table_name = f"raw_{self.data_file.file_name.split('.')[0].lower()}"
+            table_name = self.data_file.raw_table
             
-            with connection.cursor() as cursor:
-                # Drop the table and its dependent objects
-                cursor.execute(f"""
-                    DROP TABLE IF EXISTS {self.source_schema}."{table_name}" CASCADE;
-                """)
+            with self.metrics.stage('cleanup'):
+                with bulk_connection().cursor() as cursor:
+                    # Drop the table and its dependent objects
+                    cursor.execute(f"""
+                        DROP TABLE IF EXISTS {self.source_schema}."{table_name}" CASCADE;
+                    """)
                 
             return {
                 'success': True,
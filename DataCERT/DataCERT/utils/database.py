@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from contextlib import contextmanager
+from functools import partial, reduce
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterator, List
+import csv
+import io
+
+from .chunking import AdaptiveChunker
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Alias of the connection used for COPY, raw/validated DDL and table scans,
+# see DATABASES in settings
+BULK_DB_ALIAS = 'bulk'
+
+# Size of the blocks handed to COPY FROM STDIN
+COPY_BLOCK_SIZE = 1024 * 1024
+
+# NULL marker written for missing values, keeps '' distinct from NULL
+COPY_NULL = '\\N'
+
+
+def bulk_alias() -> str:
+    """The bulk load alias, or the default one when it is not configured"""
+    return BULK_DB_ALIAS if BULK_DB_ALIAS in settings.DATABASES else DEFAULT_DB_ALIAS
+
+
+def bulk_connection():
+    """Connection tuned for bulk work, never the one used by the ORM"""
+    return connections[bulk_alias()]
+
+
+def _run_copy(cursor, sql: str, run: Callable[[], None]) -> None:
+    """
+    Run a COPY on the raw cursor through the connection's execute wrappers
+
+    COPY bypasses cursor.execute(), this keeps it visible to wrappers such
+    as the request profiler's query recorder. The wrappers are applied
+    like Django applies them to execute(), the first one outermost.
+    """
+    executor = reduce(
+        lambda inner, wrapper: partial(wrapper, inner),
+        reversed(cursor.db.execute_wrappers),
+        lambda *args: run(),
+    )
+    executor(sql, None, False, {'connection': cursor.db, 'cursor': cursor})
+
+
+def copy_from(cursor, sql: str, source: BinaryIO) -> None:
+    """Run COPY ... FROM STDIN with psycopg2 or psycopg 3"""
+    raw = cursor.cursor
+
+    def run():
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, source, size=COPY_BLOCK_SIZE)
+            return
+        with raw.copy(sql) as copy:
+            for block in iter(lambda: source.read(COPY_BLOCK_SIZE), b''):
+                copy.write(block)
+
+    _run_copy(cursor, sql, run)
+
+
+def copy_to(cursor, sql: str, target: BinaryIO) -> None:
+    """Run COPY ... TO STDOUT with psycopg2 or psycopg 3"""
+    raw = cursor.cursor
+
+    def run():
+        if hasattr(raw, 'copy_expert'):
+            raw.copy_expert(sql, target)
+            return
+        with raw.copy(sql) as copy:
+            for block in copy:
+                target.write(block)
+
+    _run_copy(cursor, sql, run)
+
+
+def copy_dataframe(cursor, schema_name: str, table_name: str, df: 'pd.DataFrame') -> None:
+    """Append a DataFrame to a table with a single COPY"""
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False, na_rep=COPY_NULL, quoting=csv.QUOTE_MINIMAL)
+    data = io.BytesIO(buffer.getvalue().encode('utf-8'))
+
+    columns = ', '.join('"{}"'.format(str(col).replace('"', '""')) for col in df.columns)
+    copy_from(cursor, (
+        f'COPY {schema_name}."{table_name}" ({columns}) '
+        f"FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}', ENCODING 'UTF8')"
+    ), data)
+
+
+def is_unlogged(cursor, schema_name: str, table_name: str) -> bool:
+    """Whether a table or one of its partitions is UNLOGGED, their rows do not survive a crash"""
+    if cursor.db.vendor != 'postgresql':
+        return False
+    name = f'{schema_name}."{table_name}"'
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_class
+            WHERE relpersistence = 'u'
+            AND (oid = to_regclass(%s)
+                 OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s)))
+        );
+    """, [name, name])
+    return cursor.fetchone()[0]
+
+
+@contextmanager
+def table_lock(schema_name: str, table_name: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock named after a table on the bulk connection
+
+    Loads take it exclusively and validations shared, so two uploads of
+    files with the same name, e.g. from overlapping batches, never drop
+    each other's raw table part way. The lock belongs to the session and
+    goes away with it if the process dies.
+
+    Raises:
+        ValueError: Another session holds the lock
+    """
+    connection = bulk_connection()
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    key = f'{schema_name}.{table_name}'
+    mode = '_shared' if shared else ''
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT pg_try_advisory_lock{mode}(hashtext(%s));', [key])
+        if not cursor.fetchone()[0]:
+            raise ValueError(f"{table_name} is being loaded or validated for another file, try again once it is done")
+    try:
+        yield
+    finally:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT pg_advisory_unlock{mode}(hashtext(%s));', [key])
+        except DatabaseError:
+            # A broken session has released its locks already
+            pass
+
+
+def execute_pipelined(cursor, statements: List[str]) -> None:
+    """
+    Send a batch of statements without waiting for each result
+
+    psycopg 3 uses pipeline mode. psycopg2 has no pipeline, the batch is
+    sent as one multi-statement query instead, which also takes a single
+    round trip. Statements must not take parameters.
+    """
+    if not statements:
+        return
+    raw_connection = cursor.cursor.connection
+    if hasattr(raw_connection, 'pipeline'):
+        with raw_connection.pipeline():
+            for statement in statements:
+                cursor.execute(statement)
+    else:
+        cursor.execute(';\n'.join(statement.strip().rstrip(';') for statement in statements))
+
+
+def read_chunks(connection, query: str, chunker: AdaptiveChunker) -> Iterator['pd.DataFrame']:
+    """
+    Stream the rows of a query as DataFrames sized by a chunker
+
+    Rows are fetched from a server-side cursor, so only the chunk being
+    built is held in memory, unlike pd.read_sql which fetches the whole
+    result first on psycopg2. The cursor is read inside a transaction,
+    outside one Postgres would materialize the whole result up front.
+    """
+    import pandas as pd
+
+    with transaction.atomic(using=connection.alias), connection.chunked_cursor() as cursor:
+        cursor.execute(query)
+        columns = None
+        while True:
+            rows = cursor.fetchmany(chunker.rows)
+            if not rows:
+                return
+            # Named cursors only describe their columns after a fetch
+            if columns is None:
+                columns = [column[0] for column in cursor.description]
+            chunk = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            del rows
+            chunker.observe(chunk)
+            yield chunk
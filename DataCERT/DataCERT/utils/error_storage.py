@@ -0,0 +1,142 @@
+from django.db import connection
+from django.db.models.signals import pre_delete
+from django.dispatch import receiver
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import List, Tuple
+import gzip
+import logging
+import os
+import re
+
+from ..models import ValidationError, ValidationReport
+from .database import copy_to
+
+logger = logging.getLogger(__name__)
+
+# Parent table of the error partitions
+ERROR_TABLE = ValidationError._meta.db_table
+
+# Month partitions are named <ERROR_TABLE>_pYYYY_MM
+PARTITION_NAME = re.compile(rf'^{re.escape(ERROR_TABLE)}_p(\d{{4}})_(\d{{2}})$')
+
+
+def is_partitioned() -> bool:
+    """Whether the error table is range partitioned by month, Postgres only"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);', [f'"{ERROR_TABLE}"'])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def month_bounds(moment: datetime) -> Tuple[datetime, datetime]:
+    """First instant of the UTC month holding a moment and of the month after"""
+    start = moment.astimezone(dt_timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def partition_name(moment: datetime) -> str:
+    return f"{ERROR_TABLE}_p{month_bounds(moment)[0]:%Y_%m}"
+
+
+def create_partition(moment: datetime) -> None:
+    """
+    Create the partition for the month of a validation date, if missing
+
+    Partitions cover a month of reports, so the parent is locked to attach
+    one about once a month rather than for every report.
+    """
+    if not is_partitioned():
+        return
+    start, end = month_bounds(moment)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TABLE IF NOT EXISTS "{partition_name(moment)}" PARTITION OF "{ERROR_TABLE}" '
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}');"
+        )
+
+
+def get_partitions() -> List[Tuple[str, datetime, datetime]]:
+    """Month partitions of the error table as (name, start, end), oldest first"""
+    if not is_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s);
+        """, [f'"{ERROR_TABLE}"'])
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            start, end = month_bounds(datetime(int(match[1]), int(match[2]), 1, tzinfo=dt_timezone.utc))
+            partitions.append((name, start, end))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def archive_errors(report_id: int, path: str) -> int:
+    """
+    Write a report's errors to a gzip-compressed CSV file with COPY
+
+    Returns:
+        Compressed size of the archive in bytes
+    """
+    query = (
+        f'SELECT row_number, column_name, error_message, raw_data FROM "{ERROR_TABLE}" '
+        f'WHERE report_id = {int(report_id)} ORDER BY row_number'
+    )
+    with gzip.open(path, 'wb') as target:
+        with connection.cursor() as cursor:
+            copy_to(cursor, f'COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)', target)
+    return os.path.getsize(path)
+
+
+def drop_errors(report_id: int) -> int:
+    """
+    Delete every error of one report
+
+    Each month partition is probed through its (report, row_number) index.
+
+    Returns:
+        Number of rows deleted
+    """
+    deleted, _ = ValidationError.objects.filter(report_id=report_id).delete()
+    return deleted
+
+
+def drop_partitions_before(cutoff: datetime, concurrently: bool = False) -> List[str]:
+    """
+    Detach and drop the month partitions that end before a cutoff
+
+    Their errors all belong to reports validated before the cutoff, so
+    whole months are removed without touching rows.
+
+    Args:
+        concurrently: Detach without blocking queries on other months,
+            only possible outside a transaction
+
+    Returns:
+        Names of the dropped partitions
+    """
+    dropped = []
+    mode = ' CONCURRENTLY' if concurrently else ''
+    for name, _, end in get_partitions():
+        if end > cutoff:
+            break
+        with connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE "{ERROR_TABLE}" DETACH PARTITION "{name}"{mode};')
+            cursor.execute(f'DROP TABLE "{name}";')
+        logger.info(f"Dropped error partition {name}")
+        dropped.append(name)
+    return dropped
+
+
+@receiver(pre_delete, sender=ValidationReport)
+def _drop_report_errors(sender, instance: ValidationReport, **kwargs) -> None:
+    # ValidationError.report does not cascade, a deleted report takes its
+    # errors with it
+    drop_errors(instance.id)
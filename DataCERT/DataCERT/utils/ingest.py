@@ -0,0 +1,119 @@
+from django.conf import settings
+from typing import Any, Dict, Optional
+from ..models import DataFile, IngestCheckpoint, ValidationReport
+from .database import bulk_connection, is_unlogged, table_lock
+from .progress import ProgressReporter
+from .validators.base import BaseValidator
+
+
+def ingest_file(data_file: DataFile, file_path: str, progress: Optional[ProgressReporter] = None) -> Dict[str, Any]:
+    """Load a stored upload into the raw schema, resuming from its checkpoint"""
+    # pandas, numpy and chardet are only loaded once a file is ingested
+    from .csv_processor import CSVProcessor
+
+    processor = CSVProcessor(file_path, data_file=data_file, progress=progress)
+    try:
+        with table_lock(processor.schema_name, data_file.raw_table):
+            result = processor.process_file()
+    except ValueError as e:
+        result = {'success': False, 'error': str(e)}
+        if progress is not None:
+            progress.finish(False, str(e))
+    processor.metrics.save(data_file, result['success'])
+
+    if result['success']:
+        data_file.status = 'uploaded'
+        data_file.row_count = result['processed_rows']
+        data_file.profile = result['profile']
+        data_file.error_message = ''
+    else:
+        data_file.status = 'failed'
+        data_file.error_message = result.get('error', '')
+    data_file.save()
+    return result
+
+
+def check_raw_table(data_file: DataFile) -> None:
+    """
+    Fail when the raw table holds fewer rows than were loaded
+
+    Staging loads leave the raw table UNLOGGED until it is promoted, and a
+    database crash in between empties it while the file still looks
+    loaded. Only unlogged tables are counted, logged ones keep their rows.
+    A short table marks the file failed with its checkpoint reopened, so
+    the upload page offers to load it again.
+
+    Raises:
+        ValueError: The raw table lost rows
+    """
+    schema_name = settings.DATABASE_SCHEMAS['RAW']
+    table_name = data_file.raw_table
+    with bulk_connection().cursor() as cursor:
+        if not is_unlogged(cursor, schema_name, table_name):
+            return
+        cursor.execute(f'SELECT COUNT(*) FROM {schema_name}."{table_name}";')
+        rows = cursor.fetchone()[0]
+    if rows >= (data_file.row_count or 0):
+        return
+
+    IngestCheckpoint.objects.filter(data_file=data_file).update(completed=False)
+    data_file.status = 'failed'
+    data_file.error_message = (
+        f"{table_name} holds {rows} of the {data_file.row_count} rows loaded, a database "
+        f"restart emptied the unlogged table before it was promoted. Load the file again."
+    )
+    data_file.save()
+    raise ValueError(data_file.error_message)
+
+
+def validate_file(validator: BaseValidator, preview: bool = False) -> ValidationReport:
+    """
+    Run a validator over its file's raw table and store the report
+
+    Args:
+        validator: Validator with its sampling, abort and progress options set
+        preview: A preview leaves the file ready for a full run
+
+    Returns:
+        The saved validation report
+
+    Raises:
+        ValueError: The raw table lost rows, see check_raw_table, or
+            another file with the same name is being loaded
+    """
+    data_file = validator.data_file
+    # Keeps loads of another file with the same name out of the raw table
+    with table_lock(settings.DATABASE_SCHEMAS['RAW'], data_file.raw_table, shared=True):
+        check_raw_table(data_file)
+        return _validate(validator, preview)
+
+
+def _validate(validator: BaseValidator, preview: bool) -> ValidationReport:
+    data_file = validator.data_file
+    data_file.status = 'validating'
+    data_file.save()
+
+    with validator.metrics.stage('validate') as stats:
+        validator.ensure_indexes()
+        validation_passed = validator.validate()
+        validator.metrics.add(stats, rows=validator.processed_rows)
+
+    if validator.unique_keys or validator.foreign_keys:
+        with validator.metrics.stage('check_keys'):
+            if validator.progress is not None:
+                validator.progress.update(stage='check_keys')
+            validation_passed = validator.check_keys() and validation_passed
+
+    if validator.progress is not None:
+        validator.progress.update(stage='save_errors', errors=len(validator.errors))
+    report = validator.save_validation_results()
+    validator.metrics.save(data_file, validation_passed)
+    if validator.progress is not None:
+        validator.progress.finish(True, report.summary)
+
+    if preview:
+        data_file.status = 'uploaded'
+    else:
+        data_file.status = 'validated' if validation_passed else 'failed'
+    data_file.save()
+    return report
@@ -0,0 +1,162 @@
+from contextlib import contextmanager
+from django.db import transaction
+from django.utils import timezone
+from typing import Dict, Any, Iterator, Optional
+from ..models import PipelineRun, StageMetric
+import logging
+import mmap
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds between the resident set size samples taken while stages run
+RSS_SAMPLE_INTERVAL = 0.05
+
+
+def get_rss() -> Optional[int]:
+    """Current resident set size of this process in bytes, None if unknown"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):  # No procfs outside Linux
+        return None
+
+
+class RSSSampler:
+    """
+    Samples the resident set size on a daemon thread while it is watched
+
+    Each watch() keeps the highest sample seen until it ends, sampled on
+    entry, every RSS_SAMPLE_INTERVAL seconds and on exit. The thread is
+    started on the first watch and idles while nothing is watched. The
+    size is that of the whole process, concurrent pipelines see each
+    other's memory.
+    """
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._watched = threading.Event()
+        # Peaks of the running watches by id, equal dicts are not the same watch
+        self._peaks: Dict[int, Dict[str, int]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def watch(self) -> Iterator[Dict[str, int]]:
+        """
+        Watch the resident set size
+
+        Yields:
+            Dict whose 'rss' is the peak so far, empty when the size
+            cannot be read
+        """
+        peak: Dict[str, int] = {}
+        self._record(peak, get_rss())
+        if 'rss' not in peak:
+            yield peak
+            return
+        with self._lock:
+            self._peaks[id(peak)] = peak
+            self._watched.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+                self._thread.start()
+        try:
+            yield peak
+        finally:
+            with self._lock:
+                del self._peaks[id(peak)]
+                if not self._peaks:
+                    self._watched.clear()
+            self._record(peak, get_rss())
+
+    @staticmethod
+    def _record(peak: Dict[str, int], rss: Optional[int]) -> None:
+        if rss is not None:
+            peak['rss'] = max(peak.get('rss', 0), rss)
+
+    def _run(self) -> None:
+        while True:
+            self._watched.wait()
+            rss = get_rss()
+            with self._lock:
+                for peak in self._peaks.values():
+                    self._record(peak, rss)
+            time.sleep(self.interval)
+
+
+# Shared by all pipelines of the process, one thread samples for every stage
+rss_sampler = RSSSampler()
+
+
+class PipelineMetrics:
+    """
+    Collects per-stage timings for one pipeline run.
+
+    Stages are timed with the stage() context manager. Entering the same
+    stage several times (e.g. once per chunk) accumulates into one entry.
+    CPU time is that of the calling thread, so concurrent pipelines (batch
+    workers) do not add to each other's. peak_rss is the highest resident
+    set size sampled while the stage ran, see RSSSampler, ru_maxrss would
+    only ever report the peak of the whole process lifetime.
+    Nothing touches the database until save() is called.
+    """
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.started_at = timezone.now()
+        self.stages: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """
+        Time a stage
+
+        Yields:
+            Dict where the caller may add to 'rows' and 'bytes'
+        """
+        stats = self.stages.setdefault(name, {
+            'wall_time': 0.0,
+            'cpu_time': 0.0,
+            'rows': None,
+            'bytes': None,
+            'peak_rss': None,
+        })
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        with rss_sampler.watch() as peak:
+            try:
+                yield stats
+            finally:
+                stats['wall_time'] += time.perf_counter() - wall_start
+                stats['cpu_time'] += time.thread_time() - cpu_start
+        if 'rss' in peak:
+            stats['peak_rss'] = max(stats['peak_rss'] or 0, peak['rss'])
+
+    @staticmethod
+    def add(stats: Dict[str, Any], rows: int = 0, bytes: int = 0) -> None:
+        """Add row and byte counts to a stage's stats"""
+        if rows:
+            stats['rows'] = (stats['rows'] or 0) + rows
+        if bytes:
+            stats['bytes'] = (stats['bytes'] or 0) + bytes
+
+    def save(self, data_file, success: bool) -> Optional[PipelineRun]:
+        """Persist the collected stages as a PipelineRun with StageMetric rows"""
+        try:
+            with transaction.atomic():
+                run = PipelineRun.objects.create(
+                    data_file=data_file,
+                    kind=self.kind,
+                    started_at=self.started_at,
+                    finished_at=timezone.now(),
+                    success=success,
+                )
+                StageMetric.objects.bulk_create([
+                    StageMetric(run=run, stage=name, position=position, **stats)
+                    for position, (name, stats) in enumerate(self.stages.items())
+                ])
+            return run
+        except Exception as e:
+            # Metrics must never break the pipeline itself
+            logger.error(f"Error saving pipeline metrics: {str(e)}")
+            return None
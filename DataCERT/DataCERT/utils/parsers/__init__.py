@@ -0,0 +1,34 @@
+from django.conf import settings
+
+from ..compression import source_size
+from .base import BaseParser, Dialect, RowReader
+from .arrow_parser import ArrowParser
+from .pandas_parser import PandasParser
+from .stream_parser import StreamParser
+
+PARSERS = {parser.name: parser for parser in (PandasParser, ArrowParser, StreamParser)}
+
+
+def choose_parser(file_path: str, dialect: Dialect) -> str:
+    """
+    Pick a backend from the file size and dialect
+
+    - dialects the C engines cannot handle go to the streaming csv backend
+    - large files go to PyArrow when it is installed
+    - everything else uses the pandas C engine
+    """
+    if not dialect.is_simple:
+        return StreamParser.name
+    if ArrowParser.is_available() and source_size(file_path) >= settings.DATACERT_ARROW_MIN_BYTES:
+        return ArrowParser.name
+    return PandasParser.name
+
+
+def get_parser(file_path: str, dialect: Dialect, encoding: str, chunk_size: int, **kwargs) -> BaseParser:
+    """Create the parser configured by DATACERT_CSV_PARSER, 'auto' chooses per file"""
+    name = settings.DATACERT_CSV_PARSER
+    if name == 'auto':
+        name = choose_parser(file_path, dialect)
+    if name not in PARSERS:
+        raise ValueError(f"Unknown CSV parser backend: {name}")
+    return PARSERS[name](file_path, dialect, encoding, chunk_size, **kwargs)
@@ -0,0 +1,88 @@
+from typing import Iterator
+import pandas as pd
+from .base import BaseParser
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = None
+
+
+class ArrowParser(BaseParser):
+    """
+    PyArrow multithreaded CSV reader, used for large files when pyarrow is installed
+
+    Column types are inferred from the first block and fixed for the rest
+    of the file. Dates and timestamps are kept as text to match the other
+    backends. Invalid rows are counted when a whole block is parsed, before
+    its rows are sliced into chunks, and Arrow does not always know their
+    line numbers, so bad_lines runs ahead of the chunks yielded.
+    """
+    name = 'arrow'
+    exact_bad_lines = False
+
+    # Bytes handed to each parsing thread
+    block_size = 16 * 1024 * 1024
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return pa is not None
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        if pa is None:
+            raise ValueError('The arrow parser requires the pyarrow package')
+
+        with self._open() as source:
+            yield from self._iter_source(source)
+
+    def _iter_source(self, source) -> Iterator[pd.DataFrame]:
+        reader = pa_csv.open_csv(
+            source,
+            read_options=pa_csv.ReadOptions(
+                use_threads=True,
+                block_size=self.block_size,
+                encoding=self.encoding
+            ),
+            parse_options=pa_csv.ParseOptions(
+                delimiter=self.dialect.delimiter,
+                quote_char=self.dialect.quotechar,
+                invalid_row_handler=self._skip_invalid_row
+            ),
+            convert_options=pa_csv.ConvertOptions(
+                strings_can_be_null=True
+            )
+        )
+
+        # Re-slice Arrow's block-sized batches into chunk_size rows
+        pending = []
+        pending_rows = 0
+        for batch in reader:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows < self.chunk_size:
+                continue
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            offset = 0
+            # The size can change while a chunk is out
+            size = self.chunk_size
+            while pending_rows - offset >= size:
+                yield self._to_frame(table.slice(offset, size))
+                offset += size
+                size = self.chunk_size
+            pending = table.slice(offset).to_batches()
+            pending_rows -= offset
+
+        if pending_rows:
+            yield self._to_frame(pa.Table.from_batches(pending, schema=reader.schema))
+
+    def _skip_invalid_row(self, row) -> str:
+        self.bad_lines += 1
+        return 'skip'
+
+    def _to_frame(self, table) -> pd.DataFrame:
+        """Convert an Arrow table to a DataFrame with the shared dtypes"""
+        for index, field in enumerate(table.schema):
+            if pa.types.is_temporal(field.type):
+                table = table.set_column(index, field.name, table.column(index).cast(pa.string()))
+        return table.to_pandas()
@@ -0,0 +1,174 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+import csv
+import pandas as pd
+from ..chunking import AdaptiveChunker
+from ..compression import open_source, resume_stream
+
+
+@dataclass
+class Dialect:
+    """CSV dialect detected from a sample of the file"""
+    delimiter: str = ';'
+    quotechar: str = '"'
+    doublequote: bool = True
+    escapechar: str = None
+
+    @property
+    def is_simple(self) -> bool:
+        """True when every backend can parse this dialect"""
+        return (
+            len(self.delimiter) == 1
+            and self.quotechar == '"'
+            and self.doublequote
+            and self.escapechar is None
+        )
+
+    @classmethod
+    def sniff(cls, sample: str) -> 'Dialect':
+        """Detect the dialect of a decoded sample, falls back to semicolons"""
+        try:
+            sniffed = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+        except csv.Error:
+            return cls()
+        quotechar = sniffed.quotechar or '"'
+        return cls(
+            delimiter=sniffed.delimiter,
+            quotechar=quotechar,
+            # The sniffer reports False when the sample has no quotes at all
+            doublequote=sniffed.doublequote or quotechar not in sample,
+            escapechar=sniffed.escapechar,
+        )
+
+
+class RowReader:
+    """
+    Splits a CSV byte stream into rows without parsing their fields
+
+    A row ends at a line break outside quotes, so quoted fields holding
+    line breaks stay in their row. A line with an odd number of quote
+    characters opens or closes a quoted field, doubled and escaped quotes
+    leave it as it is. The delimiter, quote and escape characters must be
+    ASCII and the encoding ASCII compatible, as for the parsers.
+    """
+    def __init__(self, stream: BinaryIO, dialect: Dialect):
+        self.stream = stream
+        self.quote = dialect.quotechar.encode('ascii') if dialect.quotechar else None
+        self.escapes = []
+        if self.quote is not None and dialect.escapechar:
+            escape = dialect.escapechar.encode('ascii')
+            self.escapes = [escape + escape, escape + self.quote]
+
+    def _opens_quote(self, line: bytes) -> bool:
+        for escaped in self.escapes:
+            line = line.replace(escaped, b'')
+        return line.count(self.quote) % 2 == 1
+
+    def _rest_of_row(self, line: bytes) -> Iterator[bytes]:
+        """Lines continuing the row that starts with line"""
+        if self.quote is None or not self._opens_quote(line):
+            return
+        while True:
+            line = self.stream.readline()
+            if not line:
+                return
+            yield line
+            if self._opens_quote(line):
+                return
+
+    def read(self) -> bytes:
+        """Bytes of the next row with its line break, b'' at the end of the stream"""
+        line = self.stream.readline()
+        return b''.join([line, *self._rest_of_row(line)])
+
+    def skip(self, rows: int) -> int:
+        """
+        Move past rows non-blank rows, blank lines between rows do not count
+
+        Returns:
+            Rows passed, fewer at the end of the stream
+        """
+        passed = 0
+        while passed < rows:
+            line = self.stream.readline()
+            if not line:
+                break
+            for _ in self._rest_of_row(line):
+                pass
+            if line.strip():
+                passed += 1
+        return passed
+
+
+class BaseParser(ABC):
+    """
+    Abstract base class for all CSV parser backends
+
+    Every backend yields pandas DataFrames of at most chunk_size rows with
+    the same dtypes for the same input: int64, float64, bool, or object for
+    text, dates and anything else. Missing values are NaN/None.
+
+    To resume an interrupted load, start_offset (uncompressed files) or
+    skip_rows (any file) make parsing start after the rows already read.
+    skip_rows counts rows, loaded or malformed, blank lines aside.
+    Malformed rows that are dropped are counted in bad_lines. Backends with
+    exact_bad_lines False may count them ahead of the chunks yielded so far,
+    their count cannot be used to locate row boundaries in the file.
+
+    With a chunker, chunk_size follows it and may change between chunks.
+    """
+    name = None
+    exact_bad_lines = True
+
+    def __init__(self, file_path: str, dialect: Dialect, encoding: str, chunk_size: int,
+                 start_offset: Optional[int] = None, skip_rows: int = 0,
+                 chunker: Optional[AdaptiveChunker] = None):
+        self.file_path = file_path
+        self.dialect = dialect
+        self.encoding = encoding
+        self._chunk_size = chunk_size
+        self.chunker = chunker
+        self.start_offset = start_offset
+        self.skip_rows = skip_rows
+        self.bad_lines = 0
+        self._stream: Optional[BinaryIO] = None
+        self._bytes_read: Optional[int] = None
+
+    def _open(self) -> BinaryIO:
+        """Open the file as a binary stream, decompressing it if needed"""
+        self._stream = open_source(self.file_path, self.start_offset)
+        if self.skip_rows:
+            # Skipped here rather than by each backend, which count blank
+            # and malformed lines differently
+            rows = RowReader(self._stream, self.dialect)
+            header = rows.read()
+            rows.skip(self.skip_rows)
+            self._stream = resume_stream(self._stream, header)
+        return self._stream
+
+    @property
+    def chunk_size(self) -> int:
+        """Rows of the next chunk"""
+        if self.chunker is not None:
+            return self.chunker.rows
+        return self._chunk_size
+
+    @property
+    def bytes_read(self) -> Optional[int]:
+        """Uncompressed bytes consumed so far, including read-ahead"""
+        if self._stream is not None:
+            try:
+                self._bytes_read = self._stream.tell()
+            except (OSError, ValueError):
+                # Closed at the end of the file
+                pass
+        return self._bytes_read
+
+    @abstractmethod
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        Implement parsing here
+        Yields: DataFrames of at most chunk_size rows
+        """
+        pass
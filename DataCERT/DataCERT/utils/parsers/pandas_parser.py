@@ -0,0 +1,48 @@
+from typing import Iterator
+import logging
+import re
+import warnings
+import pandas as pd
+from pandas.errors import ParserWarning
+from .base import BaseParser
+
+logger = logging.getLogger(__name__)
+
+
+class PandasParser(BaseParser):
+    """
+    pandas C engine, the default for small and medium files
+    """
+    name = 'pandas'
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        with self._open() as source:
+            reader = pd.read_csv(
+                source,
+                chunksize=self.chunk_size,
+                low_memory=False,
+                on_bad_lines='warn',
+                sep=self.dialect.delimiter,
+                quotechar=self.dialect.quotechar,
+                encoding=self.encoding,
+                encoding_errors='replace',
+                engine='c'
+            )
+            while True:
+                # Count the malformed lines the C engine skips, it only
+                # reports them as warnings
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always', ParserWarning)
+                    try:
+                        chunk = reader.get_chunk(self.chunk_size)
+                    except StopIteration:
+                        chunk = None
+                for warning in caught:
+                    message = str(warning.message)
+                    skipped = len(re.findall(r'Skipping line', message))
+                    if skipped:
+                        self.bad_lines += skipped
+                        logger.warning(message.strip())
+                if chunk is None:
+                    break
+                yield chunk
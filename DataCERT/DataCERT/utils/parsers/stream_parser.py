@@ -0,0 +1,55 @@
+from typing import Iterator, List
+import csv
+import io
+import pandas as pd
+from .base import BaseParser
+
+
+class StreamParser(BaseParser):
+    """
+    Pure Python csv module reader
+
+    Handles dialects the C engines cannot (escape characters, unusual
+    quoting) with memory bounded by one chunk.
+    """
+    name = 'stream'
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        with io.TextIOWrapper(self._open(), encoding=self.encoding, errors='replace', newline='') as file:
+            reader = csv.reader(
+                file,
+                delimiter=self.dialect.delimiter,
+                quotechar=self.dialect.quotechar,
+                doublequote=self.dialect.doublequote,
+                escapechar=self.dialect.escapechar
+            )
+            header = next(reader)
+            rows: List[List[str]] = []
+            for row in reader:
+                if not row:
+                    continue
+                if len(row) != len(header):
+                    # Same behaviour as on_bad_lines for the other backends
+                    self.bad_lines += 1
+                    continue
+                rows.append(row)
+                if len(rows) >= self.chunk_size:
+                    yield self._to_frame(header, rows)
+                    rows = []
+            if rows:
+                yield self._to_frame(header, rows)
+
+    def _to_frame(self, header: List[str], rows: List[List[str]]) -> pd.DataFrame:
+        """Build a DataFrame and infer column types like pandas does"""
+        df = pd.DataFrame(rows, columns=header).replace('', None)
+        for column in df.columns:
+            values = df[column]
+            lowered = values.dropna().str.lower()
+            if len(lowered) and lowered.isin(['true', 'false']).all() and values.notna().all():
+                df[column] = lowered == 'true'
+                continue
+            try:
+                df[column] = pd.to_numeric(values)
+            except (ValueError, TypeError):
+                pass
+        return df
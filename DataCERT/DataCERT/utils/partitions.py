@@ -0,0 +1,161 @@
+from django.conf import settings
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+import logging
+import queue
+import threading
+
+from .chunking import AdaptiveChunker
+from .database import bulk_connection, execute_pipelined, read_chunks
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Marks the end of one partition scan in the result queue
+_SCAN_DONE = object()
+
+
+def partitioning_enabled() -> bool:
+    """Raw tables are range partitioned on id when a partition size is set"""
+    return settings.DATACERT_RAW_PARTITION_ROWS > 0
+
+
+def partition_name(table_name: str, index: int) -> str:
+    return f"{table_name}_p{index:05d}"
+
+
+def partition_bounds(index: int, size: int) -> Tuple[int, int]:
+    """First id and exclusive upper id of a partition, ids start at 1"""
+    return index * size + 1, (index + 1) * size + 1
+
+
+def create_partitions(cursor, schema_name: str, table_name: str, first_id: int, last_id: int,
+                      unlogged: bool = False) -> None:
+    """Create the partitions holding ids first_id to last_id, if missing"""
+    persistence = 'UNLOGGED ' if unlogged else ''
+    size = settings.DATACERT_RAW_PARTITION_ROWS
+    statements = []
+    for index in range((first_id - 1) // size, (last_id - 1) // size + 1):
+        lower, upper = partition_bounds(index, size)
+        statements.append(
+            f'CREATE {persistence}TABLE IF NOT EXISTS {schema_name}."{partition_name(table_name, index)}" '
+            f'PARTITION OF {schema_name}."{table_name}" FOR VALUES FROM ({lower}) TO ({upper})'
+        )
+    execute_pipelined(cursor, statements)
+
+
+def is_partitioned(cursor, schema_name: str, table_name: str) -> bool:
+    """Whether a table is partitioned, with or without partitions left"""
+    cursor.execute('SELECT relkind FROM pg_class WHERE oid = to_regclass(%s);', [f'{schema_name}."{table_name}"'])
+    row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def get_partitions(cursor, schema_name: str, table_name: str) -> List[Tuple[str, str]]:
+    """
+    Partitions of a table
+
+    Returns:
+        (name, bound) pairs in name order, empty for a plain table. The
+        bound is the FOR VALUES clause of the partition.
+    """
+    cursor.execute("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_namespace ON pg_namespace.oid = parent.relnamespace
+        WHERE pg_namespace.nspname = %s AND parent.relname = %s
+        ORDER BY child.relname;
+    """, [schema_name, table_name])
+    return cursor.fetchall()
+
+
+def move_partitions(cursor, source_schema: str, source_table: str,
+                    target_schema: str, target_table: str) -> int:
+    """
+    Move every partition of a table under another partitioned table
+
+    Partitions are detached and re-attached, rows are not copied. Unlogged
+    partitions are made logged first. The target table must already exist
+    and be partitioned the same way.
+
+    Returns:
+        Number of partitions moved
+    """
+    partitions = get_partitions(cursor, source_schema, source_table)
+    statements = []
+    for name, bound in partitions:
+        new_name = target_table + name[len(source_table):]
+        statements += [
+            f'ALTER TABLE {source_schema}."{source_table}" DETACH PARTITION {source_schema}."{name}"',
+            f'ALTER TABLE {source_schema}."{name}" SET LOGGED',
+            f'ALTER TABLE {source_schema}."{name}" SET SCHEMA {target_schema}',
+            f'ALTER TABLE {target_schema}."{name}" RENAME TO "{new_name}"',
+            f'ALTER TABLE {target_schema}."{target_table}" ATTACH PARTITION {target_schema}."{new_name}" {bound}',
+        ]
+    if statements:
+        execute_pipelined(cursor, statements)
+    return len(partitions)
+
+
+def scan_partitions(schema_name: str, partitions: List[str],
+                    chunk_size: Optional[int] = None) -> Iterator['pd.DataFrame']:
+    """
+    Read several partitions concurrently
+
+    Up to DATACERT_SCAN_WORKERS partitions are read at once, each on its
+    own connection. Chunks are yielded as they arrive, so rows of different
+    partitions are interleaved. Without a fixed chunk_size each worker
+    sizes its chunks from its share of the memory budget, which also
+    covers the few chunks waiting in the queue.
+    """
+    results: queue.Queue = queue.Queue(maxsize=settings.DATACERT_SCAN_WORKERS * 2)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        # Give up once the reader has gone away
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan(name: str) -> None:
+        try:
+            query = f'SELECT * FROM {schema_name}."{name}"'
+            if chunk_size:
+                chunker = AdaptiveChunker(initial_rows=chunk_size, budget_bytes=0)
+            else:
+                chunker = AdaptiveChunker(initial_rows=1000)
+            for chunk in read_chunks(bulk_connection(), query, chunker):
+                if not put(chunk):
+                    return
+        except Exception as e:
+            logger.error(f"Error scanning partition {name}: {str(e)}")
+            put(e)
+        finally:
+            put(_SCAN_DONE)
+            # Worker threads open their own connections
+            bulk_connection().close()
+
+    executor = ThreadPoolExecutor(max_workers=settings.DATACERT_SCAN_WORKERS, thread_name_prefix='scan')
+    try:
+        for name in partitions:
+            executor.submit(scan, name)
+        remaining = len(partitions)
+        while remaining:
+            item = results.get()
+            if item is _SCAN_DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                yield item
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
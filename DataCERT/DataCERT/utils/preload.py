@@ -0,0 +1,42 @@
+from django.conf import settings
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Modules only the ingest and validation paths need. They are imported on
+# first use, preload() imports them up front.
+HEAVY_MODULES = (
+    'numpy',
+    'pandas',
+    'chardet',
+    'DataCERT.utils.csv_processor',
+    'DataCERT.utils.validators.default',
+)
+
+
+def preload() -> float:
+    """
+    Import the heavy modules now
+
+    Worker processes that ingest or validate call this at startup so the
+    first request does not pay for the imports. Under a pre-forking server
+    that loads the application before forking (e.g. gunicorn --preload)
+    the modules are then shared by every worker.
+
+    Returns:
+        Seconds spent importing
+    """
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    elapsed = time.perf_counter() - started
+    logger.info(f"Preloaded {len(HEAVY_MODULES)} modules in {elapsed:.3f}s")
+    return elapsed
+
+
+def preload_if_enabled() -> None:
+    """Preload when DATACERT_PRELOAD is set, called by wsgi.py and asgi.py"""
+    if settings.DATACERT_PRELOAD:
+        preload()
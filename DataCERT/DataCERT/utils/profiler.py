@@ -0,0 +1,244 @@
+from typing import Any, Dict, List, Optional
+import math
+
+import numpy as np
+import pandas as pd
+
+# HyperLogLog precision, 2**12 registers give about 1.6% standard error
+HLL_PRECISION = 12
+
+# Counters kept per column by the heavy hitters summary
+TOP_K_CAPACITY = 64
+
+# Values reported in a stored profile
+TOP_K_REPORTED = 10
+
+# Value kinds counted in the type histogram
+VALUE_TYPES = ('integer', 'float', 'boolean', 'text')
+
+_BOOLEAN_VALUES = {'true', 'false'}
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Bit length of each uint64, exact, computed on 32 bit halves"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    return np.where(high > 0, 32 + np.frexp(high)[1], np.frexp(low)[1])
+
+
+class HyperLogLog:
+    """Approximate distinct counter, registers merge with an element-wise max"""
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray) -> None:
+        if not len(hashes):
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - _bit_length(remainder) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def estimate(self) -> int:
+        size = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / size)
+        raw = alpha * size * size / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate for small cardinalities
+        if raw <= 2.5 * size and zeros:
+            return int(round(size * math.log(size / zeros)))
+        return int(round(raw))
+
+
+class TopK:
+    """Misra-Gries heavy hitters, counts are lower bounds and summaries merge"""
+    def __init__(self, capacity: int = TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts: Dict[Any, int] = {}
+
+    def update_series(self, values: pd.Series) -> None:
+        """Add a chunk of values, summarised to capacity before merging"""
+        if values.empty:
+            return
+        counts = values.value_counts()
+        if len(counts) > self.capacity:
+            cutoff = counts.iloc[self.capacity]
+            counts = counts[counts > cutoff] - cutoff
+        self.update(counts.to_dict())
+
+    def update(self, counts: Dict[Any, int]) -> None:
+        for value, count in counts.items():
+            self.counts[value] = self.counts.get(value, 0) + count
+        self._trim()
+
+    def merge(self, other: 'TopK') -> None:
+        self.update(other.counts)
+
+    def _trim(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        cutoff = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {
+            value: count - cutoff
+            for value, count in self.counts.items()
+            if count > cutoff
+        }
+
+    def top(self, k: int = TOP_K_REPORTED) -> List[List[Any]]:
+        ranked = sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return [
+            [int(value) if isinstance(value, float) and value.is_integer() else value, count]
+            for value, count in ranked[:k]
+        ]
+
+
+class ColumnProfile:
+    """Streaming statistics of one column"""
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.null_count = 0
+        self.types = dict.fromkeys(VALUE_TYPES, 0)
+        self.numeric_min: Optional[float] = None
+        self.numeric_max: Optional[float] = None
+        self.text_min: Optional[str] = None
+        self.text_max: Optional[str] = None
+        self.distinct = HyperLogLog()
+        self.top_values = TopK()
+
+    def update(self, series: pd.Series) -> None:
+        self.count += len(series)
+        values = series.dropna()
+        self.null_count += len(series) - len(values)
+        if values.empty:
+            return
+
+        # Same rules as pd.to_numeric, which the validators use
+        if pd.api.types.is_bool_dtype(values):
+            numeric = pd.Series(np.nan, index=values.index)
+        else:
+            numeric = pd.to_numeric(values, errors='coerce')
+        is_numeric = numeric.notna()
+        is_integer = is_numeric & (numeric == np.floor(numeric))
+        text = values[~is_numeric].astype(str)
+        is_boolean = text.str.lower().isin(_BOOLEAN_VALUES)
+
+        self.types['integer'] += int(is_integer.sum())
+        self.types['float'] += int((is_numeric & ~is_integer).sum())
+        self.types['boolean'] += int(is_boolean.sum())
+        self.types['text'] += int((~is_boolean).sum())
+
+        finite = numeric[is_numeric & np.isfinite(numeric)]
+        if not finite.empty:
+            self._update_range('numeric', float(finite.min()), float(finite.max()))
+        if not text.empty:
+            self._update_range('text', text.min(), text.max())
+
+        # Numbers are counted by value and the rest as text, so chunks
+        # parsed with different dtypes agree and numbers are never formatted
+        numbers = numeric[is_numeric].astype(np.float64)
+        self.distinct.add_hashes(pd.util.hash_array(numbers.to_numpy()))
+        self.distinct.add_hashes(pd.util.hash_array(text.to_numpy(dtype=object)))
+        self.top_values.update_series(numbers)
+        self.top_values.update_series(text)
+
+    def _update_range(self, kind: str, low, high) -> None:
+        current_min = getattr(self, f'{kind}_min')
+        current_max = getattr(self, f'{kind}_max')
+        setattr(self, f'{kind}_min', low if current_min is None else min(current_min, low))
+        setattr(self, f'{kind}_max', high if current_max is None else max(current_max, high))
+
+    def merge(self, other: 'ColumnProfile') -> None:
+        self.count += other.count
+        self.null_count += other.null_count
+        for value_type in VALUE_TYPES:
+            self.types[value_type] += other.types[value_type]
+        if other.numeric_min is not None:
+            self._update_range('numeric', other.numeric_min, other.numeric_max)
+        if other.text_min is not None:
+            self._update_range('text', other.text_min, other.text_max)
+        self.distinct.merge(other.distinct)
+        self.top_values.merge(other.top_values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Numeric range when every value is numeric, text range otherwise
+        if self.types['boolean'] or self.types['text']:
+            low, high = self.text_min, self.text_max
+        else:
+            low, high = self.numeric_min, self.numeric_max
+            if not self.types['float'] and low is not None:
+                low, high = int(low), int(high)
+        return {
+            'count': self.count,
+            'null_count': self.null_count,
+            'types': dict(self.types),
+            'min': low,
+            'max': high,
+            'distinct': self.distinct.estimate(),
+            'top_values': self.top_values.top(),
+        }
+
+
+class TableProfile:
+    """
+    Single-pass profile of every column of a file
+
+    Fed chunk by chunk while the file loads. Profiles of separate parts
+    of a file, e.g. loaded in parallel, combine with merge().
+    """
+    def __init__(self):
+        self.rows = 0
+        self.columns: Dict[str, ColumnProfile] = {}
+
+    def update(self, df: pd.DataFrame) -> None:
+        self.rows += len(df)
+        for name in df.columns:
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = ColumnProfile(name)
+            column.update(df[name])
+
+    def merge(self, other: 'TableProfile') -> None:
+        self.rows += other.rows
+        for name, column in other.columns.items():
+            if name in self.columns:
+                self.columns[name].merge(column)
+            else:
+                self.columns[name] = column
+
+    def to_dict(self, partial: bool = False) -> Dict[str, Any]:
+        """
+        Args:
+            partial: True when some rows were not seen, e.g. a resumed load
+        """
+        return {
+            'rows': self.rows,
+            'partial': partial,
+            'columns': {name: column.to_dict() for name, column in self.columns.items()},
+        }
+
+
+def column_is_clean(profile: Optional[Dict[str, Any]], column: str, check: str) -> bool:
+    """
+    Whether a stored profile proves a column passes a check
+
+    Args:
+        profile: DataFile.profile
+        column: Column name
+        check: 'not_null' or 'numeric'
+    """
+    if not profile or profile.get('partial'):
+        return False
+    stats = profile['columns'].get(column)
+    if stats is None:
+        return False
+    if check == 'not_null':
+        return stats['null_count'] == 0
+    if check == 'numeric':
+        return stats['types']['boolean'] == 0 and stats['types']['text'] == 0
+    return False
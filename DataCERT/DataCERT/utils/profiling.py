@@ -0,0 +1,144 @@
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from contextlib import ExitStack
+from functools import wraps
+from typing import Dict, List, Any
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+import tracemalloc
+
+from ..models import ProfileCapture
+from .database import bulk_alias
+
+logger = logging.getLogger(__name__)
+
+# Number of entries kept in the text summaries
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 25
+TOP_QUERIES = 20
+
+
+class QueryRecorder:
+    """Database execute wrapper that counts and times every query"""
+    def __init__(self):
+        self.queries: List[Dict[str, Any]] = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql[:2000],
+                'many': many,
+                'seconds': time.perf_counter() - start,
+            })
+
+
+def _is_selected(request) -> bool:
+    """Only requests that ask for it are profiled"""
+    return (
+        request.GET.get('profile') == '1'
+        or request.POST.get('profile') == '1'
+        or request.headers.get('X-DataCERT-Profile') == '1'
+    )
+
+
+def profile_request(view_func):
+    """
+    Capture cProfile stats, top allocations and SQL timings for a view.
+
+    Controlled by settings.DATACERT_PROFILING. When it is off the view is
+    returned untouched. When it is on, only requests with profile=1 (query
+    string or form field) or an X-DataCERT-Profile: 1 header are profiled.
+    Queries are recorded on the default and the bulk connection.
+    The view may set request.data_file to attach the capture to a DataFile.
+    """
+    if not getattr(settings, 'DATACERT_PROFILING', False):
+        return view_func
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not _is_selected(request):
+            return view_func(request, *args, **kwargs)
+
+        recorder = QueryRecorder()
+        profiler = cProfile.Profile()
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as wrappers:
+                # COPY, DDL and table scans run on the bulk connection
+                for alias in {DEFAULT_DB_ALIAS, bulk_alias()}:
+                    wrappers.enter_context(connections[alias].execute_wrapper(recorder))
+                profiler.enable()
+                try:
+                    response = view_func(request, *args, **kwargs)
+                finally:
+                    profiler.disable()
+            return response
+        finally:
+            duration = time.perf_counter() - start
+            view_name = getattr(request.resolver_match, 'view_name', None) or view_func.__qualname__
+            _save_capture(request, view_name, duration, profiler, recorder, started_tracemalloc)
+
+    return wrapper
+
+
+def _save_capture(request, view_name: str, duration: float, profiler: cProfile.Profile,
+                  recorder: QueryRecorder, started_tracemalloc: bool) -> None:
+    """
+    Store a profile capture, never failing the request
+
+    Args:
+        started_tracemalloc: tracemalloc was started for this request and
+            is stopped here once its snapshot is taken
+    """
+    try:
+        # The view, or another thread, may have stopped tracing
+        allocations = ''
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            allocations = '\n'.join(
+                str(stat) for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]
+            )
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+
+        slowest = sorted(recorder.queries, key=lambda query: query['seconds'], reverse=True)
+
+        profiler.create_stats()
+        capture = ProfileCapture(
+            data_file=getattr(request, 'data_file', None),
+            view_name=view_name,
+            path=request.get_full_path()[:500],
+            method=request.method,
+            created_at=timezone.now(),
+            duration=duration,
+            query_count=len(recorder.queries),
+            query_time=sum(query['seconds'] for query in recorder.queries),
+            summary=summary.getvalue(),
+            allocations=allocations,
+            slow_queries=slowest[:TOP_QUERIES],
+        )
+        capture.stats_file.save(
+            f"{view_name}_{timezone.now():%Y%m%d%H%M%S}.prof",
+            ContentFile(marshal.dumps(profiler.stats)),
+            save=False,
+        )
+        capture.save()
+    except Exception as e:
+        logger.error(f"Error saving profile capture: {str(e)}")
+    finally:
+        if started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
@@ -0,0 +1,76 @@
+from django.core.cache import caches
+from typing import Dict, Any, Optional
+import re
+import time
+
+# Cache alias holding progress snapshots, see CACHES in settings
+PROGRESS_CACHE = 'progress'
+
+# Snapshots expire if a job dies without reporting the end
+PROGRESS_TIMEOUT = 60 * 60
+
+# Minimum seconds between two published snapshots of the same job
+PUBLISH_INTERVAL = 0.5
+
+PROGRESS_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def progress_key(progress_id: str) -> str:
+    return f'datacert:progress:{progress_id}'
+
+
+def get_progress(progress_id: str) -> Optional[Dict[str, Any]]:
+    return caches[PROGRESS_CACHE].get(progress_key(progress_id))
+
+
+async def aget_progress(progress_id: str) -> Optional[Dict[str, Any]]:
+    return await caches[PROGRESS_CACHE].aget(progress_key(progress_id))
+
+
+class ProgressReporter:
+    """
+    Publishes the progress of an ingest or validation job.
+
+    Updates are cheap to call on every chunk: a snapshot is only written
+    to the progress cache when the stage changes or PUBLISH_INTERVAL has
+    passed. Nothing is written to the database.
+    """
+    def __init__(self, progress_id: str, job: str):
+        if not PROGRESS_ID_PATTERN.match(progress_id):
+            raise ValueError('Invalid progress id')
+        self.key = progress_key(progress_id)
+        self.job = job
+        self.started = time.monotonic()
+        self.last_published = 0.0
+        self.state: Dict[str, Any] = {
+            'job': job,
+            'stage': 'starting',
+            'rows': 0,
+            'total_rows': None,
+            'bytes': None,
+            'errors': 0,
+            'done': False,
+            'success': None,
+            'message': '',
+        }
+
+    def update(self, force: bool = False, **fields) -> None:
+        """Update the job state, publishing it if due"""
+        if fields.get('stage', self.state['stage']) != self.state['stage']:
+            force = True
+        self.state.update(fields)
+
+        now = time.monotonic()
+        if force or now - self.last_published >= PUBLISH_INTERVAL:
+            self.last_published = now
+            self._publish(now)
+
+    def finish(self, success: bool, message: str = '') -> None:
+        self.update(force=True, stage='done' if success else 'failed', done=True, success=success, message=message)
+
+    def _publish(self, now: float) -> None:
+        elapsed = now - self.started
+        snapshot = dict(self.state)
+        snapshot['elapsed'] = round(elapsed, 2)
+        snapshot['rows_per_second'] = round(self.state['rows'] / elapsed, 1) if elapsed else None
+        caches[PROGRESS_CACHE].set(self.key, snapshot, PROGRESS_TIMEOUT)
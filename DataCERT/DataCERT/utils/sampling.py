@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional, Tuple
+import math
+
+# Normal quantile of the two-sided 95% confidence intervals
+Z_95 = 1.959964
+
+
+def wilson_interval(failures: int, trials: int, z: float = Z_95) -> Tuple[float, float]:
+    """
+    Wilson score confidence interval of a proportion
+
+    Stays inside [0, 1] and behaves well for rates close to 0, which is
+    where most error rates are.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    rate = min(failures, trials) / trials
+    denominator = 1 + z * z / trials
+    centre = (rate + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def sample_percent(sample_rows: int, total_rows: Optional[int]) -> float:
+    """TABLESAMPLE percentage expected to return about sample_rows rows"""
+    if not total_rows or sample_rows >= total_rows:
+        return 100.0
+    return max(0.0001, 100.0 * sample_rows / total_rows)
+
+
+def rate_estimate(failures: int, trials: int) -> Dict[str, Any]:
+    """Observed rate with its 95% interval, as stored on a report"""
+    low, high = wilson_interval(failures, trials)
+    return {
+        'failures': failures,
+        'rows': trials,
+        'rate': min(failures, trials) / trials if trials else 0.0,
+        'low': low,
+        'high': high,
+    }
@@ -1,17 +1,67 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
-import pandas as pd
-from django.db import connection
+from typing import TYPE_CHECKING, Dict, Iterator, List, Any, Optional, Tuple
+from django.conf import settings
+import datetime
+import logging
 from ...models import ValidationReport, ValidationError, DataFile
+from ..instrumentation import PipelineMetrics
+from ..progress import ProgressReporter
+from ..chunking import AdaptiveChunker
+from ..database import bulk_connection, execute_pipelined, read_chunks
+from ..error_storage import create_partition
+from ..partitions import get_partitions, scan_partitions
+from ..sampling import rate_estimate, sample_percent, wilson_interval
+from .keys import (
+    ForeignKey, UniqueKey, duplicate_rows_query, get_column_types, orphan_rows_query, temporary_index
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def json_safe(value: Any) -> Any:
+    """Turn a row read with pandas into values a JSON column stores, NaN and NaT become null"""
+    if isinstance(value, dict):
+        return {key: json_safe(item) for key, item in value.items()}
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, (datetime.date, datetime.time)):
+        # NaT is a datetime that never equals itself
+        return None if value != value else value.isoformat()
+    if hasattr(value, 'item'):
+        # numpy scalars
+        return json_safe(value.item())
+    return value
 
 class BaseValidator(ABC):
     """
     Abstract base class for all validators
     """
+    # Column lists to index on the raw table before validating, for
+    # validators that look rows up by value
+    index_columns: List[List[str]] = []
+    # Key rules checked in SQL against the whole raw table, see check_keys
+    unique_keys: List[UniqueKey] = []
+    foreign_keys: List[ForeignKey] = []
+
     def __init__(self, data_file: DataFile):
         self.data_file = data_file
         self.errors: List[Dict[str, Any]] = []
         self.processed_rows = 0
+        self.metrics = PipelineMetrics('validate')
+        # Set by the caller to publish live progress
+        self.progress: Optional[ProgressReporter] = None
+        # Set by the caller to validate a random sample of about this many rows
+        self.sample_rows: Optional[int] = None
+        # Stop once more than this share of rows fails, from
+        # DATACERT_ABORT_ERROR_RATE unless the caller overrides it
+        self.abort_error_rate: Optional[float] = settings.DATACERT_ABORT_ERROR_RATE / 100 or None
+        self.aborted = False
+        self.rows_checked = 0
+        self.failed_rows = set()
+        self.rule_counts: Dict[Tuple[str, str], int] = {}
         
     @abstractmethod
     def validate(self) -> bool:
@@ -21,42 +71,272 @@ class BaseValidator(ABC):
         """
         pass
     
-    def add_error(self, row_number: int, column_name: str, error_message: str, raw_data: Dict):
-        """Add an error to the error list"""
+    def add_error(self, row_number: int, column_name: str, error_message: str, raw_data: Dict,
+                  rule: str = 'error'):
+        """
+        Add an error to the error list
+
+        Args:
+            row_number: id of the row in the raw table, its position in the
+                file, so numbers hold for samples and partition scans
+            raw_data: The failing row, timestamps and NaN are stored as
+                text and null
+            rule: Short name of the failed check, errors are counted per
+                column and rule to estimate error rates
+        """
+        raw_data = json_safe(raw_data)
         self.errors.append({
             'row_number': row_number,
             'column_name': column_name,
             'error_message': error_message,
             'raw_data': raw_data
         })
+        key = (column_name, rule)
+        self.rule_counts[key] = self.rule_counts.get(key, 0) + 1
+        self.failed_rows.add(raw_data.get('id', row_number) if isinstance(raw_data, dict) else row_number)
+        if self.progress is not None:
+            self.progress.update(errors=len(self.errors))
     
     def save_validation_results(self) -> ValidationReport:
         """Save validation results to database"""
-        # Create validation report
-        report = ValidationReport.objects.create(
-            data_file=self.data_file,
-            passed=len(self.errors) == 0,
-            error_count=len(self.errors),
-            summary=f"Processed {self.processed_rows} rows, found {len(self.errors)} errors."
-        )
+        with self.metrics.stage('save_errors') as stats:
+            # Create validation report
+            estimates = self.error_estimates()
+            overall = estimates['overall']
+            if self.sample_rows:
+                summary = (
+                    f"Preview of {self.rows_checked} sampled rows, found {len(self.errors)} errors. "
+                    f"Estimated share of failing rows {overall['rate']:.2%} "
+                    f"(95% CI {overall['low']:.2%} to {overall['high']:.2%})."
+                )
+            elif self.aborted:
+                summary = (
+                    f"Stopped after {self.processed_rows} rows, found {len(self.errors)} errors. "
+                    f"Failing rows {overall['rate']:.2%} (95% CI {overall['low']:.2%} to "
+                    f"{overall['high']:.2%}) is over the limit of {self.abort_error_rate:.2%}."
+                )
+            else:
+                summary = f"Processed {self.processed_rows} rows, found {len(self.errors)} errors."
+            report = ValidationReport.objects.create(
+                data_file=self.data_file,
+                # A preview or a stopped run never clears a file for promotion
+                passed=len(self.errors) == 0 and not self.sample_rows and not self.aborted,
+                error_count=len(self.errors),
+                summary=summary,
+                mode='preview' if self.sample_rows else 'full',
+                aborted=self.aborted,
+                estimates=estimates
+            )
+        
+            # Create validation errors in the partition of the report's
+            # month, in batches sized like the chunks
+            if self.errors:
+                create_partition(report.validation_date)
+            chunker = AdaptiveChunker(initial_rows=1000, max_rows=10000)
+            start = 0
+            while start < len(self.errors):
+                chunker.observe_records(self.errors[start:start + chunker.rows])
+                batch = self.errors[start:start + chunker.rows]
+                ValidationError.objects.bulk_create([
+                    ValidationError(
+                        report=report,
+                        validation_date=report.validation_date,
+                        row_number=error['row_number'],
+                        column_name=error['column_name'],
+                        error_message=error['error_message'],
+                        raw_data=error['raw_data']
+                    ) for error in batch
+                ])
+                start += len(batch)
         
-        # Create validation errors
-        ValidationError.objects.bulk_create([
-            ValidationError(
-                report=report,
-                row_number=error['row_number'],
-                column_name=error['column_name'],
-                error_message=error['error_message'],
-                raw_data=error['raw_data']
-            ) for error in self.errors
-        ])
+            self.metrics.add(stats, rows=len(self.errors))
         
         return report
 
-    def get_table_data(self, chunk_size: int = 1000) -> pd.DataFrame:
-        """Get data from the raw schema in chunks"""
-        table_name = f"raw_{self.data_file.file_name.split('.')[0].lower()}"
-        query = f"""
-        SELECT * FROM raw."{table_name}"
+    def ensure_indexes(self) -> None:
+        """Build the indexes listed in index_columns, if missing"""
+        if not self.index_columns:
+            return
+        table_name = self.data_file.raw_table
+        statements = []
+        for columns in self.index_columns:
+            index_name = f"{table_name}_{'_'.join(columns)}_idx".lower().replace(' ', '_')
+            column_list = ', '.join(f'"{col}"' for col in columns)
+            statements.append(
+                f'CREATE INDEX IF NOT EXISTS "{index_name}" ON raw."{table_name}" ({column_list})'
+            )
+        statements.append(f'ANALYZE raw."{table_name}"')
+        with bulk_connection().cursor() as cursor:
+            execute_pipelined(cursor, statements)
+
+    def check_keys(self) -> bool:
+        """
+        Check the unique_keys and foreign_keys rules
+
+        The checks run inside Postgres on the whole raw table, so memory
+        does not grow with the number of keys. Offending rows are added as
+        errors with their row number, up to DATACERT_KEY_ERROR_LIMIT per
+        rule. Rules naming a column the file does not have are skipped.
+        Nothing is checked for a preview or a stopped run.
+
+        Returns:
+            True when no key rule failed
+        """
+        if not (self.unique_keys or self.foreign_keys) or self.sample_rows or self.aborted:
+            return True
+        table_name = self.data_file.raw_table
+        target_schema = settings.DATABASE_SCHEMAS['VALIDATED']
+        errors_before = len(self.errors)
+        with bulk_connection().cursor() as cursor:
+            column_types = get_column_types(cursor, 'raw', table_name)
+
+            for key in self.unique_keys:
+                if not set(key.columns) <= set(column_types):
+                    logger.info(f"Skipping unique key {key.columns}, not in {self.data_file.file_name}")
+                    continue
+                self._add_key_errors(
+                    duplicate_rows_query('raw', table_name, key), key.columns, 'duplicate_key',
+                    lambda row: f"Duplicate key {self._format_key(row, key.columns)}, first seen in row {row['first_id']}"
+                )
+
+            for key in self.foreign_keys:
+                if not set(key.columns) <= set(column_types):
+                    logger.info(f"Skipping foreign key {key.columns}, not in {self.data_file.file_name}")
+                    continue
+                target_types = get_column_types(cursor, target_schema, key.target_table)
+                if not set(key.target_columns) <= set(target_types):
+                    raise ValueError(
+                        f"Foreign key target {target_schema}.{key.target_table} "
+                        f"({', '.join(key.target_columns)}) does not exist"
+                    )
+                same_types = all(
+                    column_types[col] == target_types[target]
+                    for col, target in zip(key.columns, key.target_columns)
+                )
+                query = orphan_rows_query('raw', table_name, key, target_schema, compare_as_text=not same_types)
+                with temporary_index(cursor, target_schema, key.target_table, key.target_columns):
+                    self._add_key_errors(
+                        query, key.columns, 'missing_reference',
+                        lambda row: f"Key {self._format_key(row, key.columns)} not found in {key.target_table}"
+                    )
+        return len(self.errors) == errors_before
+
+    @staticmethod
+    def _format_key(row: Dict[str, Any], columns: List[str]) -> str:
+        return ', '.join(f"{col}={row[col]}" for col in columns)
+
+    def _add_key_errors(self, query: str, columns: List[str], rule: str, message) -> None:
+        """Add the rows returned by a key rule query as errors"""
+        limit = settings.DATACERT_KEY_ERROR_LIMIT
+        column_name = ', '.join(columns)
+        listed = 0
+        for chunk in read_chunks(bulk_connection(), f'{query} LIMIT {limit}', self._chunker()):
+            for row in chunk.to_dict('records'):
+                self.add_error(
+                    row_number=row['id'],
+                    column_name=column_name,
+                    error_message=message(row),
+                    raw_data={'id': row['id'], **{col: row[col] for col in columns}},
+                    rule=rule
+                )
+            listed += len(chunk)
+        if listed < limit:
+            return
+        # Count the rest without fetching them
+        with bulk_connection().cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM ({query}) violations;')
+            total = cursor.fetchone()[0]
+        if total > listed:
+            key = (column_name, rule)
+            self.rule_counts[key] = self.rule_counts.get(key, 0) + total - listed
+            logger.info(f"{rule} on {column_name}: listed {listed} of {total} rows")
+
+    def get_table_data(self, chunk_size: Optional[int] = None) -> Iterator['pd.DataFrame']:
+        """
+        Get data from the raw schema in chunks
+
+        Chunks are sized from DATACERT_MEMORY_BUDGET_MB and the width of
+        the rows unless chunk_size fixes them. Partitioned tables are
+        scanned one partition per worker, chunks then arrive in no
+        particular order.
+        """
+        table_name = self.data_file.raw_table
+        with bulk_connection().cursor() as cursor:
+            partitions = [name for name, _ in get_partitions(cursor, 'raw', table_name)]
+        if self.sample_rows:
+            # Every row is picked independently, unlike SYSTEM sampling of pages
+            percent = sample_percent(self.sample_rows, self.data_file.row_count)
+            query = f"""
+            SELECT * FROM raw."{table_name}" TABLESAMPLE BERNOULLI ({percent})
+            """
+            chunks = read_chunks(bulk_connection(), query, self._chunker(chunk_size))
+        elif len(partitions) > 1:
+            chunks = scan_partitions('raw', partitions, chunk_size)
+        else:
+            query = f"""
+            SELECT * FROM raw."{table_name}"
+            """
+            chunks = read_chunks(bulk_connection(), query, self._chunker(chunk_size))
+        return self._monitor_chunks(chunks)
+
+    def _chunker(self, chunk_size: Optional[int] = None) -> AdaptiveChunker:
+        if chunk_size:
+            return AdaptiveChunker(initial_rows=chunk_size, budget_bytes=0)
+        return AdaptiveChunker(initial_rows=1000)
+
+    def _monitor_chunks(self, chunks: Iterator['pd.DataFrame']) -> Iterator['pd.DataFrame']:
+        """Count checked rows, publish progress and stop early when asked to"""
+        if self.progress is not None:
+            total_rows = self.data_file.row_count
+            if self.sample_rows and total_rows:
+                total_rows = min(self.sample_rows, total_rows)
+            self.progress.update(stage='validate', total_rows=total_rows)
+        try:
+            for chunk in chunks:
+                yield chunk
+                # The chunk has been validated once the next one is asked for
+                self.rows_checked += len(chunk)
+                if self.progress is not None:
+                    self.progress.update(rows=self.rows_checked, errors=len(self.errors))
+                if self._should_abort():
+                    self.aborted = True
+                    logger.info(
+                        f"Stopping validation of {self.data_file.file_name} after "
+                        f"{self.rows_checked} rows, {len(self.failed_rows)} rows failed"
+                    )
+                    return
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    def _should_abort(self) -> bool:
+        if not self.abort_error_rate or self.sample_rows:
+            return False
+        failed = len(self.failed_rows)
+        # Over the limit for the whole file even if every other row passes
+        total_rows = self.data_file.row_count
+        if total_rows and failed / total_rows > self.abort_error_rate:
+            return True
+        if self.rows_checked < settings.DATACERT_ABORT_MIN_ROWS:
+            return False
+        low, _ = wilson_interval(failed, self.rows_checked)
+        return low > self.abort_error_rate
+
+    def error_estimates(self) -> Dict[str, Any]:
+        """
+        Share of checked rows failing overall and per column and rule
+
+        Exact for a full run, an estimate of the whole file for a preview.
+        Each rate comes with a 95% Wilson confidence interval.
         """
-        return pd.read_sql(query, connection, chunksize=chunk_size)
\ No newline at end of file
+        rules = [
+            {'column': column, 'rule': rule, **rate_estimate(count, self.rows_checked)}
+            for (column, rule), count in self.rule_counts.items()
+        ]
+        rules.sort(key=lambda estimate: estimate['rate'], reverse=True)
+        return {
+            'rows': self.rows_checked,
+            'sampled': bool(self.sample_rows),
+            'overall': rate_estimate(len(self.failed_rows), self.rows_checked),
+            'rules': rules,
+        }
\ No newline at end of file
@@ -1,7 +1,10 @@
 from typing import Dict, Any
+import logging
 import pandas as pd
-import numpy as np
 from .base import BaseValidator
+from ..profiler import column_is_clean
+
+logger = logging.getLogger(__name__)
 
 class DefaultValidator(BaseValidator):
     """
@@ -9,9 +12,14 @@ class DefaultValidator(BaseValidator):
     - Missing values
     - Data type consistency
     - Basic data quality rules
+
+    Key rules are opt-in, set unique_keys or foreign_keys on a subclass.
     """
+
     def __init__(self, data_file, expected_types: Dict[str, str] = None):
         super().__init__(data_file)
+        self.skip_missing = set()
+        self.skip_types = set()
         self.expected_types = {
             'Username': 'text',
             'Identifier': 'numeric',
@@ -23,8 +31,23 @@ class DefaultValidator(BaseValidator):
         """
         Perform validation on the data
         """
-        chunk_size = 1000
-        for chunk in self.get_table_data(chunk_size):
+        # Skip checks the ingest profile proves every row passes
+        profile = self.data_file.profile
+        self.skip_missing = {
+            column for column in (profile or {}).get('columns', {})
+            if column_is_clean(profile, column, 'not_null')
+        }
+        self.skip_types = {
+            column for column, expected_type in self.expected_types.items()
+            if expected_type == 'numeric' and column_is_clean(profile, column, 'numeric')
+        }
+        if self.skip_missing or self.skip_types:
+            logger.info(
+                f"Profile of {self.data_file.file_name} skips missing value checks on "
+                f"{sorted(self.skip_missing)} and type checks on {sorted(self.skip_types)}"
+            )
+
+        for chunk in self.get_table_data():
             self._validate_chunk(chunk)
             self.processed_rows += len(chunk)
             
@@ -41,36 +64,40 @@ class DefaultValidator(BaseValidator):
     def _check_missing_values(self, df: pd.DataFrame) -> None:
         """Check for missing values in the DataFrame"""
         for column in df.columns:
+            if column in self.skip_missing:
+                continue
             mask = df[column].isna()
             if mask.any():
-                missing_rows = df[mask].index.tolist()
-                for row_idx in missing_rows:
+                for row in df[mask].to_dict('records'):
                     self.add_error(
-                        row_number=row_idx + 1,  # +1 for human-readable row numbers
+                        row_number=row['id'],
                         column_name=column,
                         error_message=f"Missing value in column {column}",
-                        raw_data=df.iloc[row_idx].to_dict()
+                        raw_data=row,
+                        rule='missing_value'
                     )
     
     def _check_data_types(self, df: pd.DataFrame) -> None:
-        """Check data types against expected types"""
+        """Check data types against expected types, only values that do not convert fail"""
         for column, expected_type in self.expected_types.items():
-            if column not in df.columns:
+            if column not in df.columns or column in self.skip_types:
                 continue
-                
-            try:
-                if expected_type == 'numeric':
-                    pd.to_numeric(df[column], errors='raise')
-                elif expected_type == 'datetime':
-                    pd.to_datetime(df[column], errors='raise')
-                elif expected_type == 'boolean':
-                    df[column].astype(bool)
-            except (ValueError, TypeError) as e:
-                invalid_rows = df[~df[column].isna()].index.tolist()
-                for row_idx in invalid_rows:
+
+            values = df[column]
+            if expected_type == 'numeric':
+                converted = pd.to_numeric(values, errors='coerce')
+            elif expected_type == 'datetime':
+                converted = pd.to_datetime(values, errors='coerce')
+            else:
+                # Text and boolean columns accept any value
+                continue
+            invalid = converted.isna() & values.notna()
+            if invalid.any():
+                for row in df[invalid].to_dict('records'):
                     self.add_error(
-                        row_number=row_idx + 1,
+                        row_number=row['id'],
                         column_name=column,
-                        error_message=f"Invalid {expected_type} value: {df.iloc[row_idx][column]}",
-                        raw_data=df.iloc[row_idx].to_dict()
-                    )
\ No newline at end of file
+                        error_message=f"Invalid {expected_type} value: {row[column]}",
+                        raw_data=row,
+                        rule=f'invalid_{expected_type}'
+                    )
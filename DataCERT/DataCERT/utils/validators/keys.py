@@ -0,0 +1,155 @@
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+import logging
+import uuid
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class UniqueKey:
+    """
+    No two rows may share the values of these columns
+
+    Several columns make a composite key. Rows with a NULL in the key are
+    not compared, like a UNIQUE constraint.
+    """
+    columns: List[str]
+
+
+@dataclass
+class ForeignKey:
+    """
+    Values of these columns must exist in a validated table
+
+    Args:
+        columns: Columns of the file being validated
+        table: Base name of the referenced upload, e.g. users for
+            validated.validated_users
+        references: Matching columns of the referenced table, the same
+            names by default
+    """
+    columns: List[str]
+    table: str
+    references: Optional[List[str]] = None
+
+    @property
+    def target_columns(self) -> List[str]:
+        return self.references or self.columns
+
+    @property
+    def target_table(self) -> str:
+        return f"validated_{self.table.lower()}"
+
+
+def _columns(columns: List[str], alias: Optional[str] = None) -> str:
+    prefix = f'{alias}.' if alias else ''
+    return ', '.join(f'{prefix}"{col}"' for col in columns)
+
+
+def get_column_types(cursor, schema_name: str, table_name: str) -> Dict[str, str]:
+    """Column names of a table mapped to their types, empty when it does not exist"""
+    cursor.execute("""
+        SELECT column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position;
+    """, [schema_name, table_name])
+    return dict(cursor.fetchall())
+
+
+def duplicate_rows_query(schema_name: str, table_name: str, key: UniqueKey) -> str:
+    """
+    Rows repeating the key of an earlier row
+
+    Duplicate keys are found with one grouped pass, which Postgres spills
+    to disk when the keys do not fit in work_mem, then joined back to
+    their rows. Each row comes with first_id, the row it repeats.
+    """
+    not_null = ' AND '.join(f'"{col}" IS NOT NULL' for col in key.columns)
+    return f"""
+        WITH duplicate_keys AS (
+            SELECT {_columns(key.columns)}, MIN(id) AS first_id
+            FROM {schema_name}."{table_name}"
+            WHERE {not_null}
+            GROUP BY {_columns(key.columns)}
+            HAVING COUNT(*) > 1
+        )
+        SELECT source.id, {_columns(key.columns, 'source')}, duplicate_keys.first_id
+        FROM {schema_name}."{table_name}" source
+        JOIN duplicate_keys USING ({_columns(key.columns)})
+        WHERE source.id <> duplicate_keys.first_id
+        ORDER BY source.id
+    """
+
+
+def orphan_rows_query(schema_name: str, table_name: str, key: ForeignKey,
+                      target_schema: str, compare_as_text: bool = False) -> str:
+    """
+    Rows whose key is missing from the referenced table
+
+    Runs as an anti-join, rows with a NULL in the key are not checked.
+    compare_as_text casts both sides when the column types differ.
+    """
+    cast = '::text' if compare_as_text else ''
+    matches = ' AND '.join(
+        f'target."{target}"{cast} = source."{col}"{cast}'
+        for col, target in zip(key.columns, key.target_columns)
+    )
+    not_null = ' AND '.join(f'source."{col}" IS NOT NULL' for col in key.columns)
+    return f"""
+        SELECT source.id, {_columns(key.columns, 'source')}
+        FROM {schema_name}."{table_name}" source
+        WHERE {not_null}
+        AND NOT EXISTS (
+            SELECT 1 FROM {target_schema}."{key.target_table}" target
+            WHERE {matches}
+        )
+        ORDER BY source.id
+    """
+
+
+def has_index(cursor, schema_name: str, table_name: str, columns: List[str]) -> bool:
+    """Whether a valid index of the table starts with these columns, in order"""
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_index i
+            WHERE i.indrelid = to_regclass(%s) AND i.indisvalid
+            AND ARRAY(
+                SELECT a.attname::text
+                FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, position)
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = k.attnum
+                WHERE k.position <= %s
+                ORDER BY k.position
+            ) = %s::text[]
+        );
+    """, [f'{schema_name}."{table_name}"', len(columns), columns])
+    return cursor.fetchone()[0]
+
+
+@contextmanager
+def temporary_index(cursor, schema_name: str, table_name: str, columns: List[str]) -> Iterator[None]:
+    """
+    Index columns of a table for the duration of a check
+
+    The table may be a live validated table, so the index is built and
+    dropped CONCURRENTLY, which keeps writes going, and gets a name of its
+    own so checks running at the same time do not share or drop each
+    other's index. Must run outside a transaction. Nothing is built when a
+    valid index already starts with the columns.
+    """
+    if has_index(cursor, schema_name, table_name, columns):
+        yield
+        return
+
+    index_name = f"{table_name[:40]}_key_{uuid.uuid4().hex[:12]}"
+    try:
+        cursor.execute(
+            f'CREATE INDEX CONCURRENTLY "{index_name}" ON {schema_name}."{table_name}" ({_columns(columns)});'
+        )
+        cursor.execute(f'ANALYZE {schema_name}."{table_name}";')
+        yield
+    finally:
+        # Also removes the invalid index a failed build leaves behind
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {schema_name}."{index_name}";')
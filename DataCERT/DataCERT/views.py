@@ -4,26 +4,57 @@ from django.views.generic import DetailView
 from django.contrib import messages
 from django.core.files.storage import FileSystemStorage
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.conf import settings
+from django.utils import timezone
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Count
+from django.db.models import Count, Sum, Max
 
-from .forms import CSVUploadForm, ValidationForm
-from .models import DataFile, ValidationReport, ValidationError
-from .utils.csv_processor import CSVProcessor
-from .utils.validators.default import DefaultValidator
+from .forms import BatchUploadForm, CSVUploadForm, ValidationForm
+from .models import (
+    DataFile, IngestBatch, ValidationReport, ValidationError, PipelineRun, StageMetric, UploadSession
+)
+from .utils.batch import BatchIngester, fail_stale_batches
+from .utils.ingest import ingest_file, validate_file
 from .utils.validators.base import BaseValidator
 from .utils.data_mover import DataMover
+from .utils.data_exporter import DataExporter
+from .utils.profiling import profile_request
+from .utils.compression import COMPRESSED_SUFFIXES
+from .utils.progress import PROGRESS_ID_PATTERN, ProgressReporter, aget_progress
 
+import asyncio
+import base64
 import importlib.util
+import json
+import os
 import sys
 from io import StringIO
+from typing import Dict, Any, Optional
 
+def _get_progress(form, job: str) -> Optional[ProgressReporter]:
+    """Progress reporter for the token sent with the form, if any"""
+    progress_id = form.cleaned_data.get('progress_id')
+    return ProgressReporter(progress_id, job) if progress_id else None
+
+@method_decorator(profile_request, name='dispatch')
 class CSVUploadView(View):
     template_name = 'upload.html'
 
+    def get_context(self, form) -> Dict[str, Any]:
+        # Failed loads that stopped part way can be resumed
+        resumable_files = DataFile.objects.filter(
+            status='failed',
+            checkpoint__completed=False,
+            checkpoint__rows__gt=0
+        ).select_related('checkpoint').order_by('-upload_date')
+        return {'form': form, 'resumable_files': resumable_files}
+
     def get(self, request):
         form = CSVUploadForm()
-        return render(request, self.template_name, {'form': form})
+        return render(request, self.template_name, self.get_context(form))
 
     def post(self, request):
         form = CSVUploadForm(request.POST, request.FILES)
@@ -43,24 +74,18 @@ class CSVUploadView(View):
                     file_name=file.name,
                     status='uploaded',
                 )
+                request.data_file = data_file
                 
                 # Process the file
-                processor = CSVProcessor(fs.path(filename))
-                result = processor.process_file()
+                result = ingest_file(data_file, fs.path(filename), _get_progress(form, 'ingest'))
                 
                 if result['success']:
-                    data_file.status = 'uploaded'
-                    data_file.row_count = result['processed_rows']
-                    data_file.save()
-                    
                     messages.success(
                         request,
                         f'File processed successfully. {result["processed_rows"]} rows imported.'
                     )
                     return redirect('validate')
                 else:
-                    data_file.status = 'failed'
-                    data_file.save()
                     messages.error(
                         request,
                         f'Error processing file: {result.get("error", "Unknown error")}'
@@ -71,8 +96,9 @@ class CSVUploadView(View):
                     data_file.save()
                 messages.error(request, f'Error processing file: {str(e)}')
             
-        return render(request, self.template_name, {'form': form})
+        return render(request, self.template_name, self.get_context(form))
 
+@method_decorator(profile_request, name='dispatch')
 class ValidationView(View):
     template_name = 'validate.html'
     
@@ -84,36 +110,43 @@ class ValidationView(View):
         form = ValidationForm(request.POST)
         if form.is_valid():
             data_file = form.cleaned_data['data_file']
+            request.data_file = data_file
             validator_type = form.cleaned_data['validator_type']
+            preview = form.cleaned_data['mode'] == 'preview'
+            abort_error_rate = form.cleaned_data.get('abort_error_rate')
+            progress = _get_progress(form, 'validate')
             
             try:
                 if validator_type == 'default':
+                    # Imported here so web workers only load pandas and numpy when validating
+                    from .utils.validators.default import DefaultValidator
                     validator = DefaultValidator(data_file)
                 else:
                     # Create custom validator from code
                     custom_code = form.cleaned_data['custom_validator_code']
                     validator = self._create_custom_validator(custom_code, data_file)
                 
-                # Update file status
-                data_file.status = 'validating'
-                data_file.save()
-                
-                # Run validation
-                validation_passed = validator.validate()
-                
-                # Save results
-                report = validator.save_validation_results()
-                
-                # Update file status
-                data_file.status = 'validated' if validation_passed else 'failed'
-                data_file.save()
+                # Run validation and save results
+                validator.progress = progress
+                if preview:
+                    validator.sample_rows = settings.DATACERT_PREVIEW_SAMPLE_ROWS
+                elif abort_error_rate is not None:
+                    # 0 turns the setting's default off for this run
+                    validator.abort_error_rate = abort_error_rate / 100 or None
+                report = validate_file(validator, preview=preview)
                 
                 return redirect('validation_report', report_id=report.id)
                 
             except Exception as e:
+                if progress is not None:
+                    progress.finish(False, str(e))
                 messages.error(request, f'Validation error: {str(e)}')
-                data_file.status = 'failed'
-                data_file.save()
+                # Only a validation that got under way changes the status. A
+                # busy raw table leaves the file to validate again later and a
+                # lost one stays failed, see validate_file.
+                if data_file.status == 'validating':
+                    data_file.status = 'uploaded' if preview else 'failed'
+                    data_file.save()
         
         return render(request, self.template_name, {'form': form})
     
@@ -138,6 +171,7 @@ from typing import Dict, Any
 import pandas as pd
 import numpy as np
 from DataCERT.utils.validators.base import BaseValidator
+from DataCERT.utils.validators.keys import ForeignKey, UniqueKey
 
 {code}
         """
@@ -193,16 +227,42 @@ class ValidationReportView(DetailView):
             .order_by('-error_count')
         )
 
+        # Timing breakdown of every pipeline run for this file
+        pipeline_runs = (
+            PipelineRun.objects.filter(data_file=self.object.data_file)
+            .prefetch_related('stages')
+            .order_by('started_at')
+        )
+
+        # Error rates per column and rule, in percent for display
+        estimates = self.object.estimates or {}
+        error_estimates = [
+            {
+                'column': estimate['column'],
+                'rule': estimate['rule'],
+                'failures': estimate['failures'],
+                'rate': estimate['rate'] * 100,
+                'low': estimate['low'] * 100,
+                'high': estimate['high'] * 100,
+            }
+            for estimate in estimates.get('rules', [])
+        ]
+
         context.update({
             'validation_errors': validation_errors,
             'error_summary': error_summary,
+            'pipeline_runs': pipeline_runs,
+            'error_estimates': error_estimates,
+            'estimated_rows': estimates.get('rows'),
         })
         
         return context
 
+@method_decorator(profile_request, name='dispatch')
 class MoveToValidatedView(View):
     def post(self, request, report_id):
         report = get_object_or_404(ValidationReport, id=report_id)
+        request.data_file = report.data_file
         
         # Only move data that passed validation
         if not report.passed:
@@ -230,10 +290,373 @@ class MoveToValidatedView(View):
                     request,
                     f"Data moved successfully but cleanup failed: {cleanup_result['error']}"
                 )
+            mover.metrics.save(report.data_file, cleanup_result['success'])
         else:
+            mover.metrics.save(report.data_file, False)
             messages.error(
                 request,
                 f"Failed to move data: {result.get('error', 'Unknown error')}"
             )
             
-        return redirect('validation_report', report_id=report_id)
\ No newline at end of file
+        return redirect('validation_report', report_id=report_id)
+
+class ExportValidatedView(View):
+    def get(self, request, report_id):
+        report = get_object_or_404(ValidationReport, id=report_id)
+        export_format = request.GET.get('format', 'csv')
+        columns = [
+            col for value in request.GET.getlist('columns')
+            for col in value.split(',') if col
+        ]
+
+        try:
+            exporter = DataExporter(
+                report.data_file.table_name,
+                columns=columns,
+                export_format=export_format
+            )
+        except ValueError as e:
+            messages.error(request, f'Export failed: {str(e)}')
+            return redirect('validation_report', report_id=report_id)
+
+        # No Content-Length, so the response is sent with chunked transfer encoding
+        response = StreamingHttpResponse(
+            exporter.stream(),
+            content_type=exporter.content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{exporter.file_name}"'
+        return response
+
+class MetricsView(View):
+    """Pipeline metrics in the Prometheus text exposition format"""
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def get(self, request):
+        lines = []
+
+        runs = (
+            PipelineRun.objects.values('kind', 'success')
+            .annotate(total=Count('id'))
+            .order_by('kind', 'success')
+        )
+        lines.append('# HELP datacert_pipeline_runs_total Pipeline runs by kind and outcome.')
+        lines.append('# TYPE datacert_pipeline_runs_total counter')
+        for run in runs:
+            success = 'unknown' if run['success'] is None else str(run['success']).lower()
+            lines.append(
+                f'datacert_pipeline_runs_total{{kind="{run["kind"]}",success="{success}"}} {run["total"]}'
+            )
+
+        stages = (
+            StageMetric.objects.values('run__kind', 'stage')
+            .annotate(
+                count=Count('id'),
+                wall_time=Sum('wall_time'),
+                cpu_time=Sum('cpu_time'),
+                rows=Sum('rows'),
+                bytes=Sum('bytes'),
+                peak_rss=Max('peak_rss'),
+            )
+            .order_by('run__kind', 'stage')
+        )
+        series = [
+            ('datacert_stage_executions_total', 'counter', 'count', 'Stage executions.'),
+            ('datacert_stage_wall_seconds_total', 'counter', 'wall_time', 'Wall clock time spent in a stage.'),
+            ('datacert_stage_cpu_seconds_total', 'counter', 'cpu_time', 'CPU time spent in a stage.'),
+            ('datacert_stage_rows_total', 'counter', 'rows', 'Rows handled by a stage.'),
+            ('datacert_stage_bytes_total', 'counter', 'bytes', 'Bytes handled by a stage.'),
+            ('datacert_stage_peak_rss_bytes', 'gauge', 'peak_rss', 'Highest RSS sampled while a stage ran.'),
+        ]
+        for name, metric_type, field, help_text in series:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for stage in stages:
+                if stage[field] is None:
+                    continue
+                lines.append(
+                    f'{name}{{kind="{stage["run__kind"]}",stage="{stage["stage"]}"}} {stage[field]}'
+                )
+
+        return HttpResponse('\n'.join(lines) + '\n', content_type=self.content_type)
+
+@method_decorator(profile_request, name='dispatch')
+class RetryIngestView(View):
+    def post(self, request, data_file_id):
+        data_file = get_object_or_404(DataFile, id=data_file_id, status='failed')
+        request.data_file = data_file
+
+        checkpoint = getattr(data_file, 'checkpoint', None)
+        if checkpoint is None or not os.path.exists(checkpoint.file_path):
+            messages.error(request, 'The uploaded file is no longer available, please upload it again.')
+            return redirect('csv_upload')
+
+        result = ingest_file(data_file, checkpoint.file_path)
+        if result['success']:
+            messages.success(
+                request,
+                f'File processed successfully. {result["processed_rows"]} rows imported.'
+            )
+            return redirect('validate')
+
+        messages.error(
+            request,
+            f'Error processing file: {result.get("error", "Unknown error")}'
+        )
+        return redirect('csv_upload')
+
+@method_decorator(profile_request, name='dispatch')
+class BatchUploadView(View):
+    template_name = 'batch_upload.html'
+
+    def get_context(self, form) -> Dict[str, Any]:
+        # Batches run in a worker thread, close those whose worker went away
+        fail_stale_batches()
+        batches = IngestBatch.objects.order_by('-created_at')[:20]
+        return {'form': form, 'batches': batches}
+
+    def get(self, request):
+        form = BatchUploadForm()
+        return render(request, self.template_name, self.get_context(form))
+
+    def post(self, request):
+        form = BatchUploadForm(request.POST, request.FILES)
+        if not form.is_valid():
+            return render(request, self.template_name, self.get_context(form))
+
+        batch = IngestBatch.objects.create(
+            name=form.cleaned_data['name'] or timezone.now().strftime('Upload %Y-%m-%d %H:%M:%S'),
+            source='upload',
+            validate=form.cleaned_data['validate'],
+        )
+        fs = FileSystemStorage()
+        ingester = BatchIngester(batch)
+        for file in form.cleaned_data['files']:
+            filename = fs.save(f'csv_uploads/batch_{batch.id}/{file.name}', file)
+            ingester.add_file(fs.path(filename), file.name)
+
+        # The files load in the background, the batch page follows them
+        ingester.start()
+        messages.success(request, f'Batch started with {len(ingester.files)} files.')
+        return redirect('batch_detail', batch_id=batch.id)
+
+class BatchDetailView(DetailView):
+    model = IngestBatch
+    template_name = 'batch_detail.html'
+    context_object_name = 'batch'
+    pk_url_kwarg = 'batch_id'
+
+    def get_object(self, queryset=None):
+        fail_stale_batches()
+        return super().get_object(queryset)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        files = self.object.files.order_by('file_name').prefetch_related('validationreport_set')
+        context['files'] = [
+            {
+                'data_file': data_file,
+                'report': max(data_file.validationreport_set.all(), key=lambda r: r.validation_date, default=None),
+            }
+            for data_file in files
+        ]
+        context['counts'] = self.object.file_counts()
+        return context
+
+
+TUS_VERSION = '1.0.0'
+
+# Uploads are written here until all bytes have arrived
+PARTIAL_UPLOAD_DIR = 'csv_uploads/partial'
+
+# Size of the blocks read from a PATCH request body
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+
+def _tus_response(status: int = 204, **headers) -> HttpResponse:
+    response = HttpResponse(status=status)
+    response['Tus-Resumable'] = TUS_VERSION
+    response['Cache-Control'] = 'no-store'
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = str(value)
+    return response
+
+
+def _partial_path(session: UploadSession) -> str:
+    return os.path.join(settings.MEDIA_ROOT, PARTIAL_UPLOAD_DIR, f'{session.id}.part')
+
+
+def _parse_upload_metadata(header: str) -> Dict[str, str]:
+    """Decode a tus Upload-Metadata header: comma-separated 'key base64value' pairs"""
+    metadata = {}
+    for pair in header.split(','):
+        if not pair.strip():
+            continue
+        key, _, value = pair.strip().partition(' ')
+        metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+    return metadata
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ResumableUploadView(View):
+    """
+    Creation endpoint of the tus resumable upload protocol
+
+    POST with Upload-Length and Upload-Metadata (filename) creates an upload
+    and returns its URL in the Location header.
+    """
+    def options(self, request, *args, **kwargs):
+        return _tus_response(
+            Tus_Version=TUS_VERSION,
+            Tus_Extension='creation',
+            Tus_Max_Size=2 * 1024 * 1024 * 1024,
+        )
+
+    def post(self, request):
+        try:
+            upload_length = int(request.headers['Upload-Length'])
+            metadata = _parse_upload_metadata(request.headers.get('Upload-Metadata', ''))
+        except (KeyError, ValueError):
+            return _tus_response(status=400)
+
+        file_name = os.path.basename(metadata.get('filename', ''))
+        if not file_name.lower().endswith(('.csv',) + COMPRESSED_SUFFIXES):
+            return _tus_response(status=415)
+        if upload_length > 2 * 1024 * 1024 * 1024:  # 2GB limit, as for form uploads
+            return _tus_response(status=413)
+
+        session = UploadSession.objects.create(file_name=file_name, upload_length=upload_length)
+        os.makedirs(os.path.dirname(_partial_path(session)), exist_ok=True)
+        open(_partial_path(session), 'wb').close()
+
+        return _tus_response(
+            status=201,
+            Location=request.build_absolute_uri(f'{request.path.rstrip("/")}/{session.id}/'),
+            Upload_Offset=0,
+        )
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ResumableUploadDetailView(View):
+    """
+    Offset endpoint of the tus resumable upload protocol
+
+    HEAD returns how many bytes the server has. PATCH appends bytes at that
+    offset; once the upload is complete it is ingested like a form upload.
+    """
+    def head(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        return _tus_response(
+            status=200,
+            Upload_Offset=session.upload_offset,
+            Upload_Length=session.upload_length,
+        )
+
+    def patch(self, request, upload_id):
+        session = get_object_or_404(UploadSession, id=upload_id)
+        if session.completed_at is not None:
+            return _tus_response(status=403)
+        if request.content_type != 'application/offset+octet-stream':
+            return _tus_response(status=415)
+        try:
+            offset = int(request.headers['Upload-Offset'])
+        except (KeyError, ValueError):
+            return _tus_response(status=400)
+        if offset != session.upload_offset:
+            return _tus_response(status=409, Upload_Offset=session.upload_offset)
+
+        path = _partial_path(session)
+        with open(path, 'r+b') as partial:
+            # Drop any bytes written after the last recorded offset
+            partial.truncate(offset)
+            partial.seek(offset)
+            try:
+                for block in iter(lambda: request.read(UPLOAD_BLOCK_SIZE), b''):
+                    if offset + len(block) > session.upload_length:
+                        return _tus_response(status=413, Upload_Offset=session.upload_offset)
+                    partial.write(block)
+                    offset += len(block)
+            finally:
+                # Keep whatever arrived before a dropped connection
+                partial.flush()
+                os.fsync(partial.fileno())
+                session.upload_offset = offset
+                session.save(update_fields=['upload_offset'])
+
+        if session.upload_offset < session.upload_length:
+            return _tus_response(Upload_Offset=session.upload_offset)
+
+        data_file, file_path = self._complete(session, path)
+        request.data_file = data_file
+        result = ingest_file(data_file, file_path)
+
+        headers = {'DataCERT_Data_File': data_file.id, 'DataCERT_Status': data_file.status}
+        if not result['success']:
+            headers['DataCERT_Error'] = ' '.join(result.get('error', 'Unknown error').split())
+        return _tus_response(Upload_Offset=session.upload_offset, **headers)
+
+    def _complete(self, session: UploadSession, path: str):
+        """Move the finished upload next to form uploads and create its DataFile"""
+        fs = FileSystemStorage()
+        # A taken name gets a suffix, the tables are still named after
+        # session.file_name, see DataFile.table_name
+        filename = fs.get_available_name(f'csv_uploads/{session.file_name}')
+        os.replace(path, fs.path(filename))
+
+        data_file = DataFile.objects.create(file_name=session.file_name, status='uploaded')
+        session.data_file = data_file
+        session.completed_at = timezone.now()
+        session.save(update_fields=['data_file', 'completed_at'])
+        return data_file, fs.path(filename)
+
+
+class ProgressStreamView(View):
+    """
+    Server-Sent Events stream of a running ingest or validation job
+
+    Async, so under ASGI a watching client does not hold a worker thread.
+    Snapshots are read from the progress cache, never from the database.
+    """
+    poll_interval = 0.5
+    heartbeat_interval = 15
+    # Give up on jobs that never start. The wait includes sending the
+    # request body, ingest only publishes once the upload has arrived, so
+    # it allows for a 2 GB file on a slow link. A client that goes away,
+    # e.g. when a form fails validation, ends the stream at the next
+    # heartbeat long before that.
+    start_timeout = 6 * 60 * 60
+
+    async def get(self, request, progress_id):
+        if not PROGRESS_ID_PATTERN.match(progress_id):
+            return HttpResponse(status=404)
+        response = StreamingHttpResponse(
+            self._events(progress_id),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def _events(self, progress_id: str):
+        loop = asyncio.get_running_loop()
+        started = last_sent = loop.time()
+        last_snapshot = None
+        yield 'retry: 2000\n\n'
+
+        while True:
+            snapshot = await aget_progress(progress_id)
+            now = loop.time()
+
+            if snapshot is not None and snapshot != last_snapshot:
+                last_snapshot = snapshot
+                last_sent = now
+                yield f'event: progress\ndata: {json.dumps(snapshot)}\n\n'
+                if snapshot.get('done'):
+                    return
+            elif snapshot is None and now - started > self.start_timeout:
+                yield 'event: timeout\ndata: {}\n\n'
+                return
+            elif now - last_sent > self.heartbeat_interval:
+                last_sent = now
+                yield ': heartbeat\n\n'
+
+            await asyncio.sleep(self.poll_interval)
\ No newline at end of file
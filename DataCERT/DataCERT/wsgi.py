@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'DataCERT.settings')
 
 application = get_wsgi_application()
+
+# Optionally import the ingest and validation dependencies before the
+# first request, see DATACERT_PRELOAD
+from DataCERT.utils.preload import preload_if_enabled  # noqa: E402
+
+preload_if_enabled()